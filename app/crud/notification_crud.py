@@ -1,6 +1,11 @@
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationArchive
+from app.utils.pagination import paginate
+from app.services.unread_counter import unread_counter
+from app.config.settings import settings
 from fastapi import HTTPException, status
+from datetime import datetime
 
 def create_notification(db: Session, user_id: int, title: str, message: str, type: str):
     db_notification = Notification(
@@ -10,6 +15,7 @@ def create_notification(db: Session, user_id: int, title: str, message: str, typ
         type=type
     )
     db.add(db_notification)
+    unread_counter.adjust(db, user_id, 1)
     db.commit()
     db.refresh(db_notification)
     return db_notification
@@ -20,6 +26,46 @@ def get_user_notifications(db: Session, user_id: int, unread_only: bool = False)
         query = query.filter(Notification.is_read == False)
     return query.order_by(Notification.created_at.desc()).all()
 
+def get_user_notifications_page(db: Session, user_id: int, unread_only: bool = False, cursor: str = None, limit: int = settings.DEFAULT_PAGE_SIZE):
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == False)
+    # Newest first; id breaks ties between notifications created in the same instant
+    return paginate(
+        query, [Notification.created_at, Notification.id], cursor, limit, descending=True
+    )
+
+def get_unread_count(db: Session, user_id: int):
+    return unread_counter.get(db, user_id)
+
+def get_archived_notifications_page(db: Session, user_id: int, cursor: str = None, limit: int = settings.DEFAULT_PAGE_SIZE):
+    query = db.query(NotificationArchive).filter(NotificationArchive.user_id == user_id)
+    return paginate(
+        query, [NotificationArchive.created_at, NotificationArchive.id], cursor, limit, descending=True
+    )
+
+def archive_read_notifications(db: Session, before: datetime, batch_size: int = settings.NOTIFICATION_COMPACTION_BATCH):
+    """Move read notifications created before `before` to the archive, one transaction per batch"""
+    columns = ["id", "user_id", "title", "message", "type", "is_read", "created_at"]
+    moved = 0
+    while True:
+        ids = db.scalars(
+            select(Notification.id).where(
+                Notification.is_read == True,
+                Notification.created_at < before
+            ).order_by(Notification.id).limit(batch_size)
+        ).all()
+        if not ids:
+            return moved
+        
+        db.execute(insert(NotificationArchive).from_select(
+            columns,
+            select(*(getattr(Notification, column) for column in columns)).where(Notification.id.in_(ids))
+        ))
+        db.execute(delete(Notification).where(Notification.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+        moved += len(ids)
+
 def mark_notification_as_read(db: Session, notification_id: int, user_id: int):
     notification = db.query(Notification).filter(
         Notification.id == notification_id,
@@ -29,18 +75,31 @@ def mark_notification_as_read(db: Session, notification_id: int, user_id: int):
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
     
+    if not notification.is_read:
+        unread_counter.adjust(db, user_id, -1)
     notification.is_read = True
     db.commit()
     return notification
 
-def mark_all_notifications_as_read(db: Session, user_id: int):
-    notifications = db.query(Notification).filter(
+def mark_notifications_as_read(db: Session, user_id: int, ids: list = None, type: str = None, before: datetime = None):
+    """Mark the user's unread notifications matching all given filters as read in one UPDATE"""
+    query = update(Notification).where(
         Notification.user_id == user_id,
         Notification.is_read == False
-    ).all()
-    
-    for notification in notifications:
-        notification.is_read = True
+    )
+    if ids is not None:
+        query = query.where(Notification.id.in_(ids))
+    if type is not None:
+        query = query.where(Notification.type == type)
+    if before is not None:
+        query = query.where(Notification.created_at < before)
     
+    updated = db.execute(
+        query.values(is_read=True).execution_options(synchronize_session=False)
+    ).rowcount
+    unread_counter.adjust(db, user_id, -updated)
     db.commit()
-    return {"message": f"Marked {len(notifications)} notifications as read"}
\ No newline at end of file
+    return {"message": f"Marked {updated} notifications as read"}
+
+def mark_all_notifications_as_read(db: Session, user_id: int):
+    return mark_notifications_as_read(db, user_id)
\ No newline at end of file
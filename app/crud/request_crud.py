@@ -2,22 +2,65 @@ from sqlalchemy.orm import Session
 from app.models.request import Request
 from app.models.user import User
 from app.models.slot import Slot
-from app.schemas.request_schema import RequestCreate, RequestUpdate
+from app.schemas.request_schema import RequestCreate, RequestUpdate, RequestResponse
+from app.utils.pagination import paginate
+from app.crud.slot_crud import set_slot_status
+from app.services.dashboard_counters import dashboard_counters
+from app.config.settings import settings
 from fastapi import HTTPException, status
 from datetime import datetime
 
 def get_request_by_id(db: Session, request_id: int):
     return db.query(Request).filter(Request.id == request_id).first()
 
-def get_all_requests(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Request).offset(skip).limit(limit).all()
-
 def get_pending_requests(db: Session):
     return db.query(Request).filter(Request.status == "pending").all()
 
 def get_requests_by_type(db: Session, request_type: str):
     return db.query(Request).filter(Request.request_type == request_type).all()
 
+def _enriched_requests_query(db: Session):
+    # Resident name and slot number come back in the same row as the request
+    return db.query(Request, User.full_name, Slot.slot_number).outerjoin(
+        User, User.id == Request.resident_id
+    ).outerjoin(
+        Slot, Slot.id == Request.slot_id
+    )
+
+def _to_request_response(req: Request, resident_name: str, slot_number: str):
+    return RequestResponse(
+        id=req.id,
+        request_type=req.request_type,
+        description=req.description,
+        slot_id=req.slot_id,
+        status=req.status,
+        resident_id=req.resident_id,
+        resident_name=resident_name,
+        slot_number=slot_number
+    )
+
+def get_enriched_requests(db: Session, status: str = None, request_type: str = None, resident_id: int = None):
+    """Get requests with resident name and slot number in a single query"""
+    query = _enriched_requests_query(db)
+    if status:
+        query = query.filter(Request.status == status)
+    if request_type:
+        query = query.filter(Request.request_type == request_type)
+    if resident_id:
+        query = query.filter(Request.resident_id == resident_id)
+    
+    return [
+        _to_request_response(req, resident_name, slot_number)
+        for req, resident_name, slot_number in query.order_by(Request.id).all()
+    ]
+
+def get_all_requests(db: Session, cursor: str = None, limit: int = settings.DEFAULT_PAGE_SIZE):
+    rows, next_cursor = paginate(
+        _enriched_requests_query(db), [Request.id], cursor, limit,
+        key=lambda row: [row[0].id]
+    )
+    return [_to_request_response(*row) for row in rows], next_cursor
+
 def create_request(db: Session, request: RequestCreate):
     # Check if resident exists
     resident = db.query(User).filter(User.id == request.resident_id, User.role == "resident").first()
@@ -43,6 +86,7 @@ def create_request(db: Session, request: RequestCreate):
         slot_id=request.slot_id
     )
     db.add(db_request)
+    dashboard_counters.request_status_changed(db, None, db_request.status)
     db.commit()
     db.refresh(db_request)
     return db_request
@@ -55,13 +99,14 @@ def update_request_status(db: Session, request_id: int, status: str):
             detail="Request not found"
         )
     
+    dashboard_counters.request_status_changed(db, db_request.status, status)
     db_request.status = status
     
     # If it's a damage report and approved, mark slot as damaged
     if db_request.request_type == "damage_report" and status == "approved":
         slot = db.query(Slot).filter(Slot.id == db_request.slot_id).first()
         if slot:
-            slot.status = "damaged"
+            set_slot_status(db, slot, "damaged")
     
     db.commit()
     db.refresh(db_request)
@@ -1,6 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 from app.models.slot import Slot
 from app.schemas.slot_schema import SlotCreate, SlotUpdate
+from app.utils.pagination import paginate
+from app.services.slot_events import record_transition
+from app.config.settings import settings
 from fastapi import HTTPException, status
 
 def get_slot_by_id(db: Session, slot_id: int):
@@ -9,8 +14,10 @@ def get_slot_by_id(db: Session, slot_id: int):
 def get_slot_by_number(db: Session, slot_number: str):
     return db.query(Slot).filter(Slot.slot_number == slot_number).first()
 
-def get_all_slots(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Slot).offset(skip).limit(limit).all()
+def get_all_slots(db: Session, cursor: str = None, limit: int = settings.DEFAULT_PAGE_SIZE):
+    # Assigned residents are loaded for the whole page in one extra query
+    query = db.query(Slot).options(selectinload(Slot.residents))
+    return paginate(query, [Slot.id], cursor, limit)
 
 def get_slots_by_status(db: Session, status: str):
     return db.query(Slot).filter(Slot.status == status).all()
@@ -18,6 +25,84 @@ def get_slots_by_status(db: Session, status: str):
 def get_slots_by_type(db: Session, slot_type: str):
     return db.query(Slot).filter(Slot.slot_type == slot_type).all()
 
+def set_slot_status(db: Session, slot: Slot, new_status: str):
+    """Change a slot's status; allocator and listeners are notified on commit"""
+    if slot.status != new_status:
+        record_transition(db, slot.id, slot.slot_type, slot.status, new_status)
+    slot.status = new_status
+
+def _claim_first(db: Session, query):
+    if db.get_bind().dialect.name == "postgresql":
+        # Rows already locked by concurrent claimers are skipped rather than waited on;
+        # the locked row is re-read even if a stale copy sits in the identity map
+        slot = query.with_for_update(skip_locked=True).execution_options(populate_existing=True).first()
+        if slot:
+            set_slot_status(db, slot, "occupied")
+            db.flush()
+        return slot
+    
+    # SQLite has no row locks: compare-and-set each candidate until one sticks
+    while True:
+        slot_id = query.with_entities(Slot.id).limit(1).scalar()
+        if slot_id is None:
+            return None
+        claimed = db.query(Slot).filter(
+            Slot.id == slot_id,
+            Slot.status == "available"
+        ).update({Slot.status: "occupied"})
+        if claimed:
+            slot = get_slot_by_id(db, slot_id)
+            record_transition(db, slot.id, slot.slot_type, "available", "occupied")
+            return slot
+
+def claim_slot(db: Session, slot_id: int):
+    """
+    Atomically flip an available slot to occupied. Returns None if the slot
+    was taken (or changed, or is being claimed) by someone else in the meantime.
+    """
+    query = db.query(Slot).filter(Slot.id == slot_id, Slot.status == "available")
+    return _claim_first(db, query)
+
+def claim_slots(db: Session, slot_ids: list):
+    """Atomically flip the given slots from available to occupied; returns the ids actually claimed"""
+    claimed = db.execute(
+        update(Slot).where(
+            Slot.id.in_(slot_ids),
+            Slot.status == "available"
+        ).values(status="occupied").returning(Slot.id, Slot.slot_type).execution_options(synchronize_session=False)
+    ).all()
+    for slot_id, slot_type in claimed:
+        record_transition(db, slot_id, slot_type, "available", "occupied")
+    return {slot_id for slot_id, _ in claimed}
+
+def release_slots(db: Session, slot_ids: list):
+    """Hand slots claimed earlier in this transaction back as available"""
+    released = db.execute(
+        update(Slot).where(
+            Slot.id.in_(slot_ids),
+            Slot.status == "occupied"
+        ).values(status="available").returning(Slot.id, Slot.slot_type).execution_options(synchronize_session=False)
+    ).all()
+    for slot_id, slot_type in released:
+        record_transition(db, slot_id, slot_type, "occupied", "available")
+
+def get_slots_by_numbers(db: Session, slot_numbers: list):
+    """Slots keyed by slot number, in one query"""
+    return {slot.slot_number: slot for slot in db.query(Slot).filter(Slot.slot_number.in_(slot_numbers))}
+
+def claim_available_slot(db: Session, slot_type: str, exclude_ids=()):
+    """
+    Atomically claim any available slot of the given type for this transaction.
+    Concurrent callers get different slots without serializing on the same row.
+    """
+    query = db.query(Slot).filter(
+        Slot.slot_type == slot_type,
+        Slot.status == "available"
+    )
+    if exclude_ids:
+        query = query.filter(Slot.id.notin_(exclude_ids))
+    return _claim_first(db, query.order_by(Slot.id))
+
 def create_slot(db: Session, slot: SlotCreate):
     # Check if slot number already exists
     db_slot = get_slot_by_number(db, slot.slot_number)
@@ -33,10 +118,39 @@ def create_slot(db: Session, slot: SlotCreate):
         status=slot.status
     )
     db.add(db_slot)
+    db.flush()
+    record_transition(db, db_slot.id, db_slot.slot_type, None, db_slot.status)
     db.commit()
     db.refresh(db_slot)
     return db_slot
 
+def create_slots_bulk(db: Session, slots: list, retry: bool = True):
+    """
+    Insert a chunk of validated SlotCreate rows in one transaction, skipping
+    slot numbers that already exist. Returns (created, skipped) counts.
+    """
+    numbers = [slot.slot_number for slot in slots]
+    existing = set(db.scalars(select(Slot.slot_number).where(Slot.slot_number.in_(numbers))))
+    rows = [
+        {"slot_number": slot.slot_number, "slot_type": slot.slot_type, "status": slot.status}
+        for slot in slots if slot.slot_number not in existing
+    ]
+    
+    try:
+        if rows:
+            # One executemany; batched into multi-row INSERT ... RETURNING by the driver
+            created = db.execute(insert(Slot).returning(Slot.id, Slot.slot_type, Slot.status), rows).all()
+            for slot_id, slot_type, slot_status in created:
+                record_transition(db, slot_id, slot_type, None, slot_status)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if not retry:
+            raise
+        # Someone else created some of these numbers since the check
+        return create_slots_bulk(db, slots, retry=False)
+    return len(rows), len(slots) - len(rows)
+
 def update_slot(db: Session, slot_id: int, slot_update: SlotUpdate):
     db_slot = get_slot_by_id(db, slot_id)
     if not db_slot:
@@ -45,10 +159,14 @@ def update_slot(db: Session, slot_id: int, slot_update: SlotUpdate):
             detail="Slot not found"
         )
     
+    old_status, old_slot_type = db_slot.status, db_slot.slot_type
     update_data = slot_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_slot, field, value)
     
+    if (db_slot.status, db_slot.slot_type) != (old_status, old_slot_type):
+        record_transition(db, db_slot.id, db_slot.slot_type, old_status, db_slot.status, old_slot_type)
+    
     db.commit()
     db.refresh(db_slot)
     return db_slot
@@ -61,6 +179,7 @@ def delete_slot(db: Session, slot_id: int):
             detail="Slot not found"
         )
     
+    record_transition(db, db_slot.id, db_slot.slot_type, db_slot.status, None)
     db.delete(db_slot)
     db.commit()
     return {"message": "Slot deleted successfully"}
\ No newline at end of file
@@ -1,22 +1,36 @@
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user_schema import UserCreate
-from app.utils.auth_utils import get_password_hash, verify_password
+from app.utils.auth_utils import get_password_hash, verify_and_update_password
+from app.utils.pagination import paginate
+from app.config.settings import settings
+from app.crud.slot_crud import claim_slots, release_slots
+from app.services.dashboard_counters import dashboard_counters
 from fastapi import HTTPException, status
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, user: UserCreate):
-    # Check if user already exists
-    db_user = get_user_by_email(db, email=user.email)
-    if db_user:
+def get_all_users(db: Session, cursor: str = None, limit: int = settings.DEFAULT_PAGE_SIZE):
+    return paginate(db.query(User), [User.id], cursor, limit)
+
+def ensure_email_available(db: Session, email: str):
+    """Reject an email that is already registered; callers run it before hashing a password"""
+    if get_user_by_email(db, email=email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
+
+def create_user(db: Session, user: UserCreate, hashed_password: str = None):
+    # Checked again: the email may have been taken since the caller's check
+    ensure_email_available(db, user.email)
     
-    hashed_password = get_password_hash(user.password)
+    # Async callers hash in the password pool beforehand
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -27,14 +41,67 @@ def create_user(db: Session, user: UserCreate):
         vehicle_type=user.vehicle_type
     )
     db.add(db_user)
+    if db_user.role == "resident":
+        dashboard_counters.resident_added(db)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+def get_existing_emails(db: Session, emails: list):
+    return set(db.scalars(select(User.email).where(User.email.in_(emails))))
+
+def _insert_new_users(db: Session, rows: list):
+    """Insert users, skipping emails that are already taken; returns {email: id} of the inserted ones"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    statement = dialect.insert(User).on_conflict_do_nothing(index_elements=[User.email])
+    return dict(db.execute(statement.returning(User.email, User.id), rows).all())
+
+def create_residents_bulk(db: Session, residents: list):
+    """
+    Insert a batch of residents (User column dicts with hashed_password and an
+    optional assigned_slot_id) in one transaction, claiming their slots in the
+    same pass. Returns ({email: user id} for the created residents,
+    {email: reason} for the rejected ones).
+    """
+    emails = [resident["email"] for resident in residents]
+    rejected = {email: "Email already registered" for email in get_existing_emails(db, emails)}
+    slot_ids = [
+        resident["assigned_slot_id"] for resident in residents
+        if resident["assigned_slot_id"] and resident["email"] not in rejected
+    ]
+    claimed = claim_slots(db, slot_ids) if slot_ids else set()
+    
+    rows = []
+    for resident in residents:
+        if resident["email"] in rejected:
+            continue
+        if resident["assigned_slot_id"] and resident["assigned_slot_id"] not in claimed:
+            rejected[resident["email"]] = "Slot is not available"
+            continue
+        rows.append({**resident, "role": "resident"})
+    
+    created = _insert_new_users(db, rows) if rows else {}
+    # Emails registered by someone else since the check above are skipped by the
+    # insert; their rows are rejected and the slots claimed for them go back
+    raced = [row for row in rows if row["email"] not in created]
+    for row in raced:
+        rejected[row["email"]] = "Email already registered"
+    raced_slot_ids = [row["assigned_slot_id"] for row in raced if row["assigned_slot_id"]]
+    if raced_slot_ids:
+        release_slots(db, raced_slot_ids)
+    if created:
+        dashboard_counters.resident_added(db, len(created))
+    db.commit()
+    return created, rejected
+
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    is_valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not is_valid:
         return False
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
     return user
\ No newline at end of file
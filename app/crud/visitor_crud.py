@@ -1,23 +1,71 @@
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from app.models.visitor import Visitor
 from app.models.user import User
 from app.models.slot import Slot
-from app.schemas.visitor_schema import VisitorCreate, VisitorUpdate
+from app.schemas.visitor_schema import VisitorCreate, VisitorUpdate, VisitorResponse
+from app.utils.pagination import paginate
+from app.crud.slot_crud import set_slot_status, claim_slot, claim_slots
+from app.services.reservation_index import reservation_index, booking_window
+from app.services.dashboard_counters import dashboard_counters
+from app.config.settings import settings
 from fastapi import HTTPException, status
 from datetime import datetime
 
 def get_visitor_by_id(db: Session, visitor_id: int):
     return db.query(Visitor).filter(Visitor.id == visitor_id).first()
 
-def get_all_visitors(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Visitor).offset(skip).limit(limit).all()
-
 def get_pending_visitors(db: Session):
     return db.query(Visitor).filter(Visitor.status == "pending").all()
 
 def get_visitors_by_resident(db: Session, resident_id: int):
     return db.query(Visitor).filter(Visitor.resident_id == resident_id).all()
 
+def _enriched_visitors_query(db: Session):
+    # Resident name and slot number come back in the same row as the visitor
+    return db.query(Visitor, User.full_name, Slot.slot_number).outerjoin(
+        Visitor.resident
+    ).outerjoin(
+        Visitor.assigned_slot
+    )
+
+def _to_visitor_response(visitor: Visitor, resident_name: str, slot_number: str):
+    return VisitorResponse(
+        id=visitor.id,
+        visitor_name=visitor.visitor_name,
+        vehicle_number=visitor.vehicle_number,
+        vehicle_type=visitor.vehicle_type,
+        entry_time=visitor.entry_time,
+        exit_time=visitor.exit_time,
+        status=visitor.status,
+        resident_id=visitor.resident_id,
+        resident_name=resident_name,
+        slot_id=visitor.slot_id,
+        slot_number=slot_number
+    )
+
+def get_enriched_visitors(db: Session, resident_id: int = None, statuses: list = None, unassigned_only: bool = False):
+    """Get visitors with resident name and slot number in a single query"""
+    query = _enriched_visitors_query(db)
+    if resident_id:
+        query = query.filter(Visitor.resident_id == resident_id)
+    if statuses:
+        query = query.filter(Visitor.status.in_(statuses))
+    if unassigned_only:
+        query = query.filter(Visitor.slot_id == None)
+    
+    return [
+        _to_visitor_response(visitor, resident_name, slot_number)
+        for visitor, resident_name, slot_number in query.order_by(Visitor.id).all()
+    ]
+
+def get_all_visitors(db: Session, cursor: str = None, limit: int = settings.DEFAULT_PAGE_SIZE):
+    rows, next_cursor = paginate(
+        _enriched_visitors_query(db), [Visitor.id], cursor, limit,
+        key=lambda row: [row[0].id]
+    )
+    return [_to_visitor_response(*row) for row in rows], next_cursor
+
 def create_visitor(db: Session, visitor: VisitorCreate):
     # Check if resident exists
     resident = db.query(User).filter(User.id == visitor.resident_id, User.role == "resident").first()
@@ -37,6 +85,7 @@ def create_visitor(db: Session, visitor: VisitorCreate):
         status="pending"
     )
     db.add(db_visitor)
+    dashboard_counters.visitor_status_changed(db, None, db_visitor.status)
     db.commit()
     db.refresh(db_visitor)
     return db_visitor
@@ -49,6 +98,7 @@ def update_visitor_status(db: Session, visitor_id: int, status: str, slot_id: in
             detail="Visitor not found"
         )
     
+    dashboard_counters.visitor_status_changed(db, db_visitor.status, status)
     db_visitor.status = status
     if slot_id:
         db_visitor.slot_id = slot_id
@@ -57,6 +107,79 @@ def update_visitor_status(db: Session, visitor_id: int, status: str, slot_id: in
     db.refresh(db_visitor)
     return db_visitor
 
+def _slot_held_by_someone_else(db: Session, slot_id: int, visitor_id: int):
+    """Whether an occupied slot is held by a resident or by another visitor whose visit has started"""
+    if db.query(User.id).filter(User.assigned_slot_id == slot_id).first():
+        return True
+    return db.query(Visitor.id).filter(
+        Visitor.slot_id == slot_id,
+        Visitor.id != visitor_id,
+        Visitor.status == "approved",
+        Visitor.entry_time <= datetime.now()
+    ).first() is not None
+
+def check_in_visitor(db: Session, visitor_id: int):
+    """Visitor arrived at the gate: occupy their booked slot if the booking has not already done so"""
+    db_visitor = get_visitor_by_id(db, visitor_id)
+    if not db_visitor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Visitor not found"
+        )
+    
+    if db_visitor.status != "approved" or not db_visitor.slot_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Visitor does not have an approved booking"
+        )
+    
+    if booking_window(db_visitor.entry_time)[0] > datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Booking has not started yet"
+        )
+    
+    # Bookings made for "now" occupied the slot when they were made; future
+    # bookings leave it available until activate_due_bookings() or the visitor gets here
+    slot = db.query(Slot).filter(Slot.id == db_visitor.slot_id).first()
+    if slot and slot.status == "available":
+        if not claim_slot(db, slot.id):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Slot was taken by someone else, please try again"
+            )
+    elif not slot or slot.status != "occupied":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Booked slot is not usable"
+        )
+    elif _slot_held_by_someone_else(db, slot.id, db_visitor.id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Booked slot is occupied by someone else"
+        )
+    
+    db.commit()
+    return db_visitor
+
+def activate_due_bookings(db: Session, now: datetime):
+    """
+    Future bookings leave their slot available until the window starts; once it
+    has, mark the slot occupied so availability counts no longer offer it.
+    Returns the number of slots changed.
+    """
+    slot_ids = [
+        slot_id for (slot_id,) in db.query(Visitor.slot_id).join(Visitor.assigned_slot).filter(
+            Visitor.status == "approved",
+            Visitor.entry_time <= now,
+            or_(Visitor.exit_time == None, Visitor.exit_time > now),
+            Slot.status == "available"
+        ).all()
+    ]
+    claimed = claim_slots(db, slot_ids) if slot_ids else set()
+    db.commit()
+    return len(claimed)
+
 def mark_visitor_exit(db: Session, visitor_id: int):
     db_visitor = get_visitor_by_id(db, visitor_id)
     if not db_visitor:
@@ -65,14 +188,19 @@ def mark_visitor_exit(db: Session, visitor_id: int):
             detail="Visitor not found"
         )
     
+    # Only a visit that has started is physically holding its slot
+    has_started = booking_window(db_visitor.entry_time)[0] <= datetime.now()
+    
     db_visitor.exit_time = datetime.now()
+    dashboard_counters.visitor_status_changed(db, db_visitor.status, "completed")
     db_visitor.status = "completed"
+    reservation_index.release(db, db_visitor.id)
     
     # Free up the slot if assigned
-    if db_visitor.slot_id:
+    if db_visitor.slot_id and has_started:
         slot = db.query(Slot).filter(Slot.id == db_visitor.slot_id).first()
         if slot:
-            slot.status = "available"
+            set_slot_status(db, slot, "available")
     
     db.commit()
     return db_visitor
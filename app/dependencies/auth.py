@@ -1,23 +1,43 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, WebSocketException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.config.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.database import get_async_db, AsyncSessionLocal
 from app.utils.auth_utils import verify_token
 from app.crud.user_crud import get_user_by_email
+from app.services.user_cache import user_cache
 
 security = HTTPBearer()
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    token_data = verify_token(credentials.credentials)
-    user = get_user_by_email(db, email=token_data["email"])
-    if user is None:
+async def _resolve_user(token: str, db: AsyncSession):
+    token_data = verify_token(token)
+    user = user_cache.get(token_data["email"])
+    if user is not None:
+        return user
+    
+    db_user = await db.run_sync(get_user_by_email, token_data["email"])
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
-    return user
+    return user_cache.put(db_user)
 
-def get_current_admin(current_user = Depends(get_current_user)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)):
+    return await _resolve_user(credentials.credentials, db)
+
+async def get_user_from_token(token: str = Query(...)):
+    # For pages and sockets opened by the browser, which cannot set an Authorization header.
+    # The session is closed straight away instead of being held for the socket's lifetime.
+    async with AsyncSessionLocal() as db:
+        return await _resolve_user(token, db)
+
+async def get_websocket_user(token: str = Query(...)):
+    try:
+        return await get_user_from_token(token)
+    except HTTPException:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION)
+
+async def get_current_admin(current_user = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -25,10 +45,10 @@ def get_current_admin(current_user = Depends(get_current_user)):
         )
     return current_user
 
-def get_current_resident(current_user = Depends(get_current_user)):
+async def get_current_resident(current_user = Depends(get_current_user)):
     if current_user.role != "resident":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions. Resident access required.",
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -0,0 +1,52 @@
+import grpc
+from app.grpc_services import parking_pb2, parking_pb2_grpc
+
+class ParkingClient:
+    """
+    Blocking client for the gate terminal gRPC API. Calls raise grpc.RpcError,
+    whose code() is NOT_FOUND, FAILED_PRECONDITION, ABORTED (lost a race for
+    the slot, retry) or UNAUTHENTICATED/PERMISSION_DENIED.
+    """
+
+    def __init__(self, target: str = "localhost:50051", token: str = None, timeout: float = 5.0):
+        self._channel = grpc.insecure_channel(target)
+        self._stub = parking_pb2_grpc.ParkingServiceStub(self._channel)
+        self._metadata = [("authorization", f"Bearer {token}")] if token else []
+        self._timeout = timeout
+
+    def get_slot(self, slot_id: int = None, slot_number: str = None):
+        if slot_number is not None:
+            request = parking_pb2.SlotLookupRequest(slot_number=slot_number)
+        else:
+            request = parking_pb2.SlotLookupRequest(id=slot_id)
+        return self._stub.GetSlot(request, metadata=self._metadata, timeout=self._timeout)
+
+    def check_in_visitor(self, visitor_id: int):
+        request = parking_pb2.VisitorRequest(visitor_id=visitor_id)
+        return self._stub.CheckInVisitor(request, metadata=self._metadata, timeout=self._timeout)
+
+    def check_out_visitor(self, visitor_id: int):
+        request = parking_pb2.VisitorRequest(visitor_id=visitor_id)
+        return self._stub.CheckOutVisitor(request, metadata=self._metadata, timeout=self._timeout)
+
+    def watch_availability(self, slot_types=()):
+        """
+        Yield (slot_type, available, delta): the current counts with delta 0,
+        then every change, until the caller stops iterating
+        """
+        request = parking_pb2.AvailabilityRequest(slot_types=list(slot_types))
+        updates = self._stub.WatchAvailability(request, metadata=self._metadata)
+        try:
+            for update in updates:
+                yield update.slot_type, update.available, update.delta
+        finally:
+            updates.cancel()
+
+    def close(self):
+        self._channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
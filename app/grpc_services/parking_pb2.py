@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: app/grpc_services/parking.proto
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1f\x61pp/grpc_services/parking.proto\x12\x07parking\x1a\x1fgoogle/protobuf/timestamp.proto\"?\n\x11SlotLookupRequest\x12\x0c\n\x02id\x18\x01 \x01(\x05H\x00\x12\x15\n\x0bslot_number\x18\x02 \x01(\tH\x00\x42\x05\n\x03key\"\x86\x01\n\x04Slot\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x13\n\x0bslot_number\x18\x02 \x01(\t\x12\x11\n\tslot_type\x18\x03 \x01(\t\x12\x0e\n\x06status\x18\x04 \x01(\t\x12!\n\x14\x61ssigned_resident_id\x18\x05 \x01(\x05H\x00\x88\x01\x01\x42\x17\n\x15_assigned_resident_id\"$\n\x0eVisitorRequest\x12\x12\n\nvisitor_id\x18\x01 \x01(\x05\"\xff\x01\n\x07Visitor\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x14\n\x0cvisitor_name\x18\x02 \x01(\t\x12\x16\n\x0evehicle_number\x18\x03 \x01(\t\x12\x14\n\x0cvehicle_type\x18\x04 \x01(\t\x12\x0e\n\x06status\x18\x05 \x01(\t\x12\x13\n\x0bresident_id\x18\x06 \x01(\x05\x12\x14\n\x07slot_id\x18\x07 \x01(\x05H\x00\x88\x01\x01\x12.\n\nentry_time\x18\x08 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12-\n\texit_time\x18\t \x01(\x0b\x32\x1a.google.protobuf.TimestampB\n\n\x08_slot_id\")\n\x13\x41vailabilityRequest\x12\x12\n\nslot_types\x18\x01 \x03(\t\"C\n\x0c\x41vailability\x12\x11\n\tslot_type\x18\x01 \x01(\t\x12\x11\n\tavailable\x18\x02 \x01(\x05\x12\r\n\x05\x64\x65lta\x18\x03 \x01(\x05\x32\x8d\x02\n\x0eParkingService\x12\x34\n\x07GetSlot\x12\x1a.parking.SlotLookupRequest\x1a\r.parking.Slot\x12;\n\x0e\x43heckInVisitor\x12\x17.parking.VisitorRequest\x1a\x10.parking.Visitor\x12<\n\x0f\x43heckOutVisitor\x12\x17.parking.VisitorRequest\x1a\x10.parking.Visitor\x12J\n\x11WatchAvailability\x12\x1c.parking.AvailabilityRequest\x1a\x15.parking.Availability0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'app.grpc_services.parking_pb2', _globals)
+if _descriptor._USE_C_DESCRIPTORS == False:
+  DESCRIPTOR._options = None
+  _globals['_SLOTLOOKUPREQUEST']._serialized_start=77
+  _globals['_SLOTLOOKUPREQUEST']._serialized_end=140
+  _globals['_SLOT']._serialized_start=143
+  _globals['_SLOT']._serialized_end=277
+  _globals['_VISITORREQUEST']._serialized_start=279
+  _globals['_VISITORREQUEST']._serialized_end=315
+  _globals['_VISITOR']._serialized_start=318
+  _globals['_VISITOR']._serialized_end=573
+  _globals['_AVAILABILITYREQUEST']._serialized_start=575
+  _globals['_AVAILABILITYREQUEST']._serialized_end=616
+  _globals['_AVAILABILITY']._serialized_start=618
+  _globals['_AVAILABILITY']._serialized_end=685
+  _globals['_PARKINGSERVICE']._serialized_start=688
+  _globals['_PARKINGSERVICE']._serialized_end=957
+# @@protoc_insertion_point(module_scope)
@@ -0,0 +1,170 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+
+from app.grpc_services import parking_pb2 as app_dot_grpc__services_dot_parking__pb2
+
+
+class ParkingServiceStub(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.GetSlot = channel.unary_unary(
+                '/parking.ParkingService/GetSlot',
+                request_serializer=app_dot_grpc__services_dot_parking__pb2.SlotLookupRequest.SerializeToString,
+                response_deserializer=app_dot_grpc__services_dot_parking__pb2.Slot.FromString,
+                )
+        self.CheckInVisitor = channel.unary_unary(
+                '/parking.ParkingService/CheckInVisitor',
+                request_serializer=app_dot_grpc__services_dot_parking__pb2.VisitorRequest.SerializeToString,
+                response_deserializer=app_dot_grpc__services_dot_parking__pb2.Visitor.FromString,
+                )
+        self.CheckOutVisitor = channel.unary_unary(
+                '/parking.ParkingService/CheckOutVisitor',
+                request_serializer=app_dot_grpc__services_dot_parking__pb2.VisitorRequest.SerializeToString,
+                response_deserializer=app_dot_grpc__services_dot_parking__pb2.Visitor.FromString,
+                )
+        self.WatchAvailability = channel.unary_stream(
+                '/parking.ParkingService/WatchAvailability',
+                request_serializer=app_dot_grpc__services_dot_parking__pb2.AvailabilityRequest.SerializeToString,
+                response_deserializer=app_dot_grpc__services_dot_parking__pb2.Availability.FromString,
+                )
+
+
+class ParkingServiceServicer(object):
+    """Missing associated documentation comment in .proto file."""
+
+    def GetSlot(self, request, context):
+        """Look up a slot by id or slot number
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CheckInVisitor(self, request, context):
+        """Occupy a visitor's booked slot when they arrive at the barrier
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CheckOutVisitor(self, request, context):
+        """Mark a visitor as exited and free their slot
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchAvailability(self, request, context):
+        """Change-feed of available slots per type: the current counts first (delta 0),
+        then one message per change with the delta and the resulting count
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_ParkingServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'GetSlot': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetSlot,
+                    request_deserializer=app_dot_grpc__services_dot_parking__pb2.SlotLookupRequest.FromString,
+                    response_serializer=app_dot_grpc__services_dot_parking__pb2.Slot.SerializeToString,
+            ),
+            'CheckInVisitor': grpc.unary_unary_rpc_method_handler(
+                    servicer.CheckInVisitor,
+                    request_deserializer=app_dot_grpc__services_dot_parking__pb2.VisitorRequest.FromString,
+                    response_serializer=app_dot_grpc__services_dot_parking__pb2.Visitor.SerializeToString,
+            ),
+            'CheckOutVisitor': grpc.unary_unary_rpc_method_handler(
+                    servicer.CheckOutVisitor,
+                    request_deserializer=app_dot_grpc__services_dot_parking__pb2.VisitorRequest.FromString,
+                    response_serializer=app_dot_grpc__services_dot_parking__pb2.Visitor.SerializeToString,
+            ),
+            'WatchAvailability': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchAvailability,
+                    request_deserializer=app_dot_grpc__services_dot_parking__pb2.AvailabilityRequest.FromString,
+                    response_serializer=app_dot_grpc__services_dot_parking__pb2.Availability.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'parking.ParkingService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+ # This class is part of an EXPERIMENTAL API.
+class ParkingService(object):
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def GetSlot(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/parking.ParkingService/GetSlot',
+            app_dot_grpc__services_dot_parking__pb2.SlotLookupRequest.SerializeToString,
+            app_dot_grpc__services_dot_parking__pb2.Slot.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def CheckInVisitor(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/parking.ParkingService/CheckInVisitor',
+            app_dot_grpc__services_dot_parking__pb2.VisitorRequest.SerializeToString,
+            app_dot_grpc__services_dot_parking__pb2.Visitor.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def CheckOutVisitor(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/parking.ParkingService/CheckOutVisitor',
+            app_dot_grpc__services_dot_parking__pb2.VisitorRequest.SerializeToString,
+            app_dot_grpc__services_dot_parking__pb2.Visitor.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def WatchAvailability(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/parking.ParkingService/WatchAvailability',
+            app_dot_grpc__services_dot_parking__pb2.AvailabilityRequest.SerializeToString,
+            app_dot_grpc__services_dot_parking__pb2.Availability.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
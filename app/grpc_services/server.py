@@ -0,0 +1,156 @@
+"""
+gRPC API for boom barriers and guard terminals.
+
+Runs inside the web app when GRPC_PORT is set, or on its own with
+    python -m app.grpc_services.server [port]
+Handlers go through the same CRUD functions as the HTTP routes, on a sync
+session in the threadpool. Callers authenticate with an admin access token
+in the "authorization: Bearer <token>" metadata entry.
+"""
+import asyncio
+import logging
+import sys
+import grpc
+from fastapi import HTTPException
+from google.protobuf.timestamp_pb2 import Timestamp
+from starlette.concurrency import run_in_threadpool
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.crud import slot_crud, visitor_crud
+from app.dependencies.auth import get_user_from_token
+from app.grpc_services import parking_pb2, parking_pb2_grpc
+from app.services.availability_feed import availability_feed
+from app.websocket.backplane import backplane
+
+logger = logging.getLogger(__name__)
+
+# HTTP status raised by the CRUD layer -> gRPC status
+_STATUS_CODES = {
+    400: grpc.StatusCode.FAILED_PRECONDITION,
+    401: grpc.StatusCode.UNAUTHENTICATED,
+    403: grpc.StatusCode.PERMISSION_DENIED,
+    404: grpc.StatusCode.NOT_FOUND,
+    409: grpc.StatusCode.ABORTED,
+}
+
+def _timestamp(value):
+    if value is None:
+        return None
+    timestamp = Timestamp()
+    # Stored times are naive local time
+    timestamp.FromDatetime(value if value.tzinfo else value.astimezone())
+    return timestamp
+
+def _slot_message(slot):
+    message = parking_pb2.Slot(
+        id=slot.id,
+        slot_number=slot.slot_number,
+        slot_type=slot.slot_type,
+        status=slot.status
+    )
+    if slot.residents:
+        message.assigned_resident_id = slot.residents[0].id
+    return message
+
+def _visitor_message(visitor):
+    return parking_pb2.Visitor(
+        id=visitor.id,
+        visitor_name=visitor.visitor_name,
+        vehicle_number=visitor.vehicle_number,
+        vehicle_type=visitor.vehicle_type,
+        status=visitor.status,
+        resident_id=visitor.resident_id,
+        slot_id=visitor.slot_id,
+        entry_time=_timestamp(visitor.entry_time),
+        exit_time=_timestamp(visitor.exit_time)
+    )
+
+def _get_slot(request):
+    with SessionLocal() as db:
+        if request.WhichOneof("key") == "slot_number":
+            slot = slot_crud.get_slot_by_number(db, request.slot_number)
+        else:
+            slot = slot_crud.get_slot_by_id(db, request.id)
+        if not slot:
+            raise HTTPException(status_code=404, detail="Slot not found")
+        return _slot_message(slot)
+
+def _check_in_visitor(request):
+    with SessionLocal() as db:
+        return _visitor_message(visitor_crud.check_in_visitor(db, request.visitor_id))
+
+def _check_out_visitor(request):
+    with SessionLocal() as db:
+        return _visitor_message(visitor_crud.mark_visitor_exit(db, request.visitor_id))
+
+class ParkingService(parking_pb2_grpc.ParkingServiceServicer):
+
+    async def _authorize(self, context):
+        metadata = dict(context.invocation_metadata())
+        scheme, _, token = metadata.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, "Missing bearer token")
+        try:
+            user = await get_user_from_token(token)
+        except HTTPException as exc:
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, exc.detail)
+        if user.role != "admin":
+            await context.abort(grpc.StatusCode.PERMISSION_DENIED, "Not enough permissions. Admin access required.")
+
+    async def _call(self, context, handler, request):
+        await self._authorize(context)
+        try:
+            return await run_in_threadpool(handler, request)
+        except HTTPException as exc:
+            await context.abort(_STATUS_CODES.get(exc.status_code, grpc.StatusCode.UNKNOWN), exc.detail)
+
+    async def GetSlot(self, request, context):
+        return await self._call(context, _get_slot, request)
+
+    async def CheckInVisitor(self, request, context):
+        return await self._call(context, _check_in_visitor, request)
+
+    async def CheckOutVisitor(self, request, context):
+        return await self._call(context, _check_out_visitor, request)
+
+    async def WatchAvailability(self, request, context):
+        await self._authorize(context)
+        if not availability_feed.loaded:
+            await run_in_threadpool(availability_feed.reload_from_db)
+
+        slot_types = set(request.slot_types)
+        watcher, changes = availability_feed.watch()
+        try:
+            while True:
+                for change in changes:
+                    if not slot_types or change.slot_type in slot_types:
+                        yield parking_pb2.Availability(
+                            slot_type=change.slot_type, available=change.available, delta=change.delta
+                        )
+                changes = await watcher.next()
+        finally:
+            availability_feed.unwatch(watcher)
+
+async def start_server(port: int):
+    server = grpc.aio.server()
+    parking_pb2_grpc.add_ParkingServiceServicer_to_server(ParkingService(), server)
+    server.add_insecure_port(f"[::]:{port}")
+    await server.start()
+    logger.info("gRPC server listening on port %s", port)
+    return server
+
+async def serve(port: int):
+    # Transitions made by the web workers arrive over the backplane (WS_BACKPLANE=postgres)
+    await backplane.start()
+    await availability_feed.start()
+    await run_in_threadpool(availability_feed.reload_from_db)
+    server = await start_server(port)
+    try:
+        await server.wait_for_termination()
+    finally:
+        await availability_feed.stop()
+        await backplane.stop()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else settings.GRPC_PORT or 50051))
@@ -1,7 +1,20 @@
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from app.config.database import engine, Base
+from app.config.settings import settings
 from app.routes import auth_routes, resident_routes, admin_routes
 from app.routes.chat_routes import router as chat_router
+from app.grpc_services.server import start_server as start_grpc_server
+from app.services import scheduler
+from app.services.availability_feed import availability_feed
+from app.services.booking_activation import activate_bookings
+from app.services.dashboard_counters import dashboard_counters
+from app.services.notification_outbox import notification_outbox
+from app.services.notification_retention import compact_notifications
+from app.websocket.backplane import backplane
+from app.websocket.heartbeat import heartbeat
+from app.websocket.manager import manager
+from app.websocket.chat_hub import chat_hub, chat_outbox
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -15,14 +28,53 @@ app.include_router(resident_routes.router1, prefix="/resident/slot", tags=["Resi
 app.include_router(resident_routes.router2, prefix="/resident/visitors", tags=["Resident Visitors"])
 app.include_router(resident_routes.router3, prefix="/resident/request", tags=["Resident Request"])
 app.include_router(resident_routes.router4, prefix="/resident/notification", tags=["Resident Notification"])
-# app.include_router(resident_routes.router5, prefix="/resident/dashboard", tags=["Resident Dashboard"])
+app.include_router(resident_routes.router5, prefix="/resident/dashboard", tags=["Resident Dashboard"])
 app.include_router(resident_routes.router6, prefix="/resident/unplanned", tags=["Resident Unplanned Visitors"])
 
 app.include_router(admin_routes.router, prefix="/admin", tags=["Admin"])
 app.include_router(admin_routes.router1, prefix="/admin/slot", tags=["Admin Slot"])
 app.include_router(admin_routes.router2, prefix="/admin/visitor", tags=["Admin Visitor"])
 app.include_router(admin_routes.router3, prefix="/admin/requests", tags=["Admin Requests"])
-# app.include_router(admin_routes.router4, prefix="/admin/dashboard", tags=["Admin Dashboard"])
+app.include_router(admin_routes.router4, prefix="/admin/dashboard", tags=["Admin Dashboard"])
 
 app.include_router(chat_router)
 
+@app.on_event("startup")
+async def start_background_jobs():
+    await backplane.start()
+    await availability_feed.start()
+    await manager.start()
+    await chat_hub.start()
+    await heartbeat.start()
+    await run_in_threadpool(notification_outbox.replay_spill)
+    notification_outbox.start()
+    await run_in_threadpool(chat_outbox.replay_spill)
+    chat_outbox.start()
+    await run_in_threadpool(dashboard_counters.reconcile_from_db)
+    await run_in_threadpool(availability_feed.reload_from_db)
+    scheduler.start_periodic(
+        "dashboard-reconcile", settings.DASHBOARD_RECONCILE_INTERVAL, dashboard_counters.reconcile_from_db
+    )
+    scheduler.start_periodic(
+        "availability-reload", settings.DASHBOARD_RECONCILE_INTERVAL, availability_feed.reload_from_db
+    )
+    scheduler.start_periodic(
+        "booking-activation", settings.BOOKING_ACTIVATION_INTERVAL, activate_bookings
+    )
+    scheduler.start_periodic(
+        "notification-compaction", settings.NOTIFICATION_COMPACTION_INTERVAL, compact_notifications
+    )
+    app.state.grpc_server = await start_grpc_server(settings.GRPC_PORT) if settings.GRPC_PORT else None
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    if app.state.grpc_server is not None:
+        await app.state.grpc_server.stop(settings.GRPC_SHUTDOWN_GRACE)
+    await scheduler.stop_all()
+    await run_in_threadpool(notification_outbox.stop)
+    await run_in_threadpool(chat_outbox.stop)
+    await heartbeat.stop()
+    await chat_hub.stop()
+    await manager.stop()
+    await availability_feed.stop()
+    await backplane.stop()
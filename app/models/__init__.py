@@ -2,6 +2,7 @@ from app.models.user import User
 from app.models.slot import Slot
 from app.models.visitor import Visitor
 from app.models.request import Request
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationArchive
+from app.models.chat_message import ChatMessage
 
-__all__ = ["User", "Slot", "Visitor", "Request", "Notification"]
\ No newline at end of file
+__all__ = ["User", "Slot", "Visitor", "Request", "Notification", "NotificationArchive", "ChatMessage"]
\ No newline at end of file
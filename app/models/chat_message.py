@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Index, Integer, String, Text, DateTime, ForeignKey
+from app.config.database import Base
+from datetime import datetime
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Serves "latest messages of a room" for history
+        Index("ix_chat_messages_room_created", "room_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    room_id = Column(Integer, ForeignKey("users.id"))  # The resident the conversation belongs to
+    sender_id = Column(Integer, ForeignKey("users.id"))
+    sender_name = Column(String)
+    sender_role = Column(String)  # "admin" or "resident"
+    body = Column(Text)
+    created_at = Column(DateTime, default=datetime.now)
\ No newline at end of file
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, Text, DateTime, Boolean, ForeignKey
 from app.config.database import Base
 from datetime import datetime
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Serves the per-user unread count and the newest-first listing
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -11,4 +15,20 @@ class Notification(Base):
     message = Column(Text)
     type = Column(String)  # "visitor_approval", "slot_repair", "request_update"
     is_read = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.now())
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.now)
+
+class NotificationArchive(Base):
+    """Read notifications moved out of the notifications table by the compaction job"""
+    __tablename__ = "notifications_archive"
+    __table_args__ = (
+        Index("ix_notifications_archive_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)  # Same id as the original notification
+    user_id = Column(Integer, ForeignKey("users.id"))
+    title = Column(String)
+    message = Column(Text)
+    type = Column(String)
+    is_read = Column(Boolean, default=True)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.now)
\ No newline at end of file
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String
 from app.config.database import Base
 from sqlalchemy.orm import relationship
 
 class Slot(Base):
     __tablename__ = "slots"
+    __table_args__ = (
+        # Serves "first available slot of type X" lookups
+        Index("ix_slots_type_status", "slot_type", "status"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     slot_number = Column(String, unique=True, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import DDL, Column, Integer, String, DateTime, ForeignKey, event
 from sqlalchemy.orm import relationship
 from app.config.database import Base
 
@@ -17,4 +17,17 @@ class Visitor(Base):
     
     # Relationships
     resident = relationship("User", back_populates="visitors")
-    assigned_slot = relationship("Slot", back_populates="visitors")
\ No newline at end of file
+    assigned_slot = relationship("Slot", back_populates="visitors")
+
+# PostgreSQL rejects two approved bookings of the same slot with overlapping time windows
+event.listen(
+    Visitor.__table__,
+    "after_create",
+    DDL(
+        "CREATE EXTENSION IF NOT EXISTS btree_gist; "
+        "ALTER TABLE visitors ADD CONSTRAINT visitors_no_overlapping_bookings "
+        "EXCLUDE USING gist (slot_id WITH =, "
+        "tsrange(entry_time, COALESCE(exit_time, 'infinity'::timestamp)) WITH &&) "
+        "WHERE (status = 'approved')"
+    ).execute_if(dialect="postgresql")
+)
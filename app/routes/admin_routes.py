@@ -1,109 +1,173 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.config.database import get_db
-from app.dependencies.auth import get_current_admin
+import asyncio
+import json
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.config.database import get_async_db, engine, async_engine
+from app.config.pool_metrics import pool_stats
+from app.config.settings import settings
+from app.dependencies.auth import get_current_admin, get_user_from_token
 from app.models.user import User
 from app.models.slot import Slot
 from app.models.visitor import Visitor
 from app.models.request import Request
 
 # Import schemas
-from app.schemas.slot_schema import SlotCreate, SlotUpdate, SlotResponse
+from app.schemas.slot_schema import SlotCreate, SlotUpdate, SlotResponse, SlotImportReport
 from app.schemas.visitor_schema import VisitorCreate, VisitorResponse, VisitorUpdate
 from app.schemas.request_schema import RequestResponse, RequestUpdate
-from app.schemas.user_schema import UserResponse, UserCreate
+from app.schemas.user_schema import UserResponse, UserCreate, ResidentImportReport
+from app.schemas.pagination_schema import Page
 
 # Import CRUD operations
 from app.crud import user_crud, slot_crud, visitor_crud, request_crud
+from app.services.reservation_index import reservation_index
+from app.services.availability_feed import availability_feed
+from app.services import resident_import, slot_import
+from app.services.dashboard_counters import dashboard_counters
+from app.services.notification_outbox import notification_outbox
+from app.services.user_cache import user_cache
+from app.utils.auth_utils import get_password_hash_async
+from app.websocket.chat_hub import chat_hub
+from app.websocket.heartbeat import heartbeat
+from app.websocket.manager import manager
 
 router = APIRouter()
 
 # ========== USER/RESIDENT MANAGEMENT ==========
 
-@router.get("/users", response_model=List[UserResponse])
-def get_all_users(
+@router.get("/users", response_model=Page[UserResponse])
+async def get_all_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all users (both admin and residents)"""
-    return db.query(User).all()
+    users, next_cursor = await db.run_sync(user_crud.get_all_users, cursor, limit)
+    return {"items": users, "next_cursor": next_cursor}
 
 @router.get("/residents", response_model=List[UserResponse])
-def get_all_residents(
+async def get_all_residents(
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all residents only"""
-    return db.query(User).filter(User.role == "resident").all()
+    result = await db.scalars(select(User).where(User.role == "resident"))
+    return result.all()
 
 @router.post("/residents", response_model=UserResponse)
-def create_resident(
+async def create_resident(
     resident: UserCreate,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new resident"""
     resident.role = "resident"  # Force role to resident
-    return user_crud.create_user(db, resident)
+    # A duplicate is turned away before paying for a hash
+    await db.run_sync(user_crud.ensure_email_available, resident.email)
+    hashed_password = await get_password_hash_async(resident.password)
+    return await db.run_sync(user_crud.create_user, resident, hashed_password)
+
+@router.post("/residents/import", response_model=ResidentImportReport)
+async def import_residents(
+    file: UploadFile = File(...),
+    batch_size: int = Query(settings.RESIDENT_IMPORT_BATCH_SIZE, ge=1, le=5000),
+    current_user: User = Depends(get_current_admin)
+):
+    """Bulk-create residents from a CSV file (flat_number, full_name, email, vehicle_type, optional slot_number)"""
+    # Batches are committed as they are read, so an unreadable file still gets its report
+    return await run_in_threadpool(resident_import.import_residents_file, file.file, batch_size)
 
 @router.put("/residents/{resident_id}/assign-slot")
-def assign_slot_to_resident(
+async def assign_slot_to_resident(
     resident_id: int,
     slot_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Assign a parking slot to a resident"""
-    resident = db.query(User).filter(User.id == resident_id, User.role == "resident").first()
+    resident = await db.scalar(select(User).where(User.id == resident_id, User.role == "resident"))
     if not resident:
         raise HTTPException(status_code=404, detail="Resident not found")
     
-    slot = db.query(Slot).filter(Slot.id == slot_id).first()
+    slot = await db.scalar(select(Slot).where(Slot.id == slot_id))
     if not slot:
         raise HTTPException(status_code=404, detail="Slot not found")
     
-    # Check if slot is available
-    if slot.status != "available":
+    # A resident holds the slot permanently, so it must not have visitor bookings ahead
+    if await db.run_sync(reservation_index.has_upcoming_bookings, slot_id):
+        raise HTTPException(status_code=400, detail="Slot has upcoming visitor bookings")
+    
+    # Occupy the slot only if it is still available
+    if not await db.run_sync(slot_crud.claim_slot, slot_id):
         raise HTTPException(status_code=400, detail="Slot is not available")
     
     # Assign slot to resident
     resident.assigned_slot_id = slot_id
-    slot.status = "occupied"
+    await db.run_sync(user_cache.invalidate_on_commit, resident.email)
     
-    db.commit()
+    await db.commit()
     return {"message": f"Slot {slot.slot_number} assigned to resident {resident.full_name}"}
 
 @router.delete("/residents/{resident_id}")
-def delete_resident(
+async def delete_resident(
     resident_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a resident"""
-    resident = db.query(User).filter(User.id == resident_id, User.role == "resident").first()
+    resident = await db.scalar(select(User).where(User.id == resident_id, User.role == "resident"))
     if not resident:
         raise HTTPException(status_code=404, detail="Resident not found")
     
     # Free up the assigned slot
     if resident.assigned_slot_id:
-        slot = db.query(Slot).filter(Slot.id == resident.assigned_slot_id).first()
+        slot = await db.scalar(select(Slot).where(Slot.id == resident.assigned_slot_id))
         if slot:
-            slot.status = "available"
+            await db.run_sync(slot_crud.set_slot_status, slot, "available")
     
-    db.delete(resident)
-    db.commit()
+    await db.run_sync(user_cache.invalidate_on_commit, resident.email)
+    await db.run_sync(dashboard_counters.resident_removed)
+    await db.delete(resident)
+    await db.commit()
     return {"message": "Resident deleted successfully"}
 
+@router.get("/pool-stats")
+async def get_pool_stats(
+    current_user: User = Depends(get_current_admin)
+):
+    """Get database connection pool statistics for this worker"""
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine)
+    }
+
+@router.get("/websocket-stats")
+async def get_websocket_stats(
+    current_user: User = Depends(get_current_admin)
+):
+    """Get live websocket connection gauges for this worker"""
+    return {
+        "notifications": manager.stats(),
+        "chat": chat_hub.stats(),
+        "heartbeat_evictions": heartbeat.evicted
+    }
+
 # ========== SLOT MANAGEMENT ==========
 router1 = APIRouter()
-@router1.get("/slots", response_model=List[SlotResponse])
-def get_all_slots(
+@router1.get("/slots", response_model=Page[SlotResponse])
+async def get_all_slots(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all parking slots"""
-    slots = db.query(Slot).all()
+    slots, next_cursor = await db.run_sync(slot_crud.get_all_slots, cursor, limit)
     
     # Enhance response with resident info
     enhanced_slots = []
@@ -115,116 +179,158 @@ def get_all_slots(
             slot_data.assigned_resident_name = resident.full_name
         enhanced_slots.append(slot_data)
     
-    return enhanced_slots
+    return {"items": enhanced_slots, "next_cursor": next_cursor}
 
 @router1.post("/slots", response_model=SlotResponse)
-def create_slot(
+async def create_slot(
     slot: SlotCreate,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new parking slot"""
-    return slot_crud.create_slot(db, slot)
+    return await db.run_sync(slot_crud.create_slot, slot)
+
+@router1.post("/slots/import", response_model=SlotImportReport)
+async def import_slots(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(settings.SLOT_IMPORT_CHUNK_SIZE, ge=1, le=5000),
+    current_user: User = Depends(get_current_admin)
+):
+    """Bulk-create slots from a CSV, JSON or JSON Lines file (slot_number, slot_type, status)"""
+    format = slot_import.detect_format(file.filename)
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload a .csv, .json or .jsonl file"
+        )
+    
+    # Parsing and inserting run in the threadpool so a large file does not hold up the event loop.
+    # Chunks are committed as they are read, so an unreadable file still gets its report.
+    return await run_in_threadpool(slot_import.import_slots_file, file.file, format, chunk_size)
 
 @router1.put("/slots/{slot_id}", response_model=SlotResponse)
-def update_slot(
+async def update_slot(
     slot_id: int,
     slot_update: SlotUpdate,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a parking slot"""
-    return slot_crud.update_slot(db, slot_id, slot_update)
+    return await db.run_sync(slot_crud.update_slot, slot_id, slot_update)
 
 @router1.delete("/slots/{slot_id}")
-def delete_slot(
+async def delete_slot(
     slot_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a parking slot"""
-    return slot_crud.delete_slot(db, slot_id)
+    return await db.run_sync(slot_crud.delete_slot, slot_id)
 
 @router1.put("/slots/{slot_id}/mark-damaged")
-def mark_slot_damaged(
+async def mark_slot_damaged(
     slot_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark a slot as damaged"""
-    slot = db.query(Slot).filter(Slot.id == slot_id).first()
+    slot = await db.scalar(select(Slot).where(Slot.id == slot_id))
     if not slot:
         raise HTTPException(status_code=404, detail="Slot not found")
     
-    slot.status = "damaged"
-    db.commit()
+    await db.run_sync(slot_crud.set_slot_status, slot, "damaged")
+    await db.commit()
     return {"message": f"Slot {slot.slot_number} marked as damaged"}
 
 @router1.put("/slots/{slot_id}/mark-repaired")
-def mark_slot_repaired(
+async def mark_slot_repaired(
     slot_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark a damaged slot as repaired and available"""
-    slot = db.query(Slot).filter(Slot.id == slot_id).first()
+    slot = await db.scalar(select(Slot).where(Slot.id == slot_id))
     if not slot:
         raise HTTPException(status_code=404, detail="Slot not found")
     
-    slot.status = "available"
-    db.commit()
+    await db.run_sync(slot_crud.set_slot_status, slot, "available")
+    await db.commit()
     return {"message": f"Slot {slot.slot_number} marked as repaired and available"}
 
+@router1.get("/availability/stream")
+async def stream_availability(
+    slot_type: Optional[List[str]] = Query(None),
+    current_user: User = Depends(get_user_from_token)
+):
+    """Server-Sent Events feed of available slots per type (connect with ?token=<access token>)"""
+    # EventSource cannot send an Authorization header, hence the token query parameter
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    if not availability_feed.loaded:
+        await run_in_threadpool(availability_feed.reload_from_db)
+    
+    async def events():
+        # Streams end after a while and the browser reconnects (getting fresh counts),
+        # so a stream never holds up a server shutdown for long
+        deadline = asyncio.get_running_loop().time() + settings.AVAILABILITY_STREAM_MAX_AGE
+        watcher, changes = availability_feed.watch()
+        try:
+            yield f"retry: {settings.AVAILABILITY_STREAM_RETRY_MS}\n\n"
+            while True:
+                for change in changes:
+                    if not slot_type or change.slot_type in slot_type:
+                        yield f"event: availability\ndata: {json.dumps(change._asdict())}\n\n"
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    return
+                try:
+                    changes = await asyncio.wait_for(watcher.next(), min(remaining, settings.WS_HEARTBEAT_INTERVAL))
+                except asyncio.TimeoutError:
+                    # Comment line: keeps idle proxies from closing the stream
+                    changes = []
+                    yield ": keep-alive\n\n"
+        finally:
+            availability_feed.unwatch(watcher)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ========== VISITOR MANAGEMENT ==========
 router2 = APIRouter()
-@router2.get("/visitors", response_model=List[VisitorResponse])
-def get_all_visitors(
+@router2.get("/visitors", response_model=Page[VisitorResponse])
+async def get_all_visitors(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all visitor bookings"""
-    visitors = db.query(Visitor).all()
-    
-    # Enhance response with resident and slot info
-    enhanced_visitors = []
-    for visitor in visitors:
-        visitor_data = VisitorResponse.from_orm(visitor)
-        
-        # Get resident name
-        resident = db.query(User).filter(User.id == visitor.resident_id).first()
-        if resident:
-            visitor_data.resident_name = resident.full_name
-        
-        # Get slot number if assigned
-        if visitor.slot_id:
-            slot = db.query(Slot).filter(Slot.id == visitor.slot_id).first()
-            if slot:
-                visitor_data.slot_number = slot.slot_number
-        
-        enhanced_visitors.append(visitor_data)
-    
-    return enhanced_visitors
+    visitors, next_cursor = await db.run_sync(visitor_crud.get_all_visitors, cursor, limit)
+    return {"items": visitors, "next_cursor": next_cursor}
 
 @router2.get("/visitors/pending", response_model=List[VisitorResponse])
-def get_pending_visitors(
+async def get_pending_visitors(
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all pending visitor requests (unplanned visitors waiting resident approval)"""
-    return visitor_crud.get_pending_visitors(db)
+    return await db.run_sync(visitor_crud.get_enriched_visitors, statuses=["pending"])
 
 @router2.post("/visitors/unplanned", response_model=VisitorResponse)
-def create_unplanned_visitor(
+async def create_unplanned_visitor(
     visitor_data: VisitorCreate,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create an unplanned visitor entry that requires resident approval"""
     # Check if resident exists
-    resident = db.query(User).filter(
+    resident = await db.scalar(select(User).where(
         User.id == visitor_data.resident_id, 
         User.role == "resident"
-    ).first()
+    ))
     
     if not resident:
         raise HTTPException(status_code=404, detail="Resident not found")
@@ -242,13 +348,12 @@ def create_unplanned_visitor(
     )
     
     db.add(db_visitor)
-    db.commit()
-    db.refresh(db_visitor)
+    await db.run_sync(dashboard_counters.visitor_status_changed, None, db_visitor.status)
+    await db.commit()
+    await db.refresh(db_visitor)
     
     # Create notification for resident
-    from app.crud.notification_crud import create_notification
-    create_notification(
-        db,
+    notification_outbox.add(
         resident.id,
         "Unplanned Visitor Approval Required",
         f"Visitor {visitor_data.visitor_name} with vehicle {visitor_data.vehicle_number} is waiting for approval.",
@@ -293,145 +398,83 @@ def reject_visitor(
 '''
 
 @router2.put("/visitors/{visitor_id}/mark-exit")
-def mark_visitor_exit(
+async def mark_visitor_exit(
     visitor_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark visitor as exited and free up the slot"""
-    visitor = visitor_crud.mark_visitor_exit(db, visitor_id)
+    visitor = await db.run_sync(visitor_crud.mark_visitor_exit, visitor_id)
     return {"message": "Visitor marked as exited"}
 
 # ========== REQUEST MANAGEMENT ==========
 router3 = APIRouter()
-@router3.get("/", response_model=List[RequestResponse])
-def get_all_requests(
+@router3.get("/", response_model=Page[RequestResponse])
+async def get_all_requests(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all resident requests"""
-    requests = db.query(Request).all()
-    
-    # Enhance response with resident and slot info
-    enhanced_requests = []
-    for req in requests:
-        request_data = RequestResponse.from_orm(req)
-        
-        # Get resident name
-        resident = db.query(User).filter(User.id == req.resident_id).first()
-        if resident:
-            request_data.resident_name = resident.full_name
-        
-        # Get slot number
-        slot = db.query(Slot).filter(Slot.id == req.slot_id).first()
-        if slot:
-            request_data.slot_number = slot.slot_number
-        
-        enhanced_requests.append(request_data)
-    
-    return enhanced_requests
+    requests, next_cursor = await db.run_sync(request_crud.get_all_requests, cursor, limit)
+    return {"items": requests, "next_cursor": next_cursor}
 
 @router3.get("/pending", response_model=List[RequestResponse])
-def get_pending_requests(
+async def get_pending_requests(
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all pending requests"""
-    requests = request_crud.get_pending_requests(db)
-    
-    enhanced_requests = []
-    for req in requests:
-        request_data = RequestResponse.from_orm(req)
-        
-        resident = db.query(User).filter(User.id == req.resident_id).first()
-        if resident:
-            request_data.resident_name = resident.full_name
-        
-        slot = db.query(Slot).filter(Slot.id == req.slot_id).first()
-        if slot:
-            request_data.slot_number = slot.slot_number
-        
-        enhanced_requests.append(request_data)
-    
-    return enhanced_requests
+    return await db.run_sync(request_crud.get_enriched_requests, status="pending")
 
 @router3.get("/damage-reports", response_model=List[RequestResponse])
-def get_damage_reports(
+async def get_damage_reports(
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all damage report requests"""
-    requests = request_crud.get_requests_by_type(db, "damage_report")
-    
-    enhanced_requests = []
-    for req in requests:
-        request_data = RequestResponse.from_orm(req)
-        
-        resident = db.query(User).filter(User.id == req.resident_id).first()
-        if resident:
-            request_data.resident_name = resident.full_name
-        
-        slot = db.query(Slot).filter(Slot.id == req.slot_id).first()
-        if slot:
-            request_data.slot_number = slot.slot_number
-        
-        enhanced_requests.append(request_data)
-    
-    return enhanced_requests
+    return await db.run_sync(request_crud.get_enriched_requests, request_type="damage_report")
 
 @router3.put("/requests/{request_id}/approve")
-def approve_request(
+async def approve_request(
     request_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Approve a resident request"""
-    request = request_crud.update_request_status(db, request_id, "approved")
+    request = await db.run_sync(request_crud.update_request_status, request_id, "approved")
     return {"message": "Request approved"}
 
 @router3.put("/requests/{request_id}/reject")
-def reject_request(
+async def reject_request(
     request_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Reject a resident request"""
-    request = request_crud.update_request_status(db, request_id, "rejected")
+    request = await db.run_sync(request_crud.update_request_status, request_id, "rejected")
     return {"message": "Request rejected"}
 
 @router3.put("/requests/{request_id}/complete")
-def complete_request(
+async def complete_request(
     request_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark a request as completed"""
-    request = request_crud.update_request_status(db, request_id, "completed")
+    request = await db.run_sync(request_crud.update_request_status, request_id, "completed")
     return {"message": "Request marked as completed"}
 
 # ========== DASHBOARD SUMMARY ==========
 router4 = APIRouter()
 @router4.get("/summary")
-def get_admin_summary(
+async def get_admin_summary(
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get admin dashboard summary"""
-    total_slots = db.query(Slot).count()
-    available_slots = db.query(Slot).filter(Slot.status == "available").count()
-    occupied_slots = db.query(Slot).filter(Slot.status == "occupied").count()
-    damaged_slots = db.query(Slot).filter(Slot.status == "damaged").count()
-    
-    total_residents = db.query(User).filter(User.role == "resident").count()
-    pending_visitors = db.query(Visitor).filter(Visitor.status == "pending").count()
-    pending_requests = db.query(Request).filter(Request.status == "pending").count()
-    
-    return {
-        "total_slots": total_slots,
-        "available_slots": available_slots,
-        "occupied_slots": occupied_slots,
-        "damaged_slots": damaged_slots,
-        "total_residents": total_residents,
-        "pending_visitors": pending_visitors,
-        "pending_requests": pending_requests
-    }
\ No newline at end of file
+    # Counters are kept current by the write paths; load them on first use
+    if not dashboard_counters.loaded:
+        await db.run_sync(dashboard_counters.reconcile)
+    return dashboard_counters.summary()
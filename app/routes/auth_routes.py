@@ -1,17 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.config.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.database import get_async_db
 from app.schemas.user_schema import UserCreate, UserLogin, Token, UserResponse
-from app.crud.user_crud import create_user, authenticate_user
-from app.utils.auth_utils import create_access_token
+from app.crud.user_crud import create_user, ensure_email_available, get_user_by_email
+from app.utils.auth_utils import create_access_token, get_password_hash_async, verify_and_update_password_async
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
-        db_user = create_user(db, user)
+        # A duplicate is turned away before paying for a hash
+        await db.run_sync(ensure_email_available, user.email)
+        hashed_password = await get_password_hash_async(user.password)
+        db_user = await db.run_sync(create_user, user, hashed_password)
         return db_user
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -19,14 +24,23 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         )
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_data.email, user_data.password)
-    if not user:
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await db.run_sync(get_user_by_email, user_data.email)
+    is_valid = False
+    if user:
+        is_valid, new_hash = await verify_and_update_password_async(user_data.password, user.hashed_password)
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
         )
+    
+    # Transparently upgrade hashes made with an outdated bcrypt cost
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     access_token = create_access_token(
         data={"sub": user.email, "role": user.role}
     )
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
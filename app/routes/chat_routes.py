@@ -1,92 +1,63 @@
-
-from fastapi import WebSocket, WebSocketDisconnect, Request, APIRouter
+from fastapi import WebSocket, WebSocketDisconnect, Request, APIRouter, Depends, HTTPException, status
 from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from fastapi.templating import Jinja2Templates
-import random
+from app.dependencies.auth import (
+    security, get_current_admin, get_current_resident, get_user_from_token, get_websocket_user
+)
+from app.websocket.chat_hub import chat_hub
+from app.websocket.heartbeat import PONG_MESSAGE
 
 router = APIRouter()
 
 templates = Jinja2Templates(directory="app/templates")
-clients = {} 
-admin_socket = None
-
-def random_color():
-    return "#{:06x}".format(random.randint(0, 0xFFFFFF))
 
 
 @router.get("/admin", response_class=HTMLResponse)
-async def admin_page(request: Request):
-    return templates.TemplateResponse("admin.html", {"request": request})
+async def admin_page(request: Request, token: str, current_user = Depends(get_user_from_token)):
+    if current_user.role != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return templates.TemplateResponse("admin.html", {"request": request, "token": token})
 
 
 @router.get("/client", response_class=HTMLResponse)
-async def client_page(request: Request, username: str):
-    color = random_color()
-    return templates.TemplateResponse("client.html", {"request": request, "username": username, "color": color})
+async def client_page(request: Request, token: str, current_user = Depends(get_user_from_token)):
+    return templates.TemplateResponse(
+        "client.html", {"request": request, "token": token, "username": current_user.full_name}
+    )
 
 
 @router.get("/admin-link")
-async def get_admin_link(request: Request):
+async def get_admin_link(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user = Depends(get_current_admin)
+):
     base_url = str(request.base_url).rstrip("/")
-    link = f"{base_url}/admin"
+    link = f"{base_url}/admin?token={credentials.credentials}"
     return JSONResponse({"chat_url": link})
 
 @router.get("/client-link")
-async def get_client_link(request: Request, username: str):
+async def get_client_link(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user = Depends(get_current_resident)
+):
     base_url = str(request.base_url).rstrip("/")
-    color = random_color()
-    link = f"{base_url}/client?username={username}&color={color}"
+    link = f"{base_url}/client?token={credentials.credentials}"
     return JSONResponse({"chat_url": link})
 
 
-@router.websocket("/ws/{role}")
-async def websocket_endpoint(websocket: WebSocket, role: str):
-    global admin_socket
-    await websocket.accept()
-
-    if role.startswith("client_"):
-        username = role.split("_", 1)[1]
-        color = random_color()
-        clients[username] = {"socket": websocket, "color": color}
-        print(f"✅ Client {username} connected ({color})")
-        if admin_socket:
-            await admin_socket.send_text(f"📩 {username} connected.")
-    elif role == "admin":
-        admin_socket = websocket
-        print("✅ Admin connected")
-        await admin_socket.send_text("🟢 Admin connected.")
-
+@router.websocket("/ws/chat")
+async def websocket_endpoint(websocket: WebSocket, current_user = Depends(get_websocket_user)):
+    """Chat socket for residents and admins (connect with ?token=<access token>)"""
+    await chat_hub.join(websocket, current_user)
     try:
         while True:
             data = await websocket.receive_text()
-
-            if role == "admin":
-                if ":" in data:
-                    target, message = data.split(":", 1)
-                    target = target.strip()
-                    if target in clients:
-                        color = clients[target]["color"]
-                        await clients[target]["socket"].send_text(f"Admin:{message.strip()}")
-                    else:
-                        await admin_socket.send_text(f"⚠️ User '{target}' not found.")
-                else:
-                    await admin_socket.send_text("⚠️ Use format: username: message")
-
-            elif role.startswith("client_"):
-                username = role.split("_", 1)[1]
-                color = clients[username]["color"]
-                if admin_socket:
-                    await admin_socket.send_text(f"<b style='color:{color}'>{username}</b>: {data}")
-                await websocket.send_text(f"You: {data}")
-
+            chat_hub.touch(websocket)
+            if data == PONG_MESSAGE:
+                continue
+            await chat_hub.handle(current_user, websocket, data)
     except WebSocketDisconnect:
-        if role.startswith("client_"):
-            username = role.split("_", 1)[1]
-            clients.pop(username, None)
-            print(f"❌ {username} disconnected")
-            if admin_socket:
-                await admin_socket.send_text(f"⚠️ {username} disconnected.")
-        elif role == "admin":
-            admin_socket = None
-            print("❌ Admin disconnected")
-
+        chat_hub.disconnect(websocket, current_user.id)
\ No newline at end of file
@@ -1,16 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status, WebSocket, WebSocketDisconnect
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import json
 from datetime import datetime
 
-from app.config.database import get_db
-from app.dependencies.auth import get_current_resident
+from app.config.database import get_async_db
+from app.config.settings import settings
+from app.dependencies.auth import get_current_resident, get_websocket_user
 from app.models.user import User
 from app.models.slot import Slot
 from app.models.visitor import Visitor
 from app.models.request import Request
-from app.models.notification import Notification
+from app.models.notification import Notification as NotificationModel
 
 # Import schemas
 from app.schemas.user_schema import UserResponse
@@ -19,12 +22,18 @@ from app.schemas.visitor_schema import VisitorCreate, VisitorResponse
 from app.schemas.request_schema import RequestCreate, RequestResponse
 from app.schemas.resident_schema import (
     ResidentProfileUpdate, PasswordChange, SlotChangeRequest,
-    DamageReport, VisitorBooking, ResidentDashboard, Notification
+    DamageReport, VisitorBooking, ResidentDashboard, Notification, NotificationBulkRead
 )
+from app.schemas.pagination_schema import Page
 
 # Import CRUD operations
 from app.crud import user_crud, slot_crud, visitor_crud, request_crud, notification_crud
-from app.utils.auth_utils import verify_password, get_password_hash
+from app.utils.auth_utils import verify_password_async, get_password_hash_async
+from app.services.slot_allocator import slot_allocator
+from app.services.reservation_index import reservation_index, booking_window
+from app.services.dashboard_counters import dashboard_counters
+from app.services.notification_outbox import notification_outbox
+from app.services.user_cache import user_cache
 from app.websocket.manager import manager
 from app.websocket.events import send_notification_to_resident, send_visitor_approval_request
 
@@ -33,51 +42,55 @@ router = APIRouter()
 # ========== PROFILE MANAGEMENT ==========
 
 @router.get("/profile", response_model=UserResponse)
-def get_my_profile(
+async def get_my_profile(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get resident's own profile"""
     return current_user
 
 @router.put("/profile", response_model=UserResponse)
-def update_my_profile(
+async def update_my_profile(
     profile_update: ResidentProfileUpdate,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update resident's profile"""
+    user = await db.get(User, current_user.id)
     update_data = profile_update.dict(exclude_unset=True)
     for field, value in update_data.items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
     
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    await db.run_sync(user_cache.invalidate_on_commit, user.email)
+    await db.commit()
+    await db.refresh(user)
+    return user
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     password_data: PasswordChange,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Change resident's password"""
-    if not verify_password(password_data.current_password, current_user.hashed_password):
+    user = await db.get(User, current_user.id)
+    if not await verify_password_async(password_data.current_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    current_user.hashed_password = get_password_hash(password_data.new_password)
-    db.commit()
+    user.hashed_password = await get_password_hash_async(password_data.new_password)
+    await db.run_sync(user_cache.invalidate_on_commit, user.email)
+    await db.commit()
     return {"message": "Password changed successfully"}
 
 # ========== SLOT MANAGEMENT ==========
 router1 = APIRouter()
 @router1.get("/my-slot", response_model=SlotResponse)
-def get_my_slot(
+async def get_my_slot(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get resident's assigned parking slot"""
     if not current_user.assigned_slot_id:
@@ -86,7 +99,7 @@ def get_my_slot(
             detail="No slot assigned"
         )
     
-    slot = db.query(Slot).filter(Slot.id == current_user.assigned_slot_id).first()
+    slot = await db.scalar(select(Slot).where(Slot.id == current_user.assigned_slot_id))
     if not slot:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -96,10 +109,10 @@ def get_my_slot(
     return slot
 
 @router1.post("/slot/change-request")
-def request_slot_change(
+async def request_slot_change(
     change_request: SlotChangeRequest,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Request to change assigned parking slot"""
     if not current_user.assigned_slot_id:
@@ -117,12 +130,12 @@ def request_slot_change(
         slot_id=current_user.assigned_slot_id
     )
     db.add(db_request)
-    db.commit()
-    db.refresh(db_request)
+    await db.run_sync(dashboard_counters.request_status_changed, None, db_request.status)
+    await db.commit()
+    await db.refresh(db_request)
     
     # Create notification for admin (in real implementation, this would be via WebSocket)
-    notification_crud.create_notification(
-        db, 
+    notification_outbox.add(
         current_user.id,
         "Slot Change Request",
         f"Your slot change request has been submitted and is pending admin approval.",
@@ -132,10 +145,10 @@ def request_slot_change(
     return {"message": "Slot change request submitted successfully", "request_id": db_request.id}
 
 @router1.post("/slot/damage-report")
-def report_slot_damage(
+async def report_slot_damage(
     damage_report: DamageReport,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Report damage to assigned parking slot"""
     if not current_user.assigned_slot_id:
@@ -153,18 +166,18 @@ def report_slot_damage(
         slot_id=current_user.assigned_slot_id
     )
     db.add(db_request)
+    await db.run_sync(dashboard_counters.request_status_changed, None, db_request.status)
     
     # Mark slot as damaged
-    slot = db.query(Slot).filter(Slot.id == current_user.assigned_slot_id).first()
+    slot = await db.scalar(select(Slot).where(Slot.id == current_user.assigned_slot_id))
     if slot:
-        slot.status = "damaged"
+        await db.run_sync(slot_crud.set_slot_status, slot, "damaged")
     
-    db.commit()
-    db.refresh(db_request)
+    await db.commit()
+    await db.refresh(db_request)
     
     # Notify resident
-    notification_crud.create_notification(
-        db, 
+    notification_outbox.add(
         current_user.id,
         "Damage Reported",
         "Your slot has been marked as damaged. Maintenance has been notified.",
@@ -176,17 +189,31 @@ def report_slot_damage(
 # ========== VISITOR MANAGEMENT ==========
 router2 = APIRouter()
 @router2.post("/visitors", response_model=VisitorResponse)
-def book_visitor_slot(
+async def book_visitor_slot(
     visitor_booking: VisitorBooking,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Book a parking slot for a visitor"""
-    # Find available visitor slot
-    available_slot = db.query(Slot).filter(
-        Slot.slot_type == visitor_booking.vehicle_type,
-        Slot.status == "available"
-    ).first()
+    """Book a parking slot for a visitor for the window entry_time to exit_time"""
+    start, end = booking_window(visitor_booking.entry_time, visitor_booking.exit_time)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Exit time must be after entry time"
+        )
+    
+    if start <= datetime.now():
+        # Visitor is arriving now: claim a free slot (marked occupied in the same
+        # transaction) that nobody else has booked for this window
+        booked_slot_ids = await db.run_sync(
+            reservation_index.booked_slot_ids, start, end, visitor_booking.vehicle_type
+        )
+        available_slot = await db.run_sync(
+            slot_allocator.allocate, visitor_booking.vehicle_type, exclude_ids=booked_slot_ids
+        )
+    else:
+        # Future visit: only the window is reserved, the slot stays usable until then
+        available_slot = await db.run_sync(reservation_index.find_free_slot, visitor_booking.vehicle_type, start, end)
     
     if not available_slot:
         raise HTTPException(
@@ -206,16 +233,27 @@ def book_visitor_slot(
         status="approved"  # Auto-approve for pre-booked visitors
     )
     
-    # Mark slot as occupied
-    available_slot.status = "occupied"
-    
     db.add(db_visitor)
-    db.commit()
-    db.refresh(db_visitor)
+    try:
+        await db.flush()
+        if not await db.run_sync(reservation_index.book, db_visitor.id, available_slot.id, start, end):
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Slot was booked by someone else, please try again"
+            )
+        await db.commit()
+    except IntegrityError:
+        # Another process booked an overlapping window (PostgreSQL exclusion constraint)
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Slot not available for that window"
+        )
+    await db.refresh(db_visitor)
     
     # Notify resident
-    notification_crud.create_notification(
-        db, 
+    notification_outbox.add(
         current_user.id,
         "Visitor Booking Confirmed",
         f"Visitor {visitor_booking.visitor_name} has been booked for slot {available_slot.slot_number}",
@@ -225,271 +263,224 @@ def book_visitor_slot(
     return db_visitor
 
 @router2.get("/visitors", response_model=List[VisitorResponse])
-def get_my_visitors(
+async def get_my_visitors(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all visitor bookings for the resident"""
-    visitors = db.query(Visitor).filter(Visitor.resident_id == current_user.id).all()
-    
-    # Enhance response with slot info
-    enhanced_visitors = []
-    for visitor in visitors:
-        visitor_data = VisitorResponse.from_orm(visitor)
-        if visitor.slot_id:
-            slot = db.query(Slot).filter(Slot.id == visitor.slot_id).first()
-            if slot:
-                visitor_data.slot_number = slot.slot_number
-        enhanced_visitors.append(visitor_data)
-    
-    return enhanced_visitors
+    return await db.run_sync(visitor_crud.get_enriched_visitors, resident_id=current_user.id)
 
 @router2.get("/visitors/active", response_model=List[VisitorResponse])
-def get_active_visitors(
+async def get_active_visitors(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get active visitor bookings (not completed)"""
-    visitors = db.query(Visitor).filter(
-        Visitor.resident_id == current_user.id,
-        Visitor.status.in_(["pending", "approved"])
-    ).all()
-    
-    enhanced_visitors = []
-    for visitor in visitors:
-        visitor_data = VisitorResponse.from_orm(visitor)
-        if visitor.slot_id:
-            slot = db.query(Slot).filter(Slot.id == visitor.slot_id).first()
-            if slot:
-                visitor_data.slot_number = slot.slot_number
-        enhanced_visitors.append(visitor_data)
-    
-    return enhanced_visitors
+    return await db.run_sync(
+        visitor_crud.get_enriched_visitors, resident_id=current_user.id, statuses=["pending", "approved"]
+    )
 
 @router2.delete("/visitors/{visitor_id}")
-def cancel_visitor_booking(
+async def cancel_visitor_booking(
     visitor_id: int,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cancel a visitor booking"""
-    visitor = db.query(Visitor).filter(
+    visitor = await db.scalar(select(Visitor).where(
         Visitor.id == visitor_id,
         Visitor.resident_id == current_user.id
-    ).first()
+    ))
     
     if not visitor:
         raise HTTPException(status_code=404, detail="Visitor booking not found")
     
-    # Free up the slot if assigned
-    if visitor.slot_id:
-        slot = db.query(Slot).filter(Slot.id == visitor.slot_id).first()
+    await db.run_sync(reservation_index.release, visitor.id)
+    
+    # Free up the slot if the visit has started (future bookings never occupied it)
+    if visitor.slot_id and booking_window(visitor.entry_time)[0] <= datetime.now():
+        slot = await db.scalar(select(Slot).where(Slot.id == visitor.slot_id))
         if slot:
-            slot.status = "available"
+            await db.run_sync(slot_crud.set_slot_status, slot, "available")
     
-    db.delete(visitor)
-    db.commit()
+    await db.run_sync(dashboard_counters.visitor_status_changed, visitor.status, None)
+    await db.delete(visitor)
+    await db.commit()
     
     return {"message": "Visitor booking cancelled successfully"}
 
 @router2.get("/visitors/pending-approval", response_model=List[VisitorResponse])
-def get_pending_approval_visitors(
+async def get_pending_approval_visitors(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get unplanned visitors waiting for resident approval"""
-    visitors = db.query(Visitor).filter(
-        Visitor.resident_id == current_user.id,
-        Visitor.status == "pending",  # Unplanned visitors waiting approval
-        Visitor.slot_id == None  # No slot assigned yet
-    ).all()
-    
-    enhanced_visitors = []
-    for visitor in visitors:
-        visitor_data = VisitorResponse.from_orm(visitor)
-        enhanced_visitors.append(visitor_data)
-    
-    return enhanced_visitors
+    # Unplanned visitors are pending with no slot assigned yet
+    return await db.run_sync(
+        visitor_crud.get_enriched_visitors, resident_id=current_user.id, statuses=["pending"], unassigned_only=True
+    )
 
 # ========== REQUEST MANAGEMENT ==========
 router3 = APIRouter()
 @router3.get("/requests", response_model=List[RequestResponse])
-def get_my_requests(
+async def get_my_requests(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all requests made by the resident"""
-    requests = db.query(Request).filter(Request.resident_id == current_user.id).all()
-    
-    # Enhance response with slot info
-    enhanced_requests = []
-    for req in requests:
-        request_data = RequestResponse.from_orm(req)
-        slot = db.query(Slot).filter(Slot.id == req.slot_id).first()
-        if slot:
-            request_data.slot_number = slot.slot_number
-        enhanced_requests.append(request_data)
-    
-    return enhanced_requests
+    return await db.run_sync(request_crud.get_enriched_requests, resident_id=current_user.id)
 
 @router3.get("/requests/pending", response_model=List[RequestResponse])
-def get_pending_requests(
+async def get_pending_requests(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get pending requests"""
-    requests = db.query(Request).filter(
-        Request.resident_id == current_user.id,
-        Request.status == "pending"
-    ).all()
-    
-    enhanced_requests = []
-    for req in requests:
-        request_data = RequestResponse.from_orm(req)
-        slot = db.query(Slot).filter(Slot.id == req.slot_id).first()
-        if slot:
-            request_data.slot_number = slot.slot_number
-        enhanced_requests.append(request_data)
-    
-    return enhanced_requests
+    return await db.run_sync(request_crud.get_enriched_requests, status="pending", resident_id=current_user.id)
 
 # ========== NOTIFICATION MANAGEMENT ==========
 router4 = APIRouter()
-@router4.get("/notifications", response_model=List[Notification])
-def get_my_notifications(
+@router4.get("/notifications", response_model=Page[Notification])
+async def get_my_notifications(
     unread_only: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get resident's notifications"""
-    return notification_crud.get_user_notifications(db, current_user.id, unread_only)
+    """Get resident's notifications, newest first"""
+    notifications, next_cursor = await db.run_sync(
+        notification_crud.get_user_notifications_page, current_user.id, unread_only, cursor, limit
+    )
+    return {"items": notifications, "next_cursor": next_cursor}
+
+@router4.get("/notifications/history", response_model=Page[Notification])
+async def get_my_notification_history(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_resident),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get resident's archived (older, read) notifications, newest first"""
+    notifications, next_cursor = await db.run_sync(
+        notification_crud.get_archived_notifications_page, current_user.id, cursor, limit
+    )
+    return {"items": notifications, "next_cursor": next_cursor}
 
 @router4.put("/notifications/{notification_id}/read")
-def mark_notification_as_read(
+async def mark_notification_as_read(
     notification_id: int,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark a notification as read"""
-    return notification_crud.mark_notification_as_read(db, notification_id, current_user.id)
+    return await db.run_sync(notification_crud.mark_notification_as_read, notification_id, current_user.id)
 
 @router4.put("/notifications/read-all")
-def mark_all_notifications_as_read(
+async def mark_all_notifications_as_read(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark all notifications as read"""
-    return notification_crud.mark_all_notifications_as_read(db, current_user.id)
+    return await db.run_sync(notification_crud.mark_all_notifications_as_read, current_user.id)
+
+@router4.put("/notifications/read")
+async def mark_notifications_as_read(
+    filters: NotificationBulkRead,
+    current_user: User = Depends(get_current_resident),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Mark notifications matching ids, type and/or age as read"""
+    return await db.run_sync(
+        notification_crud.mark_notifications_as_read, current_user.id, filters.ids, filters.type, filters.before
+    )
 
 @router4.get("/notifications/unread-count")
-def get_unread_notifications_count(
+async def get_unread_notifications_count(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get count of unread notifications"""
-    notifications = notification_crud.get_user_notifications(db, current_user.id, unread_only=True)
-    return {"unread_count": len(notifications)}
+    unread_count = await db.run_sync(notification_crud.get_unread_count, current_user.id)
+    return {"unread_count": unread_count}
 
 # ========== DASHBOARD ==========
 router5 = APIRouter()
-@router5.get("/dashboard")
-def get_resident_dashboard(
+@router5.get("/dashboard", response_model=ResidentDashboard)
+async def get_resident_dashboard(
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get resident dashboard summary"""
-    # Get assigned slot
-    assigned_slot = None
-    if current_user.assigned_slot_id:
-        slot = db.query(Slot).filter(Slot.id == current_user.assigned_slot_id).first()
-        if slot:
-            assigned_slot = {
-                "id": slot.id,
-                "slot_number": slot.slot_number,
-                "slot_type": slot.slot_type,
-                "status": slot.status
-            }
-    
-    # Get active visitors
-    active_visitors = db.query(Visitor).filter(
-        Visitor.resident_id == current_user.id,
-        Visitor.status.in_(["approved"])
-    ).all()
-    
-    # Get pending approval visitors (unplanned visitors)
-    pending_approval_visitors = db.query(Visitor).filter(
-        Visitor.resident_id == current_user.id,
-        Visitor.status == "pending",
-        Visitor.slot_id == None
-    ).all()
-    
-    # Get pending requests
-    pending_requests = db.query(Request).filter(
-        Request.resident_id == current_user.id,
-        Request.status == "pending"
-    ).all()
-    
-    # Get unread notifications count
-    from app.crud.notification_crud import get_user_notifications
-    unread_notifications = get_user_notifications(db, current_user.id, unread_only=True)
-    
+    def count(model, *criteria):
+        return select(func.count(model.id)).where(*criteria).scalar_subquery()
+    
+    # Assigned slot and all counts in a single round trip
+    row = (await db.execute(
+        select(
+            Slot.id,
+            Slot.slot_number,
+            Slot.slot_type,
+            Slot.status,
+            count(Visitor, Visitor.resident_id == User.id, Visitor.status == "approved"),
+            count(Visitor, Visitor.resident_id == User.id, Visitor.status == "pending", Visitor.slot_id == None),
+            count(Request, Request.resident_id == User.id, Request.status == "pending"),
+            count(NotificationModel, NotificationModel.user_id == User.id, NotificationModel.is_read == False)
+        ).select_from(User).outerjoin(Slot, Slot.id == User.assigned_slot_id).where(User.id == current_user.id)
+    )).one()
+    
+    slot_id, slot_number, slot_type, slot_status, active_visitors, pending_approval_visitors, pending_requests, unread = row
     return {
-        "assigned_slot": assigned_slot,
-        "active_visitors": [
-            {
-                "id": visitor.id,
-                "visitor_name": visitor.visitor_name,
-                "vehicle_number": visitor.vehicle_number,
-                "status": visitor.status,
-                "entry_time": visitor.entry_time
-            } for visitor in active_visitors
-        ],
-        "pending_requests": [
-            {
-                "id": req.id,
-                "request_type": req.request_type,
-                "status": req.status,
-            } for req in pending_requests
-        ],
-        "notifications_count": len(unread_notifications)
+        "assigned_slot": {
+            "id": slot_id,
+            "slot_number": slot_number,
+            "slot_type": slot_type,
+            "status": slot_status
+        } if slot_id else None,
+        "active_visitors_count": active_visitors,
+        "pending_approval_visitors_count": pending_approval_visitors,
+        "pending_requests_count": pending_requests,
+        "notifications_count": unread
     }
-# ========== WEB SOCKET FOR REAL-TIME COMMUNICATION ==========
 
 @router5.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket, user_id: int):
-    """WebSocket endpoint for real-time notifications"""
-    await manager.connect(websocket, user_id)
+async def websocket_endpoint(websocket: WebSocket, current_user: User = Depends(get_websocket_user)):
+    """WebSocket endpoint for real-time notifications (connect with ?token=<access token>)"""
+    await manager.connect(websocket, current_user.id)
     try:
         while True:
             # Keep connection alive and handle incoming messages if any
             data = await websocket.receive_text()
+            manager.touch(websocket)
             # You can handle incoming messages from client here if needed
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        manager.disconnect(websocket, current_user.id)
 
 # ========== VISITOR APPROVAL (FOR UNPLANNED VISITORS) ==========
 router6 = APIRouter()
 @router6.post("/visitors/{visitor_id}/approve")
-def approve_unplanned_visitor(
+async def approve_unplanned_visitor(
     visitor_id: int,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Approve an unplanned visitor (sent by admin for approval)"""
-    visitor = db.query(Visitor).filter(
+    visitor = await db.scalar(select(Visitor).where(
         Visitor.id == visitor_id,
         Visitor.resident_id == current_user.id,
         Visitor.status == "pending"
-    ).first()
+    ))
     
     if not visitor:
         raise HTTPException(status_code=404, detail="Visitor request not found")
     
-    # Find available slot
-    available_slot = db.query(Slot).filter(
-        Slot.slot_type == visitor.vehicle_type,
-        Slot.status == "available"
-    ).first()
+    # Unplanned visitors are already at the gate: claim a free slot (marked
+    # occupied in the same transaction) that nobody else has booked for their stay
+    start, end = booking_window(visitor.entry_time, visitor.exit_time)
+    booked_slot_ids = await db.run_sync(reservation_index.booked_slot_ids, start, end, visitor.vehicle_type)
+    available_slot = await db.run_sync(
+        slot_allocator.allocate, visitor.vehicle_type, exclude_ids=booked_slot_ids
+    )
     
     if not available_slot:
         raise HTTPException(
@@ -499,30 +490,45 @@ def approve_unplanned_visitor(
     
     # Assign slot and approve
     visitor.slot_id = available_slot.id
+    await db.run_sync(dashboard_counters.visitor_status_changed, visitor.status, "approved")
     visitor.status = "approved"
-    available_slot.status = "occupied"
     
-    db.commit()
+    if not await db.run_sync(reservation_index.book, visitor.id, available_slot.id, start, end):
+        await db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Slot was booked by someone else, please try again"
+        )
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another process booked an overlapping window (PostgreSQL exclusion constraint)
+        await db.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Slot not available for that window"
+        )
     
     return {"message": f"Visitor approved and assigned slot {available_slot.slot_number}"}
 
 @router6.post("/visitors/{visitor_id}/reject")
-def reject_unplanned_visitor(
+async def reject_unplanned_visitor(
     visitor_id: int,
     current_user: User = Depends(get_current_resident),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Reject an unplanned visitor"""
-    visitor = db.query(Visitor).filter(
+    visitor = await db.scalar(select(Visitor).where(
         Visitor.id == visitor_id,
         Visitor.resident_id == current_user.id,
         Visitor.status == "pending"
-    ).first()
+    ))
     
     if not visitor:
         raise HTTPException(status_code=404, detail="Visitor request not found")
     
+    await db.run_sync(dashboard_counters.visitor_status_changed, visitor.status, "rejected")
     visitor.status = "rejected"
-    db.commit()
+    await db.commit()
     
     return {"message": "Visitor request rejected"}
\ No newline at end of file
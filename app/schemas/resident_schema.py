@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class ResidentProfileUpdate(BaseModel):
@@ -28,10 +28,17 @@ class VisitorBooking(BaseModel):
 
 class ResidentDashboard(BaseModel):
     assigned_slot: Optional[dict]
-    active_visitors: list
-    pending_requests: list
+    active_visitors_count: int
+    pending_approval_visitors_count: int
+    pending_requests_count: int
     notifications_count: int
 
+class NotificationBulkRead(BaseModel):
+    # Filters are combined; none given marks everything as read
+    ids: Optional[List[int]] = None
+    type: Optional[str] = None
+    before: Optional[datetime] = None
+
 class Notification(BaseModel):
     id: int
     title: str
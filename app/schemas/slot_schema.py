@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class SlotBase(BaseModel):
@@ -21,4 +21,17 @@ class SlotResponse(SlotBase):
     assigned_resident_name: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ImportRowError(BaseModel):
+    row: int  # 1-based data row in the uploaded file
+    slot_number: Optional[str] = None
+    detail: str
+
+class SlotImportReport(BaseModel):
+    received: int
+    created: int
+    skipped_existing: int
+    errors: List[ImportRowError]
+    seconds: float
+    rows_per_second: float
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -28,4 +28,23 @@ class UserResponse(BaseModel):
 
 class Token(BaseModel):
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+
+class ResidentImportRow(BaseModel):
+    row: int  # 1-based data row in the uploaded file
+    email: str
+    user_id: int
+    slot_number: Optional[str] = None
+    temporary_password: Optional[str] = None  # set when the file gave no password
+
+class ResidentImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    detail: str
+
+class ResidentImportReport(BaseModel):
+    received: int
+    created: List[ResidentImportRow]
+    errors: List[ResidentImportError]
+    seconds: float
+    rows_per_second: float
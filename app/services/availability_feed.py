@@ -0,0 +1,175 @@
+import asyncio
+import threading
+from collections import Counter, namedtuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.slot import Slot
+from app.services import slot_events
+from app.websocket.backplane import backplane
+
+TOPIC = "slots.transition"
+
+# available is the count after the change; delta is 0 for the starting (or resync) counts
+AvailabilityChange = namedtuple("AvailabilityChange", ["slot_type", "available", "delta"])
+
+class AvailabilityWatcher:
+    """
+    One subscriber's queue of availability changes. Every change carries the
+    resulting count, so a watcher that falls behind skips to fresh counts
+    instead of buffering without bound.
+    """
+
+    def __init__(self, feed, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self._feed = feed
+        self._loop = loop
+        self._queue = asyncio.Queue(queue_size)
+
+    def _push(self, changes: list):
+        # Called from whichever thread delivered the transition
+        self._loop.call_soon_threadsafe(self._put, changes)
+
+    def _put(self, changes: list):
+        if self._queue.full():
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            changes = None   # resync
+        self._queue.put_nowait(changes)
+
+    async def next(self):
+        """The next list of AvailabilityChange"""
+        changes = await self._queue.get()
+        return self._feed.snapshot() if changes is None else changes
+
+class AvailabilityFeed:
+    """
+    Change-feed of available slot counts per slot type, for gate displays and
+    gRPC/SSE streams. Committed slot transitions are relayed over the
+    backplane, so every worker's counts follow the transitions of all workers;
+    without a running event loop (scripts, CLI) they are applied in-process.
+    reload() re-counts from the DB and publishes any drift as a change.
+    """
+
+    def __init__(self, queue_size: int):
+        self._queue_size = queue_size
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._available = Counter()
+        self._watchers = set()
+        self._loop = None
+        self._pending_lock = threading.Lock()
+        self._pending = Counter()
+        self._flush_scheduled = False
+        backplane.subscribe(TOPIC, self._deliver)
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        self._loop = None
+        self._apply(self._take_pending())
+
+    def reload(self, db: Session):
+        available = Counter(dict(
+            db.query(Slot.slot_type, func.count(Slot.id)).filter(
+                Slot.status == "available"
+            ).group_by(Slot.slot_type).all()
+        ))
+        with self._lock:
+            changes = [
+                AvailabilityChange(slot_type, available[slot_type], available[slot_type] - self._available[slot_type])
+                for slot_type in sorted(set(available) | set(self._available))
+                if available[slot_type] != self._available[slot_type]
+            ]
+            self._available = available
+            self._loaded = True
+            self._notify(changes)
+
+    def reload_from_db(self):
+        """Reload on a session of its own, for startup and the background job"""
+        with SessionLocal() as db:
+            self.reload(db)
+
+    def on_transition(self, transition: slot_events.SlotTransition):
+        deltas = Counter()
+        if transition.old_status == "available":
+            deltas[transition.old_slot_type] -= 1
+        if transition.new_status == "available":
+            deltas[transition.slot_type] += 1
+        deltas = {slot_type: delta for slot_type, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        loop = self._loop
+        if loop is None:
+            self._apply(deltas)
+            return
+        # Transitions committed together (e.g. a bulk import) go out as one message
+        with self._pending_lock:
+            self._pending.update(deltas)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._flush(), loop)
+        except RuntimeError:
+            # The event loop closed during shutdown
+            self._apply(self._take_pending())
+
+    def _take_pending(self):
+        with self._pending_lock:
+            deltas = {slot_type: delta for slot_type, delta in self._pending.items() if delta}
+            self._pending = Counter()
+            self._flush_scheduled = False
+        return deltas
+
+    async def _flush(self):
+        deltas = self._take_pending()
+        if deltas:
+            await backplane.publish(TOPIC, {"deltas": deltas})
+
+    async def _deliver(self, payload: dict):
+        self._apply(payload["deltas"])
+
+    def _apply(self, deltas: dict):
+        with self._lock:
+            changes = []
+            for slot_type, delta in sorted(deltas.items()):
+                self._available[slot_type] += delta
+                changes.append(AvailabilityChange(slot_type, self._available[slot_type], delta))
+            self._notify(changes)
+
+    def _notify(self, changes: list):
+        # Runs under the lock so every watcher sees changes in delivery order
+        if changes:
+            for watcher in self._watchers:
+                watcher._push(changes)
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return [
+            AvailabilityChange(slot_type, available, 0)
+            for slot_type, available in sorted(self._available.items())
+        ]
+
+    def watch(self):
+        """Subscribe the running event loop; returns the watcher and the counts it starts from"""
+        watcher = AvailabilityWatcher(self, asyncio.get_running_loop(), self._queue_size)
+        with self._lock:
+            self._watchers.add(watcher)
+            return watcher, self._snapshot()
+
+    def unwatch(self, watcher: AvailabilityWatcher):
+        with self._lock:
+            self._watchers.discard(watcher)
+
+availability_feed = AvailabilityFeed(settings.AVAILABILITY_QUEUE_SIZE)
+slot_events.subscribe(availability_feed.on_transition)
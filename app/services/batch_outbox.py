@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from sqlalchemy import DateTime, insert
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from app.config.database import SessionLocal
+from app.config.settings import settings
+
+try:
+    import fcntl
+except ImportError:   # Windows: single-process deployments only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+def _lock_file(file, blocking: bool = True):
+    """Exclusive advisory lock held until file is closed; False if not blocking and already held"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+def _is_current(file, path: str):
+    """Whether the open file is still the one at path, i.e. it was not renamed or removed meanwhile"""
+    try:
+        return os.path.samestat(os.fstat(file.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+class BatchOutbox:
+    """
+    Buffers rows for model in memory and writes them with one bulk INSERT
+    from a background thread, once batch_size rows are waiting or every
+    flush_interval seconds. If a batch is rejected, its rows are retried one
+    by one so a single bad row is logged and dropped on its own. Rows that
+    cannot be written because the database is unreachable are appended to a
+    JSON-lines spill file, which replay_spill() loads again at startup and the
+    background thread retries every spill_retry_interval seconds. Workers may
+    share the spill path: appends and replays take a file lock, and a replay
+    first renames the file to a name of its own. stop() flushes whatever is
+    still buffered.
+    """
+
+    def __init__(
+        self, model, batch_size: int, flush_interval: float, spill_path: str,
+        spill_retry_interval: float = settings.OUTBOX_SPILL_RETRY_INTERVAL
+    ):
+        self._model = model
+        self._datetime_columns = [
+            column.name for column in model.__table__.columns if isinstance(column.type, DateTime)
+        ]
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._spill_path = spill_path
+        self._spill_retry_interval = spill_retry_interval
+        self._buffer = []
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Register listener(rows) to be called with every batch of rows once written"""
+        self._listeners.append(listener)
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name=f"{self._model.__tablename__}-outbox", daemon=True
+            )
+            self._thread.start()
+
+    def add_row(self, row: dict):
+        """Queue a row; it is written within flush_interval seconds"""
+        with self._cond:
+            self._buffer.append(row)
+            if len(self._buffer) >= self._batch_size:
+                self._cond.notify()
+            started = self._thread is not None and self._thread.is_alive()
+        if not started:
+            self.start()
+
+    def _take(self):
+        rows, self._buffer = self._buffer, []
+        return rows
+
+    def _run(self):
+        next_replay = time.monotonic() + self._spill_retry_interval
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._buffer) < self._batch_size:
+                    self._cond.wait(self._flush_interval)
+                stopping = self._stopping
+                rows = self._take()
+            if rows:
+                self._write(rows)
+            if stopping:
+                return
+            # Rows spilled while the database was away go back in once it recovers
+            if time.monotonic() >= next_replay:
+                next_replay = time.monotonic() + self._spill_retry_interval
+                try:
+                    self.replay_spill()
+                except Exception:
+                    logger.exception("Replaying spilled %s rows failed", self._model.__tablename__)
+
+    def _insert(self, rows: list):
+        with SessionLocal() as db:
+            db.execute(insert(self._model), rows)
+            self._before_commit(db, rows)
+            db.commit()
+        for listener in self._listeners:
+            try:
+                listener(rows)
+            except Exception:
+                logger.exception("%s outbox listener failed", self._model.__tablename__)
+
+    @staticmethod
+    def _is_unavailable(exc: Exception):
+        """Whether exc means the database could not be reached, rather than that it rejected the rows"""
+        if isinstance(exc, (OperationalError, InterfaceError)):
+            return True
+        return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+    def _write(self, rows: list):
+        """Write rows, spilling them if the database is unreachable; returns False if they were spilled"""
+        try:
+            self._insert(rows)
+            return True
+        except Exception as exc:
+            if self._is_unavailable(exc):
+                logger.exception(
+                    "Writing %d %s rows failed, spilling them to %s",
+                    len(rows), self._model.__tablename__, self._spill_path
+                )
+                self._spill(rows)
+                return False
+            if len(rows) == 1:
+                logger.exception("Dropping %s row rejected by the database: %r", self._model.__tablename__, rows[0])
+                return True
+            logger.warning(
+                "Batch of %d %s rows rejected (%s), writing them one by one", len(rows), self._model.__tablename__, exc
+            )
+
+        for i, row in enumerate(rows):
+            if not self._write([row]):
+                # The database went away part way through
+                self._spill(rows[i + 1:])
+                return False
+        return True
+
+    def _before_commit(self, db, rows: list):
+        """Hook for subclasses to make further changes in the transaction writing rows"""
+
+    def _spill(self, rows: list):
+        lines = []
+        for row in rows:
+            for column in self._datetime_columns:
+                if row.get(column) is not None:
+                    row = {**row, column: row[column].isoformat()}
+            lines.append(json.dumps(row) + "\n")
+        if not lines:
+            return
+        with self._spill_lock:
+            while True:
+                with open(self._spill_path, "a") as spill:
+                    _lock_file(spill)
+                    # Another worker may have claimed the file for replay while we waited for the lock
+                    if _is_current(spill, self._spill_path):
+                        spill.writelines(lines)
+                        return
+
+    def _claim_spill_files(self):
+        """
+        Yield (path, file) for every spill file this process gets to replay,
+        each locked until the caller is done with it: the spill file, renamed
+        to a name of its own so other workers start a new one, and replay
+        files left behind by a worker that died mid-replay.
+        """
+        directory = os.path.dirname(self._spill_path) or "."
+        prefix = os.path.basename(self._spill_path) + ".replay-"
+        for name in sorted(os.listdir(directory)):
+            if not name.startswith(prefix):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                replay = open(path)
+            except FileNotFoundError:
+                continue
+            with replay:
+                # Locked files are being replayed by a live worker
+                if _lock_file(replay, blocking=False) and _is_current(replay, path):
+                    yield path, replay
+
+        try:
+            spill = open(self._spill_path)
+        except FileNotFoundError:
+            return
+        with spill:
+            _lock_file(spill)
+            if not _is_current(spill, self._spill_path):
+                return   # Claimed by another worker while we waited for the lock
+            path = os.path.join(directory, f"{prefix}{os.getpid()}-{uuid.uuid4().hex}")
+            os.replace(self._spill_path, path)
+            yield path, spill
+
+    def replay_spill(self):
+        """
+        Write rows spilled by earlier failed flushes, in this or any other
+        worker sharing the spill path; rows still unwritable are spilled again.
+        A replay cut short by a crash is picked up again, so rows are written
+        at least once.
+        """
+        if not self._replay_lock.acquire(blocking=False):
+            return   # Already replaying in another thread
+        try:
+            for path, spill in self._claim_spill_files():
+                self._replay(spill)
+                os.remove(path)
+        finally:
+            self._replay_lock.release()
+
+    def _replay(self, spill):
+        rows = [json.loads(line) for line in spill if line.strip()]
+        for row in rows:
+            for column in self._datetime_columns:
+                if row.get(column) is not None:
+                    row[column] = datetime.fromisoformat(row[column])
+        replayed = 0
+        for i in range(0, len(rows), self._batch_size):
+            if not self._write(rows[i:i + self._batch_size]):
+                # Still unreachable: keep the rest for the next attempt without trying each batch
+                self._spill(rows[i + self._batch_size:])
+                break
+            replayed = min(i + self._batch_size, len(rows))
+        if replayed:
+            logger.info("Replayed %d spilled %s rows", replayed, self._model.__tablename__)
+
+    def flush(self):
+        """Write everything buffered so far in the calling thread"""
+        with self._cond:
+            rows = self._take()
+        if rows:
+            self._write(rows)
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        # Anything queued after the thread's last pass
+        self.flush()
\ No newline at end of file
@@ -0,0 +1,15 @@
+import logging
+from datetime import datetime
+from app.config.database import SessionLocal
+from app.crud.visitor_crud import activate_due_bookings
+
+logger = logging.getLogger(__name__)
+
+def activate_bookings():
+    """Occupy the slots of future bookings whose window has started, for the background job"""
+    now = datetime.now()
+    with SessionLocal() as db:
+        activated = activate_due_bookings(db, now)
+    if activated:
+        logger.info("Marked %d booked slots occupied as of %s", activated, now)
+    return activated
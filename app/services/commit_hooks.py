@@ -0,0 +1,102 @@
+import logging
+import threading
+from collections import Counter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_BEFORE_CALLBACKS_KEY = "before_commit_callbacks"
+_CALLBACKS_KEY = "on_commit_callbacks"
+_ROLLBACK_CALLBACKS_KEY = "on_rollback_callbacks"
+
+def before_commit(db: Session, callback):
+    """Run callback when the session's current transaction starts to commit; dropped on rollback"""
+    db.info.setdefault(_BEFORE_CALLBACKS_KEY, []).append(callback)
+
+def on_commit(db: Session, callback):
+    """Run callback after the session's current transaction commits; dropped on rollback"""
+    db.info.setdefault(_CALLBACKS_KEY, []).append(callback)
+
+def on_rollback(db: Session, callback):
+    """Run callback if the session's current transaction rolls back; dropped on commit"""
+    db.info.setdefault(_ROLLBACK_CALLBACKS_KEY, []).append(callback)
+
+def _run(callbacks, label):
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception:
+            # The transaction is already over; a failing listener must not surface as a request error
+            logger.exception("%s callback failed", label)
+
+@event.listens_for(Session, "before_commit")
+def _run_before_commit_callbacks(session):
+    for callback in session.info.pop(_BEFORE_CALLBACKS_KEY, []):
+        callback()
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session):
+    session.info.pop(_ROLLBACK_CALLBACKS_KEY, None)
+    _run(session.info.pop(_CALLBACKS_KEY, []), "on_commit")
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_rollback_callbacks(session, transaction):
+    # Fires for explicit rollbacks and for sessions closed mid-transaction;
+    # after a commit both callback lists have already been consumed
+    if transaction.parent is not None:
+        return
+    session.info.pop(_BEFORE_CALLBACKS_KEY, None)
+    session.info.pop(_CALLBACKS_KEY, None)
+    _run(session.info.pop(_ROLLBACK_CALLBACKS_KEY, []), "on_rollback")
+
+class CommitTracker:
+    """
+    Tells a reader whether a database read raced with a commit that updates
+    in-memory state through on_commit callbacks. Such a commit may or may not
+    be in what the read saw, so a count read then cannot be combined with the
+    callbacks' deltas without counting a change twice or missing it.
+
+    Writers track(db, key) the state they change; readers take mark(key)
+    before reading and ask raced(key, mark) afterwards. Nothing blocks, so it
+    is safe from the event loop (async sessions commit there).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._committing = Counter()   # key -> commits between starting and finishing their callbacks
+        self._started = Counter()      # key -> commits started so far
+
+    def track(self, db: Session, key):
+        info_key = ("commit_tracker", id(self))
+        keys = db.info.get(info_key)
+        if keys is None:
+            keys = db.info[info_key] = set()
+            before_commit(db, lambda: self._enter(db, db.info.pop(info_key, keys)))
+            on_rollback(db, lambda: db.info.pop(info_key, None))
+        keys.add(key)
+
+    def _enter(self, db: Session, keys):
+        with self._lock:
+            self._committing.update(keys)
+            self._started.update(keys)
+        # Registered last, so it runs once the state's own callbacks have
+        leave = lambda: self._leave(keys)
+        on_commit(db, leave)
+        on_rollback(db, leave)
+
+    def _leave(self, keys):
+        with self._lock:
+            self._committing.subtract(keys)
+
+    def mark(self, key):
+        with self._lock:
+            return self._committing[key], self._started[key]
+
+    def raced(self, key, mark):
+        """Whether a commit tracked under key was under way at mark or has started since"""
+        committing, started = mark
+        with self._lock:
+            return committing > 0 or self._started[key] != started
+
+commit_tracker = CommitTracker()
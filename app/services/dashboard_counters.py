@@ -0,0 +1,121 @@
+import threading
+from collections import Counter
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models.slot import Slot
+from app.models.user import User
+from app.models.visitor import Visitor
+from app.models.request import Request
+from app.services import slot_events
+from app.services.commit_hooks import commit_tracker, on_commit
+
+class DashboardCounters:
+    """
+    In-memory totals behind the admin dashboard summary. Slot counts follow
+    committed slot transitions; resident, pending-visitor and pending-request
+    counts are adjusted by the write paths once their transaction commits.
+    A periodic reconcile() replaces them with fresh counts from the DB, which
+    also repairs drift from writes made by other worker processes. A count
+    whose read raced with a commit changing it is read again, and kept as it
+    is if it races every time: the commit's delta may already be in the read.
+    """
+
+    RECONCILE_ATTEMPTS = 3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._slots_by_status = Counter()
+        self._residents = 0
+        self._pending_visitors = 0
+        self._pending_requests = 0
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def reconcile(self, db: Session):
+        counts = {
+            "_slots_by_status": lambda: Counter(dict(
+                db.query(Slot.status, func.count(Slot.id)).group_by(Slot.status).all()
+            )),
+            "_residents": lambda: db.query(func.count(User.id)).filter(User.role == "resident").scalar(),
+            "_pending_visitors": lambda: db.query(func.count(Visitor.id)).filter(Visitor.status == "pending").scalar(),
+            "_pending_requests": lambda: db.query(func.count(Request.id)).filter(Request.status == "pending").scalar()
+        }
+        for field, count in counts.items():
+            self._reconcile_field(field, count)
+        with self._lock:
+            self._loaded = True
+
+    def _reconcile_field(self, field: str, count):
+        key = self._tracker_key(field)
+        for _ in range(self.RECONCILE_ATTEMPTS):
+            mark = commit_tracker.mark(key)
+            value = count()
+            # Checked under the lock deltas are applied under, so a commit
+            # starting after the check lands its delta on top of value
+            with self._lock:
+                if not commit_tracker.raced(key, mark):
+                    setattr(self, field, value)
+                    return
+        with self._lock:
+            # Before the first load a possibly off-by-one count beats none
+            if not self._loaded:
+                setattr(self, field, value)
+
+    @staticmethod
+    def _tracker_key(field: str):
+        return slot_events.TRACKER_KEY if field == "_slots_by_status" else f"dashboard{field}"
+
+    def reconcile_from_db(self):
+        """Reconcile on a session of its own, for the background job"""
+        with SessionLocal() as db:
+            self.reconcile(db)
+
+    def on_transition(self, transition: slot_events.SlotTransition):
+        with self._lock:
+            if transition.old_status is not None:
+                self._slots_by_status[transition.old_status] -= 1
+            if transition.new_status is not None:
+                self._slots_by_status[transition.new_status] += 1
+
+    def _adjust(self, db: Session, field: str, delta: int):
+        if not delta:
+            return
+
+        def apply():
+            with self._lock:
+                setattr(self, field, getattr(self, field) + delta)
+        commit_tracker.track(db, self._tracker_key(field))
+        on_commit(db, apply)
+
+    def resident_added(self, db: Session, count: int = 1):
+        self._adjust(db, "_residents", count)
+
+    def resident_removed(self, db: Session):
+        self._adjust(db, "_residents", -1)
+
+    def visitor_status_changed(self, db: Session, old_status: str, new_status: str):
+        """old_status is None for a new visitor, new_status is None for a deleted one"""
+        self._adjust(db, "_pending_visitors", (new_status == "pending") - (old_status == "pending"))
+
+    def request_status_changed(self, db: Session, old_status: str, new_status: str):
+        """old_status is None for a new request"""
+        self._adjust(db, "_pending_requests", (new_status == "pending") - (old_status == "pending"))
+
+    def summary(self):
+        with self._lock:
+            return {
+                "total_slots": sum(self._slots_by_status.values()),
+                "available_slots": self._slots_by_status["available"],
+                "occupied_slots": self._slots_by_status["occupied"],
+                "damaged_slots": self._slots_by_status["damaged"],
+                "total_residents": self._residents,
+                "pending_visitors": self._pending_visitors,
+                "pending_requests": self._pending_requests
+            }
+
+dashboard_counters = DashboardCounters()
+slot_events.subscribe(dashboard_counters.on_transition)
@@ -0,0 +1,34 @@
+import atexit
+from collections import Counter
+from datetime import datetime
+from app.config.settings import settings
+from app.models.notification import Notification
+from app.services.batch_outbox import BatchOutbox
+from app.services.unread_counter import unread_counter
+
+class NotificationOutbox(BatchOutbox):
+    """Batches notification inserts off the request path and keeps unread counters in step"""
+
+    def __init__(self, batch_size: int, flush_interval: float, spill_path: str):
+        super().__init__(Notification, batch_size, flush_interval, spill_path)
+
+    def add(self, user_id: int, title: str, message: str, type: str):
+        """Queue a notification; it is written within flush_interval seconds"""
+        self.add_row({
+            "user_id": user_id,
+            "title": title,
+            "message": message,
+            "type": type,
+            "is_read": False,
+            "created_at": datetime.now()
+        })
+
+    def _before_commit(self, db, rows: list):
+        for user_id, count in Counter(row["user_id"] for row in rows).items():
+            unread_counter.adjust(db, user_id, count)
+
+notification_outbox = NotificationOutbox(
+    settings.NOTIFICATION_BATCH_SIZE, settings.NOTIFICATION_FLUSH_INTERVAL, settings.NOTIFICATION_SPILL_PATH
+)
+
+atexit.register(notification_outbox.stop)
\ No newline at end of file
@@ -0,0 +1,16 @@
+import logging
+from datetime import datetime, timedelta
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.crud.notification_crud import archive_read_notifications
+
+logger = logging.getLogger(__name__)
+
+def compact_notifications():
+    """Archive read notifications past the retention period, for the background job"""
+    cutoff = datetime.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    with SessionLocal() as db:
+        moved = archive_read_notifications(db, cutoff)
+    if moved:
+        logger.info("Archived %d notifications read before %s", moved, cutoff)
+    return moved
\ No newline at end of file
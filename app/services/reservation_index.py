@@ -0,0 +1,199 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models.slot import Slot
+from app.models.user import User
+from app.models.visitor import Visitor
+from app.services import slot_events
+from app.services.commit_hooks import on_commit, on_rollback
+
+# Bookings without an exit time hold the slot indefinitely
+OPEN_ENDED = datetime.max
+
+def booking_window(entry_time: datetime, exit_time: datetime = None):
+    """Normalize a visitor's entry/exit times into a naive [start, end) window"""
+    def naive(value):
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone().replace(tzinfo=None)
+        return value
+    
+    return naive(entry_time), naive(exit_time) or OPEN_ENDED
+
+class SlotSchedule:
+    """
+    Bookings of a single slot, kept sorted by start time. Bookings on one slot
+    never overlap, so their end times are sorted too and an overlap check only
+    has to look at the booking starting just before the window ends: O(log n).
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._bookings = []   # (start, end, visitor_id)
+
+    def __bool__(self):
+        return bool(self._bookings)
+
+    def is_free(self, start: datetime, end: datetime):
+        i = bisect_left(self._starts, end)
+        return i == 0 or self._bookings[i - 1][1] <= start
+
+    def add(self, start: datetime, end: datetime, visitor_id: int):
+        i = bisect_left(self._starts, start)
+        self._starts.insert(i, start)
+        self._bookings.insert(i, (start, end, visitor_id))
+
+    def remove(self, start: datetime, visitor_id: int):
+        i = bisect_left(self._starts, start)
+        while i < len(self._bookings) and self._bookings[i][0] == start:
+            if self._bookings[i][2] == visitor_id:
+                del self._starts[i]
+                del self._bookings[i]
+                return
+            i += 1
+
+    def has_bookings_after(self, moment: datetime):
+        return bool(self._bookings) and self._bookings[-1][1] > moment
+
+class ReservationIndex:
+    """
+    In-memory interval index of approved visitor bookings, one schedule per
+    slot, grouped by slot type.
+
+    Only slots that have bookings are in the index. Checking one slot is
+    O(log k) for its k bookings; finding the slots of a type that clash with a
+    window checks each booked slot of that type, O(b log k) for b such slots,
+    and never touches unbooked slots.
+
+    Bookings are added as soon as they are made (and undone if the transaction
+    rolls back) so concurrent bookings in this process see each other. Across
+    processes the PostgreSQL exclusion constraint on visitors is the final guard.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schedules = {}   # slot_id -> SlotSchedule
+        self._bookings = {}    # visitor_id -> (slot_id, start, end)
+        self._slot_types = {}  # slot_id -> slot_type, for slots with bookings
+        self._booked = {}      # slot_type -> set of slot ids with bookings
+        self._loaded = False
+
+    def load(self, db: Session):
+        rows = db.query(
+            Visitor.id, Visitor.slot_id, Slot.slot_type, Visitor.entry_time, Visitor.exit_time
+        ).join(Visitor.assigned_slot).filter(
+            Visitor.status == "approved"
+        ).all()
+        with self._lock:
+            self._schedules = {}
+            self._bookings = {}
+            self._slot_types = {}
+            self._booked = {}
+            for visitor_id, slot_id, slot_type, entry_time, exit_time in rows:
+                start, end = booking_window(entry_time, exit_time)
+                self._add(visitor_id, slot_id, slot_type, start or datetime.min, end)
+            self._loaded = True
+
+    def _ensure_loaded(self, db: Session):
+        if not self._loaded:
+            self.load(db)
+
+    def _add(self, visitor_id: int, slot_id: int, slot_type: str, start: datetime, end: datetime):
+        self._schedules.setdefault(slot_id, SlotSchedule()).add(start, end, visitor_id)
+        self._bookings[visitor_id] = (slot_id, start, end)
+        self._slot_types[slot_id] = slot_type
+        self._booked.setdefault(slot_type, set()).add(slot_id)
+
+    def _remove(self, visitor_id: int):
+        booking = self._bookings.pop(visitor_id, None)
+        if booking is None:
+            return None
+        slot_id, start, end = booking
+        schedule = self._schedules.get(slot_id)
+        if schedule is not None:
+            schedule.remove(start, visitor_id)
+            if not schedule:
+                self._drop_slot(slot_id)
+        return booking
+
+    def _drop_slot(self, slot_id: int):
+        self._schedules.pop(slot_id, None)
+        slot_type = self._slot_types.pop(slot_id, None)
+        booked = self._booked.get(slot_type)
+        if booked is not None:
+            booked.discard(slot_id)
+
+    def is_free(self, slot_id: int, start: datetime, end: datetime):
+        with self._lock:
+            schedule = self._schedules.get(slot_id)
+            return schedule is None or schedule.is_free(start, end)
+
+    def booked_slot_ids(self, db: Session, start: datetime, end: datetime, slot_type: str = None):
+        """Slots (of slot_type, if given) that already have a booking overlapping [start, end)"""
+        self._ensure_loaded(db)
+        with self._lock:
+            slot_ids = self._booked.get(slot_type, ()) if slot_type else self._schedules
+            return {
+                slot_id for slot_id in slot_ids
+                if not self._schedules[slot_id].is_free(start, end)
+            }
+
+    def has_upcoming_bookings(self, db: Session, slot_id: int):
+        self._ensure_loaded(db)
+        with self._lock:
+            schedule = self._schedules.get(slot_id)
+            return schedule is not None and schedule.has_bookings_after(datetime.now())
+
+    def find_free_slot(self, db: Session, slot_type: str, start: datetime, end: datetime):
+        """
+        First slot of the given type that is free for the whole window. Damaged
+        slots and slots permanently assigned to a resident are never offered.
+        """
+        # The index rules out booked slots of this type that clash with the
+        # window; the first remaining slot comes from one indexed query
+        booked = self.booked_slot_ids(db, start, end, slot_type)
+        query = db.query(Slot).filter(
+            Slot.slot_type == slot_type,
+            Slot.status != "damaged",
+            ~Slot.residents.any()
+        )
+        if booked:
+            query = query.filter(Slot.id.notin_(booked))
+        return query.order_by(Slot.id).first()
+
+    def book(self, db: Session, visitor_id: int, slot_id: int, start: datetime, end: datetime):
+        """Record a booking now; it is withdrawn again if db rolls back"""
+        self._ensure_loaded(db)
+        slot_type = db.get(Slot, slot_id).slot_type
+        with self._lock:
+            schedule = self._schedules.get(slot_id)
+            if schedule is not None and not schedule.is_free(start, end):
+                return False
+            self._add(visitor_id, slot_id, slot_type, start, end)
+        on_rollback(db, lambda: self._withdraw(visitor_id))
+        return True
+
+    def _withdraw(self, visitor_id: int):
+        with self._lock:
+            self._remove(visitor_id)
+
+    def release(self, db: Session, visitor_id: int):
+        """Drop a visitor's booking once db commits (exit, cancel or reject)"""
+        on_commit(db, lambda: self._withdraw(visitor_id))
+
+    def on_transition(self, transition: slot_events.SlotTransition):
+        with self._lock:
+            if transition.slot_id not in self._schedules:
+                return
+            if transition.new_status is None:
+                self._drop_slot(transition.slot_id)
+                for visitor_id in [v for v, b in self._bookings.items() if b[0] == transition.slot_id]:
+                    del self._bookings[visitor_id]
+            elif transition.old_slot_type != transition.slot_type:
+                # The slot was edited to another type; its bookings move with it
+                self._booked[transition.old_slot_type].discard(transition.slot_id)
+                self._booked.setdefault(transition.slot_type, set()).add(transition.slot_id)
+                self._slot_types[transition.slot_id] = transition.slot_type
+
+reservation_index = ReservationIndex()
+slot_events.subscribe(reservation_index.on_transition)
@@ -0,0 +1,190 @@
+"""
+Bulk resident onboarding from a CSV file with the columns flat_number,
+full_name, email and optionally vehicle_type, phone_number, slot_number and
+password (headers "flat", "name", "vehicle type", "phone" and "slot" work too).
+
+Rows are read as a stream and handled in batches: each batch is checked
+against existing emails and slots with one query each, its passwords are
+hashed in parallel, and its residents are inserted (and their slots claimed)
+in one transaction. Residents without a password get a temporary one, which
+is returned in the report.
+"""
+import csv
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.crud import slot_crud, user_crud
+from app.schemas.user_schema import UserCreate
+from app.services.reservation_index import reservation_index
+from app.utils.auth_utils import generate_temporary_password, get_password_hash, get_temporary_password_hash
+from app.utils.enums import VehicleType
+
+COLUMN_ALIASES = {
+    "flat": "flat_number",
+    "name": "full_name",
+    "vehicle": "vehicle_type",
+    "phone": "phone_number",
+    "slot": "slot_number",
+}
+
+def _column(header: str):
+    key = header.strip().lower().replace(" ", "_")
+    return COLUMN_ALIASES.get(key, key)
+
+def read_rows(file):
+    """
+    Yield the rows of a binary CSV file object one at a time, with normalized
+    column names. If the file turns out to be unreadable part way through, the
+    error is yielded in place of the next row and reading stops.
+    """
+    try:
+        for row in csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline="")):
+            yield {_column(key): value.strip() for key, value in row.items() if key and value and value.strip()}
+    except (ValueError, csv.Error) as exc:
+        yield exc
+
+def _hash(password: str, temporary: bool):
+    return get_temporary_password_hash(password) if temporary else get_password_hash(password)
+
+def _validate(row: dict, number: int, errors: list):
+    email = row.get("email")
+    temporary = "password" not in row
+    try:
+        resident = UserCreate(
+            email=email,
+            password=row.get("password") or generate_temporary_password(),
+            full_name=row.get("full_name"),
+            role="resident",
+            flat_number=row.get("flat_number"),
+            phone_number=row.get("phone_number"),
+            vehicle_type=row.get("vehicle_type")
+        )
+    except ValidationError as exc:
+        error = exc.errors()[0]
+        detail = f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        errors.append({"row": number, "email": email, "detail": detail})
+        return None
+
+    if not resident.flat_number:
+        errors.append({"row": number, "email": email, "detail": "flat_number: Field required"})
+    elif resident.vehicle_type and resident.vehicle_type not in {vehicle_type.value for vehicle_type in VehicleType}:
+        errors.append({"row": number, "email": email, "detail": f"Unknown vehicle type {resident.vehicle_type}"})
+    else:
+        return {"row": number, "resident": resident, "temporary": temporary, "slot_number": row.get("slot_number")}
+    return None
+
+def _slot_problem(db: Session, slot, item: dict):
+    if slot is None:
+        return f"Slot {item['slot_number']} not found"
+    if slot.status != "available":
+        return f"Slot {slot.slot_number} is not available"
+    vehicle_type = item["resident"].vehicle_type
+    if vehicle_type and slot.slot_type != vehicle_type:
+        return f"Slot {slot.slot_number} is for {slot.slot_type}"
+    # A resident holds the slot permanently, so it must not have visitor bookings ahead
+    if reservation_index.has_upcoming_bookings(db, slot.id):
+        return f"Slot {slot.slot_number} has upcoming visitor bookings"
+    return None
+
+def _import_batch(db: Session, batch: list, executor: ThreadPoolExecutor, report: dict):
+    # Weed out rows that would fail before spending time on their hashes
+    existing = user_crud.get_existing_emails(db, [item["resident"].email for item in batch])
+    slot_numbers = [item["slot_number"] for item in batch if item["slot_number"]]
+    slots = slot_crud.get_slots_by_numbers(db, slot_numbers) if slot_numbers else {}
+
+    ready = []
+    for item in batch:
+        resident = item["resident"]
+        if resident.email in existing:
+            report["errors"].append({"row": item["row"], "email": resident.email, "detail": "Email already registered"})
+            continue
+        item["slot"] = slots.get(item["slot_number"]) if item["slot_number"] else None
+        problem = _slot_problem(db, item["slot"], item) if item["slot_number"] else None
+        if problem:
+            report["errors"].append({"row": item["row"], "email": resident.email, "detail": problem})
+            continue
+        ready.append(item)
+    if not ready:
+        return
+
+    hashes = executor.map(_hash, [item["resident"].password for item in ready], [item["temporary"] for item in ready])
+    residents = [
+        {
+            "email": item["resident"].email,
+            "hashed_password": hashed_password,
+            "full_name": item["resident"].full_name,
+            "flat_number": item["resident"].flat_number,
+            "phone_number": item["resident"].phone_number,
+            "vehicle_type": item["resident"].vehicle_type,
+            "assigned_slot_id": item["slot"].id if item["slot"] else None
+        }
+        for item, hashed_password in zip(ready, hashes)
+    ]
+    created, rejected = user_crud.create_residents_bulk(db, residents)
+
+    for item in ready:
+        email = item["resident"].email
+        if email in rejected:
+            report["errors"].append({"row": item["row"], "email": email, "detail": rejected[email]})
+            continue
+        report["created"].append({
+            "row": item["row"],
+            "email": email,
+            "user_id": created[email],
+            "slot_number": item["slot_number"],
+            "temporary_password": item["resident"].password if item["temporary"] else None
+        })
+
+def import_residents(db: Session, rows, batch_size: int = settings.RESIDENT_IMPORT_BATCH_SIZE):
+    """Create residents from an iterable of row dicts; returns a ResidentImportReport dict"""
+    started = time.perf_counter()
+    report = {"received": 0, "created": [], "errors": []}
+    seen_emails = set()
+    seen_slots = set()
+    batch = []
+
+    # bcrypt releases the GIL, so threads hash in parallel; a pool of its own
+    # keeps a large import from queueing logins behind it
+    with ThreadPoolExecutor(settings.RESIDENT_IMPORT_HASH_WORKERS, thread_name_prefix="import-hash") as executor:
+        for number, row in enumerate(rows, start=1):
+            if isinstance(row, Exception):
+                # Earlier batches are committed: report them (and their temporary passwords)
+                report["errors"].append({"row": number, "detail": f"Could not read the rest of the file: {row}"})
+                break
+            report["received"] += 1
+            item = _validate(row, number, report["errors"])
+            if item is None:
+                continue
+            email = item["resident"].email
+            if email in seen_emails:
+                report["errors"].append({"row": number, "email": email, "detail": "Duplicate email in file"})
+                continue
+            if item["slot_number"] in seen_slots:
+                report["errors"].append({
+                    "row": number, "email": email, "detail": f"Slot {item['slot_number']} is given to an earlier row"
+                })
+                continue
+            seen_emails.add(email)
+            if item["slot_number"]:
+                seen_slots.add(item["slot_number"])
+            batch.append(item)
+            if len(batch) >= batch_size:
+                _import_batch(db, batch, executor, report)
+                batch = []
+        if batch:
+            _import_batch(db, batch, executor, report)
+
+    report["errors"].sort(key=lambda error: error["row"])
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["received"] / elapsed, 1) if elapsed else 0.0
+    return report
+
+def import_residents_file(file, batch_size: int = settings.RESIDENT_IMPORT_BATCH_SIZE):
+    """Import from a binary CSV file object on a session of its own"""
+    with SessionLocal() as db:
+        return import_residents(db, read_rows(file), batch_size)
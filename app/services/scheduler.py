@@ -0,0 +1,25 @@
+import asyncio
+import logging
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+_tasks = []
+
+def start_periodic(name: str, interval_seconds: float, job):
+    """Run the blocking callable job every interval_seconds in the threadpool, until stop_all()"""
+    async def loop():
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await run_in_threadpool(job)
+            except Exception:
+                logger.exception("Periodic job %s failed", name)
+
+    _tasks.append(asyncio.create_task(loop(), name=name))
+
+async def stop_all():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
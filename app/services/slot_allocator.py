@@ -0,0 +1,106 @@
+import threading
+from collections import deque
+from sqlalchemy.orm import Session
+from app.models.slot import Slot
+from app.crud import slot_crud
+from app.services import slot_events
+from app.services.commit_hooks import on_rollback
+
+class SlotAllocator:
+    """
+    Per-vehicle-type free-lists of available slot ids.
+
+    Kept in sync with the slots table through committed slot transitions.
+    Every hand-out is confirmed with an atomic claim in the database, so a
+    stale entry (e.g. a slot taken by another worker process) is skipped rather
+    than double-booked. When a free-list runs dry the slot is claimed straight
+    from the table and the free-list is rebuilt.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._free = {}       # slot_type -> deque of slot ids
+        self._members = {}    # slot_id -> slot_type, for O(1) removal
+        self._loaded = False
+
+    def load(self, db: Session):
+        rows = db.query(Slot.id, Slot.slot_type).filter(Slot.status == "available").order_by(Slot.id).all()
+        with self._lock:
+            self._free = {}
+            self._members = {}
+            for slot_id, slot_type in rows:
+                self._add(slot_id, slot_type)
+            self._loaded = True
+
+    def _add(self, slot_id: int, slot_type: str):
+        if self._members.get(slot_id) == slot_type:
+            return
+        self._members[slot_id] = slot_type
+        self._free.setdefault(slot_type, deque()).append(slot_id)
+
+    def _pop(self, slot_type: str):
+        with self._lock:
+            free = self._free.get(slot_type)
+            while free:
+                slot_id = free.popleft()
+                # Entries removed by discard() are skipped lazily here
+                if self._members.get(slot_id) == slot_type:
+                    del self._members[slot_id]
+                    return slot_id
+            return None
+
+    def release(self, slot_id: int, slot_type: str):
+        with self._lock:
+            self._add(slot_id, slot_type)
+
+    def discard(self, slot_id: int):
+        with self._lock:
+            self._members.pop(slot_id, None)
+
+    def on_transition(self, transition: slot_events.SlotTransition):
+        if transition.new_status == "available":
+            if transition.old_slot_type != transition.slot_type:
+                self.discard(transition.slot_id)
+            self.release(transition.slot_id, transition.slot_type)
+        else:
+            self.discard(transition.slot_id)
+
+    def allocate(self, db: Session, slot_type: str, exclude_ids=()):
+        """
+        Claim an available slot of the given type, or return None if there is none.
+        Slots in exclude_ids (e.g. ones reserved later on) are passed over but stay free.
+        """
+        if not self._loaded:
+            self.load(db)
+        
+        skipped = []
+        try:
+            slot_id = self._pop(slot_type)
+            while slot_id is not None:
+                if slot_id in exclude_ids:
+                    skipped.append(slot_id)
+                else:
+                    slot = slot_crud.claim_slot(db, slot_id)
+                    if slot:
+                        self._release_on_rollback(db, slot)
+                        return slot
+                slot_id = self._pop(slot_type)
+        finally:
+            for slot_id in skipped:
+                self.release(slot_id, slot_type)
+        
+        # Free-list ran dry or only held stale ids: fall back to the table
+        slot = slot_crud.claim_available_slot(db, slot_type, exclude_ids)
+        self.load(db)
+        if slot:
+            self._release_on_rollback(db, slot)
+        return slot
+
+    def _release_on_rollback(self, db: Session, slot: Slot):
+        # The slot left the free-list before its claim committed; a rolled-back
+        # claim leaves the row available, so the id goes back on the list
+        slot_id, slot_type = slot.id, slot.slot_type
+        on_rollback(db, lambda: self.release(slot_id, slot_type))
+
+slot_allocator = SlotAllocator()
+slot_events.subscribe(slot_allocator.on_transition)
@@ -0,0 +1,27 @@
+from collections import namedtuple
+from sqlalchemy.orm import Session
+from app.services.commit_hooks import commit_tracker, on_commit
+
+# old_status is None for a newly created slot, new_status is None for a deleted one
+SlotTransition = namedtuple(
+    "SlotTransition", ["slot_id", "slot_type", "old_status", "new_status", "old_slot_type"]
+)
+
+# Commits with slot transitions are tracked under this key, for readers that count slots
+TRACKER_KEY = "slots"
+
+_subscribers = []
+
+def subscribe(callback):
+    """Register callback(transition) to be called for every committed slot transition"""
+    _subscribers.append(callback)
+
+def publish(transition: SlotTransition):
+    for callback in _subscribers:
+        callback(transition)
+
+def record_transition(db: Session, slot_id: int, slot_type: str, old_status: str, new_status: str, old_slot_type: str = None):
+    """Queue a slot transition to be published once db commits"""
+    transition = SlotTransition(slot_id, slot_type, old_status, new_status, old_slot_type or slot_type)
+    commit_tracker.track(db, TRACKER_KEY)
+    on_commit(db, lambda: publish(transition))
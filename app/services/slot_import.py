@@ -0,0 +1,158 @@
+"""
+Bulk slot provisioning from a CSV, JSON or JSON Lines file with the columns
+slot_number, slot_type and (optionally) status.
+
+The file is read as a stream and handled in chunks: each chunk is validated,
+checked against existing slot numbers with one query and inserted in one
+transaction. Existing slot numbers are skipped, so re-running an import is safe.
+
+    python -m app.services.slot_import slots.csv [--chunk-size 500]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.crud.slot_crud import create_slots_bulk
+from app.schemas.slot_schema import SlotCreate
+from app.utils.enums import SlotStatus, VehicleType
+
+FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+def detect_format(filename: str):
+    """File format from the file name's extension, or None if unsupported"""
+    return FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+def read_rows(file, format: str):
+    """
+    Yield the rows of a binary file object one at a time. If the file turns
+    out to be unreadable part way through (bad encoding, malformed CSV or
+    JSON), the error is yielded in place of the next row and reading stops.
+    """
+    try:
+        yield from _parse(file, format)
+    except (ValueError, csv.Error) as exc:
+        yield exc
+
+def _parse(file, format: str):
+    if format == "csv":
+        yield from csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    elif format == "jsonl":
+        for line in io.TextIOWrapper(file, encoding="utf-8"):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+    else:
+        # A JSON array has to be parsed whole; use JSON Lines for very large files
+        rows = json.load(file)
+        yield from rows if isinstance(rows, list) else [rows]
+
+def _text(value):
+    # JSON numbers, e.g. {"slot_number": 12}, are read as text
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+def _validate(row, number: int, errors: list):
+    if not isinstance(row, dict):
+        errors.append({"row": number, "detail": "Invalid JSON" if row is None else "Row is not a JSON object"})
+        return None
+
+    # Blank CSV cells fall back to the schema defaults
+    fields = {key.strip(): _text(value) for key, value in row.items() if key and value not in ("", None)}
+    slot_number = fields.get("slot_number")
+    if not isinstance(slot_number, str):
+        slot_number = None
+    try:
+        slot = SlotCreate(**fields)
+    except ValidationError as exc:
+        error = exc.errors()[0]
+        detail = f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        errors.append({"row": number, "slot_number": slot_number, "detail": detail})
+        return None
+
+    slot.slot_number = slot.slot_number.strip()
+    if not slot.slot_number:
+        errors.append({"row": number, "detail": "slot_number: Field required"})
+    elif slot.slot_type not in {vehicle_type.value for vehicle_type in VehicleType}:
+        errors.append({"row": number, "slot_number": slot.slot_number, "detail": f"Unknown slot type {slot.slot_type}"})
+    elif slot.status not in {slot_status.value for slot_status in SlotStatus}:
+        errors.append({"row": number, "slot_number": slot.slot_number, "detail": f"Unknown status {slot.status}"})
+    else:
+        return slot
+    return None
+
+def import_slots(db: Session, rows, chunk_size: int = settings.SLOT_IMPORT_CHUNK_SIZE):
+    """Create slots from an iterable of row dicts; returns a SlotImportReport dict"""
+    started = time.perf_counter()
+    report = {"received": 0, "created": 0, "skipped_existing": 0, "errors": []}
+    seen = set()
+    chunk = []
+
+    def flush():
+        created, skipped = create_slots_bulk(db, chunk)
+        report["created"] += created
+        report["skipped_existing"] += skipped
+        chunk.clear()
+
+    for number, row in enumerate(rows, start=1):
+        if isinstance(row, Exception):
+            # Chunks already written stay; the report says where reading stopped
+            report["errors"].append({"row": number, "detail": f"Could not read the rest of the file: {row}"})
+            break
+        report["received"] += 1
+        slot = _validate(row, number, report["errors"])
+        if slot is None:
+            continue
+        if slot.slot_number in seen:
+            report["errors"].append({
+                "row": number, "slot_number": slot.slot_number, "detail": "Duplicate slot number in file"
+            })
+            continue
+        seen.add(slot.slot_number)
+        chunk.append(slot)
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["received"] / elapsed, 1) if elapsed else 0.0
+    return report
+
+def import_slots_file(file, format: str, chunk_size: int = settings.SLOT_IMPORT_CHUNK_SIZE):
+    """Import from a binary file object on a session of its own"""
+    with SessionLocal() as db:
+        return import_slots(db, read_rows(file, format), chunk_size)
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-create parking slots from a CSV, JSON or JSON Lines file")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=settings.SLOT_IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    format = args.format or detect_format(args.path)
+    if format is None:
+        parser.error("cannot tell the file format from its extension, pass --format")
+    with open(args.path, "rb") as file:
+        report = import_slots_file(file, format, args.chunk_size)
+
+    for error in report["errors"]:
+        print(f"row {error['row']}: {error['detail']}")
+    print(
+        f"{report['received']} rows: {report['created']} created, {report['skipped_existing']} already existed, "
+        f"{len(report['errors'])} rejected in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.models.notification import Notification
+from app.services.commit_hooks import commit_tracker, on_commit
+
+class UnreadCounter:
+    """
+    Per-user unread notification counts, adjusted as notifications are
+    created and read. A user without an entry is counted with SELECT count(*)
+    (index-only on ix_notifications_user_read_created) and cached; the TTL
+    bounds staleness from writes made by other worker processes. A count that
+    raced with a commit changing the user's notifications is returned but not
+    cached: that commit's delta may already be in it.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self._ttl = ttl_seconds
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._counts = OrderedDict()   # user_id -> (expires_at, count)
+
+    def get(self, db: Session, user_id: int) -> int:
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._counts.move_to_end(user_id)
+                return entry[1]
+        mark = commit_tracker.mark(self._tracker_key(user_id))
+
+        count = db.query(func.count(Notification.id)).filter(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ).scalar()
+
+        with self._lock:
+            # Checked under the lock deltas are applied under, so a commit
+            # starting after the check lands its delta on the cached count
+            if not commit_tracker.raced(self._tracker_key(user_id), mark):
+                self._counts[user_id] = (time.monotonic() + self._ttl, count)
+                self._counts.move_to_end(user_id)
+                while len(self._counts) > self._max_size:
+                    self._counts.popitem(last=False)
+        return count
+
+    @staticmethod
+    def _tracker_key(user_id: int):
+        return ("unread_notifications", user_id)
+
+    def _apply(self, user_id: int, delta: int = None):
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is None:
+                return
+            if delta is None:
+                del self._counts[user_id]
+            else:
+                self._counts[user_id] = (entry[0], max(entry[1] + delta, 0))
+
+    def adjust(self, db: Session, user_id: int, delta: int):
+        """Apply delta to user_id's count once db commits"""
+        if delta:
+            commit_tracker.track(db, self._tracker_key(user_id))
+            on_commit(db, lambda: self._apply(user_id, delta))
+
+    def invalidate(self, db: Session, user_id: int):
+        """Recount user_id on next read, once db commits"""
+        commit_tracker.track(db, self._tracker_key(user_id))
+        on_commit(db, lambda: self._apply(user_id))
+
+unread_counter = UnreadCounter(settings.UNREAD_COUNT_TTL, settings.UNREAD_COUNT_CACHE_SIZE)
\ No newline at end of file
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.services.commit_hooks import on_commit
+
+# Read-only snapshot of the authenticated user; routes that modify the user load the ORM row
+CachedUser = namedtuple(
+    "CachedUser",
+    ["id", "email", "full_name", "role", "flat_number", "phone_number", "vehicle_type", "assigned_slot_id"]
+)
+
+class UserCache:
+    """
+    TTL + LRU cache of resolved users keyed by token subject (email), so
+    authenticated requests skip the per-request user lookup. Entries are
+    dropped explicitly when the user changes; the TTL bounds staleness for
+    changes made by other worker processes.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self._ttl = ttl_seconds
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # email -> (expires_at, CachedUser)
+
+    def get(self, email: str):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[email]
+                return None
+            self._entries.move_to_end(email)
+            return user
+
+    def put(self, user):
+        cached = CachedUser(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            flat_number=user.flat_number,
+            phone_number=user.phone_number,
+            vehicle_type=user.vehicle_type,
+            assigned_slot_id=user.assigned_slot_id
+        )
+        with self._lock:
+            self._entries[cached.email] = (time.monotonic() + self._ttl, cached)
+            self._entries.move_to_end(cached.email)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, email: str):
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def invalidate_on_commit(self, db: Session, email: str):
+        """Drop the entry now and again once db commits, so no reader re-caches the old row"""
+        self.invalidate(email)
+        on_commit(db, lambda: self.invalidate(email))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserCache(settings.USER_CACHE_TTL, settings.USER_CACHE_SIZE)
@@ -1,10 +1,29 @@
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
+from passlib.hash import bcrypt
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
 from app.config.settings import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min and max to the configured cost makes needs_update() flag hashes
+# made with any other cost, in either direction
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a small thread pool hashes in parallel while a
+# login storm can only ever occupy PASSWORD_HASH_WORKERS cores
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -12,6 +31,32 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Temporary passwords are random 96-bit tokens, so key stretching adds nothing;
+# verify_and_update_password() re-hashes them at BCRYPT_ROUNDS on first login
+_temporary_hasher = bcrypt.using(rounds=settings.TEMP_PASSWORD_BCRYPT_ROUNDS)
+
+def generate_temporary_password():
+    return secrets.token_urlsafe(12)
+
+def get_temporary_password_hash(password):
+    return _temporary_hasher.hash(password)
+
+def verify_and_update_password(plain_password, hashed_password):
+    """Returns (is_valid, new_hash); new_hash is set when the stored hash uses an outdated cost"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def _run_in_hash_pool(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_in_hash_pool(get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -0,0 +1,68 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+from fastapi import HTTPException, status
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+def encode_cursor(values):
+    """Encode the sort key of the last row into an opaque cursor string"""
+    payload = json.dumps([_encode_value(value) for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode()).decode()
+        values = json.loads(payload)
+        if not isinstance(values, list):
+            raise ValueError("cursor must encode a list")
+        return [_decode_value(value) for value in values]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def paginate(query, columns: list, cursor: str = None, limit: int = 50, descending: bool = False, key=None):
+    """
+    Keyset pagination: seek past the cursor on an indexed sort key instead of
+    using OFFSET. Returns (rows, next_cursor); next_cursor is None on the last page.
+    `key` maps a result row to its sort-key values (defaults to reading the
+    column names off the row).
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(columns):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        if len(columns) == 1:
+            left, right = columns[0], values[0]
+        else:
+            left, right = tuple_(*columns), tuple_(*values)
+        query = query.filter(left < right if descending else left > right)
+    
+    order_by = [column.desc() if descending else column for column in columns]
+    rows = query.order_by(*order_by).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if key is None:
+            values = [getattr(last, column.key) for column in columns]
+        else:
+            values = key(last)
+        next_cursor = encode_cursor(values)
+    
+    return rows, next_cursor
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import logging
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class InMemoryBackplane:
+    """
+    Routes websocket messages between the workers serving the app. Every
+    worker subscribes a handler per topic and publishes through the
+    backplane; each worker's handler then delivers to the sockets it holds.
+    This implementation only reaches the current process, for single-worker
+    deployments and tests.
+    """
+
+    is_local = True
+
+    def __init__(self):
+        self._handlers = {}
+
+    def subscribe(self, topic: str, handler):
+        """Register async handler(payload) for messages published on topic, next to any others"""
+        self._handlers.setdefault(topic, []).append(handler)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, topic: str, payload: dict):
+        await self._dispatch(topic, payload)
+
+    async def _dispatch(self, topic: str, payload: dict):
+        # A failing handler does not keep the message from the others
+        for handler in list(self._handlers.get(topic, [])):
+            try:
+                await handler(payload)
+            except Exception:
+                logger.exception("Backplane handler for %s failed", topic)
+
+class PostgresBackplane(InMemoryBackplane):
+    """Backplane over PostgreSQL LISTEN/NOTIFY, reaching every worker connected to the same database"""
+
+    is_local = False
+    CHANNEL = "parking_websocket"
+    # NOTIFY payloads are limited to 8000 bytes
+    MAX_PAYLOAD_BYTES = 7999
+    RECONNECT_DELAY = 1  # seconds
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        self._dsn = dsn
+        self._listen_conn = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._pending = set()
+        self._stopping = False
+
+    async def start(self):
+        import asyncpg
+        self._stopping = False
+        self._listen_conn = await asyncpg.connect(self._dsn)
+        await self._listen_conn.add_listener(self.CHANNEL, self._on_notify)
+        self._listen_conn.add_termination_listener(self._on_terminated)
+        self._publish_conn = await asyncpg.connect(self._dsn)
+
+    async def stop(self):
+        self._stopping = True
+        for conn in (self._listen_conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = self._publish_conn = None
+
+    def _on_notify(self, connection, pid, channel, data):
+        message = json.loads(data)
+        task = asyncio.create_task(self._dispatch(message["topic"], message["payload"]))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _on_terminated(self, connection):
+        if not self._stopping:
+            logger.warning("Backplane listener connection lost, reconnecting")
+            task = asyncio.create_task(self._reconnect())
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _reconnect(self):
+        await self.stop()
+        while True:
+            try:
+                await self.start()
+                return
+            except Exception:
+                logger.exception("Backplane reconnect failed")
+                await asyncio.sleep(self.RECONNECT_DELAY)
+
+    async def publish(self, topic: str, payload: dict):
+        data = json.dumps({"topic": topic, "payload": payload})
+        if len(data.encode()) > self.MAX_PAYLOAD_BYTES or self._publish_conn is None:
+            # Too large for NOTIFY or not connected: reach this worker's sockets at least
+            logger.warning("Delivering %s message to the local worker only", topic)
+            await self._dispatch(topic, payload)
+            return
+        async with self._publish_lock:
+            await self._publish_conn.execute("SELECT pg_notify($1, $2)", self.CHANNEL, data)
+
+def create_backplane():
+    if settings.WS_BACKPLANE == "postgres":
+        return PostgresBackplane(settings.DATABASE_URL)
+    return InMemoryBackplane()
+
+backplane = create_backplane()
\ No newline at end of file
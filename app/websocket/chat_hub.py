@@ -0,0 +1,281 @@
+import asyncio
+import atexit
+import json
+import logging
+import uuid
+from collections import deque
+from datetime import datetime
+from fastapi import WebSocket
+from starlette.concurrency import run_in_threadpool
+from app.config.database import SessionLocal
+from app.config.settings import settings
+from app.models.chat_message import ChatMessage
+from app.models.user import User
+from app.services.batch_outbox import BatchOutbox
+from app.websocket.backplane import backplane
+from app.websocket.manager import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+chat_outbox = BatchOutbox(
+    ChatMessage, settings.NOTIFICATION_BATCH_SIZE, settings.NOTIFICATION_FLUSH_INTERVAL, settings.CHAT_SPILL_PATH
+)
+atexit.register(chat_outbox.stop)
+
+class ChatHub(ConnectionManager):
+    """
+    Resident/admin chat. Every resident has one conversation room, keyed by
+    their user id, which every connected admin sees. Messages are routed by
+    authenticated user id through the backplane, kept in a bounded in-memory
+    history per room and written to chat_messages in batches.
+
+    Client messages are JSON: residents send {"text": ...}, admins send
+    {"room": <resident id>, "text": ...}; either may send
+    {"type": "history", "room": ...} to get the room's recent messages.
+
+    A room's history stays in memory only while someone on this worker can
+    see it: the resident, or any admin. Presence is tracked per worker, and a
+    worker that starts asks the others for their online residents.
+    """
+
+    def __init__(self, history_size: int, send_timeout: float, queue_size: int, slow_consumer_policy: str, max_connections_per_user: int):
+        super().__init__(send_timeout, queue_size, slow_consumer_policy, max_connections_per_user, topic="chat")
+        self._history_size = history_size
+        self._members = {}   # user_id -> (role, name) for users with a socket on this worker
+        self._admin_ids = set()
+        self._worker_id = uuid.uuid4().hex
+        self._online = {}    # resident_id -> (name, ids of workers holding their sockets), from presence events
+        self._history = {}   # room -> deque of message payloads, oldest first
+        self._history_loads = {}
+        self._known_rooms = set()
+        self._tasks = set()
+        backplane.subscribe("chat.room", self._deliver_room)
+        backplane.subscribe("chat.presence", self._deliver_presence)
+        backplane.subscribe("chat.presence_sync", self._deliver_presence_sync)
+
+    async def start(self):
+        await super().start()
+        # Residents already online on other workers announce themselves again
+        await backplane.publish("chat.presence_sync", {"worker": self._worker_id})
+
+    # ---------- connections ----------
+
+    async def join(self, websocket: WebSocket, user):
+        await self.connect(websocket, user.id)
+        is_new = user.id not in self._members
+        self._members[user.id] = (user.role, user.full_name)
+
+        if user.role == "admin":
+            self._admin_ids.add(user.id)
+            self._send_to(websocket, user.id, {
+                "type": "presence_list",
+                "residents": [{"id": resident_id, "name": name} for resident_id, (name, _) in self._online.items()]
+            })
+        else:
+            self._known_rooms.add(user.id)
+            if is_new:
+                await self._publish_presence(user.id, user.full_name, True)
+            self._send_to(websocket, user.id, {
+                "type": "history", "room": user.id, "messages": await self.history(user.id)
+            })
+        logger.info("%s %s joined chat", user.role, user.id)
+
+    def disconnect(self, websocket: WebSocket, user_id: int):
+        super().disconnect(websocket, user_id)
+        if user_id in self.active_connections:
+            return
+        member = self._members.pop(user_id, None)
+        if member is None:
+            return
+        role, name = member
+        logger.info("%s %s left chat", role, user_id)
+        if role == "admin":
+            self._admin_ids.discard(user_id)
+        else:
+            # disconnect may run outside a coroutine (heartbeat eviction, slow consumer)
+            self._spawn(self._publish_presence(user_id, name, False))
+        for room in [room for room in self._history_rooms() if not self._has_viewers(room)]:
+            self._history.pop(room, None)
+            self._history_loads.pop(room, None)
+
+    def _history_rooms(self):
+        return set(self._history) | set(self._history_loads)
+
+    def _has_viewers(self, room: int):
+        """Whether a socket on this worker sees the room: its resident's or any admin's"""
+        return room in self.active_connections or bool(self._admin_ids)
+
+    def _spawn(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _send_to(self, websocket: WebSocket, user_id: int, payload: dict):
+        for connection in self.active_connections.get(user_id, []):
+            if connection.websocket is websocket:
+                connection.enqueue(json.dumps(payload))
+
+    # ---------- incoming ----------
+
+    async def handle(self, user, websocket: WebSocket, data: str):
+        try:
+            message = json.loads(data)
+            if not isinstance(message, dict):
+                raise ValueError
+        except ValueError:
+            self._send_to(websocket, user.id, {"type": "error", "detail": "Messages must be JSON objects"})
+            return
+
+        room = user.id if user.role != "admin" else message.get("room")
+        if user.role == "admin" and not await self._is_room(room):
+            self._send_to(websocket, user.id, {"type": "error", "detail": f"Resident {room} not found"})
+            return
+
+        if message.get("type") == "history":
+            self._send_to(websocket, user.id, {"type": "history", "room": room, "messages": await self.history(room)})
+            return
+
+        text = str(message.get("text", "")).strip()
+        if text:
+            await self.post(user, room, text)
+
+    async def _is_room(self, room):
+        if not isinstance(room, int):
+            return False
+        if room in self._known_rooms or room in self._online:
+            return True
+        if await run_in_threadpool(self._is_resident, room):
+            self._known_rooms.add(room)
+            return True
+        return False
+
+    @staticmethod
+    def _is_resident(user_id: int):
+        with SessionLocal() as db:
+            return db.query(User.id).filter(User.id == user_id, User.role == "resident").first() is not None
+
+    async def post(self, user, room: int, text: str):
+        sent_at = datetime.now()
+        chat_outbox.add_row({
+            "room_id": room,
+            "sender_id": user.id,
+            "sender_name": user.full_name,
+            "sender_role": user.role,
+            "body": text,
+            "created_at": sent_at
+        })
+        await backplane.publish("chat.room", {
+            "room": room,
+            "sender_id": user.id,
+            "sender_name": user.full_name,
+            "sender_role": user.role,
+            "text": text,
+            "sent_at": sent_at.isoformat()
+        })
+
+    # ---------- delivery (runs on every worker) ----------
+
+    async def _deliver_room(self, payload: dict):
+        room = payload["room"]
+        if self._has_viewers(room):
+            self._history.setdefault(room, deque(maxlen=self._history_size)).append(payload)
+        message = json.dumps({"type": "message", **payload})
+        for user_id in [room, *self._admin_ids]:
+            for connection in list(self.active_connections.get(user_id, [])):
+                connection.enqueue(message)
+
+    async def _publish_presence(self, resident_id: int, name: str, online: bool):
+        await backplane.publish("chat.presence", {
+            "resident_id": resident_id, "name": name, "online": online, "worker": self._worker_id
+        })
+
+    async def _deliver_presence_sync(self, payload: dict):
+        if payload["worker"] == self._worker_id:
+            return
+        for user_id, (role, name) in list(self._members.items()):
+            if role != "admin":
+                await self._publish_presence(user_id, name, True)
+
+    async def _deliver_presence(self, payload: dict):
+        # Repeated announcements (e.g. answers to a presence sync) change nothing
+        resident_id = payload["resident_id"]
+        was_online = resident_id in self._online
+        _, workers = self._online.setdefault(resident_id, (payload["name"], set()))
+        if payload["online"]:
+            workers.add(payload["worker"])
+        else:
+            workers.discard(payload["worker"])
+        if not workers:
+            del self._online[resident_id]
+        if was_online == (resident_id in self._online):
+            return
+        message = json.dumps({"type": "presence", **payload})
+        for admin_id in list(self._admin_ids):
+            for connection in list(self.active_connections.get(admin_id, [])):
+                connection.enqueue(message)
+
+    # ---------- history ----------
+
+    async def history(self, room: int):
+        """The room's most recent messages, oldest first"""
+        load = self._history_loads.get(room)
+        if load is None:
+            load = self._history_loads[room] = asyncio.ensure_future(self._load_history(room))
+        try:
+            loaded = await load
+        except Exception:
+            self._history_loads.pop(room, None)
+            raise
+        if room not in self._history:
+            # Nobody on this worker sees the room (any more): nothing is kept
+            self._history_loads.pop(room, None)
+            return list(loaded)
+        return list(self._history[room])
+
+    async def _load_history(self, room: int):
+        # Messages delivered since this worker started are already in memory;
+        # fill up with what was stored before the oldest of them
+        ring = self._history.get(room, ())
+        before = datetime.fromisoformat(ring[0]["sent_at"]) if ring else None
+        older = await run_in_threadpool(self._stored_messages, room, before, self._history_size - len(ring))
+        merged = deque(older + list(self._history.get(room, ())), maxlen=self._history_size)
+        if self._has_viewers(room):
+            self._history[room] = merged
+        return merged
+
+    @staticmethod
+    def _stored_messages(room: int, before: datetime, limit: int):
+        if limit <= 0:
+            return []
+        with SessionLocal() as db:
+            query = db.query(ChatMessage).filter(ChatMessage.room_id == room)
+            if before is not None:
+                query = query.filter(ChatMessage.created_at < before)
+            rows = query.order_by(ChatMessage.created_at.desc()).limit(limit).all()
+        return [
+            {
+                "room": row.room_id,
+                "sender_id": row.sender_id,
+                "sender_name": row.sender_name,
+                "sender_role": row.sender_role,
+                "text": row.body,
+                "sent_at": row.created_at.isoformat()
+            }
+            for row in reversed(rows)
+        ]
+
+    def stats(self):
+        return {
+            **super().stats(),
+            "admins": len(self._admin_ids),
+            "residents_online": len(self._online),
+            "rooms_in_memory": len(self._history)
+        }
+
+chat_hub = ChatHub(
+    settings.CHAT_HISTORY_SIZE,
+    settings.WS_SEND_TIMEOUT,
+    settings.WS_QUEUE_SIZE,
+    settings.WS_SLOW_CONSUMER_POLICY,
+    settings.WS_MAX_CONNECTIONS_PER_USER
+)
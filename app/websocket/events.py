@@ -1,18 +1,28 @@
 from app.websocket.manager import manager
+from app.services.notification_outbox import notification_outbox
 import json
 
-async def send_notification_to_resident(user_id: int, title: str, message: str, type: str):
-    notification_data = {
+def _notification_message(title: str, message: str, type: str):
+    return json.dumps({
         "type": "notification",
         "title": title,
         "message": message,
         "notification_type": type
-    }
-    await manager.send_personal_message(json.dumps(notification_data), user_id)
+    })
+
+async def send_notification_to_resident(user_id: int, title: str, message: str, type: str):
+    await manager.send_personal_message(_notification_message(title, message, type), user_id)
+
+def publish_notifications(rows: list):
+    """Push notifications written by the outbox to their users' open sockets"""
+    for row in rows:
+        manager.publish(_notification_message(row["title"], row["message"], row["type"]), row["user_id"])
 
 async def send_visitor_approval_request(user_id: int, visitor_data: dict):
     approval_request = {
         "type": "visitor_approval_request",
         "visitor_data": visitor_data
     }
-    await manager.send_personal_message(json.dumps(approval_request), user_id)
\ No newline at end of file
+    await manager.send_personal_message(json.dumps(approval_request), user_id)
+
+notification_outbox.subscribe(publish_notifications)
\ No newline at end of file
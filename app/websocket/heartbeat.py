@@ -0,0 +1,68 @@
+import asyncio
+import json
+import logging
+import time
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PING_MESSAGE = json.dumps({"type": "ping"})
+PONG_MESSAGE = "pong"
+
+class HeartbeatMonitor:
+    """
+    Pings tracked sockets every interval seconds and evicts the ones that
+    have sent nothing (a pong or any other message) for timeout seconds,
+    so half-open connections do not pile up.
+    """
+
+    def __init__(self, interval: float, timeout: float):
+        self._interval = interval
+        self._timeout = timeout
+        self._peers = {}   # websocket -> [last_seen, send(message), evict()]
+        self._task = None
+        self.evicted = 0
+
+    def track(self, websocket, send, evict):
+        """send is an async callable taking a message, evict an async callable closing the socket"""
+        self._peers[websocket] = [time.monotonic(), send, evict]
+
+    def untrack(self, websocket):
+        self._peers.pop(websocket, None)
+
+    def touch(self, websocket):
+        peer = self._peers.get(websocket)
+        if peer is not None:
+            peer[0] = time.monotonic()
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run(), name="websocket-heartbeat")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self._beat()
+            except Exception:
+                logger.exception("Heartbeat round failed")
+
+    async def _beat(self):
+        deadline = time.monotonic() - self._timeout
+        pings, evictions = [], []
+        for websocket, (last_seen, send, evict) in list(self._peers.items()):
+            if last_seen < deadline:
+                self.untrack(websocket)
+                self.evicted += 1
+                evictions.append(evict())
+            else:
+                pings.append(send(PING_MESSAGE))
+        # A failed ping is left to the timeout to evict
+        await asyncio.gather(*evictions, *pings, return_exceptions=True)
+
+heartbeat = HeartbeatMonitor(settings.WS_HEARTBEAT_INTERVAL, settings.WS_IDLE_TIMEOUT)
\ No newline at end of file
@@ -1,38 +1,191 @@
-from fastapi import WebSocket
+from fastapi import WebSocket, status
 from typing import Dict, List
+from app.config.settings import settings
+from app.websocket.backplane import backplane
+from app.websocket.heartbeat import heartbeat
+import asyncio
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ClientConnection:
+    """
+    One open socket with a bounded outbound queue drained by its own writer
+    task, so a slow client only ever delays itself. When the queue is full
+    the "drop" policy discards the oldest queued message and the "close"
+    policy disconnects the client.
+    """
+
+    def __init__(self, manager, websocket: WebSocket, user_id: int, queue_size: int, send_timeout: float, policy: str):
+        self.websocket = websocket
+        self.user_id = user_id
+        self._manager = manager
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._send_timeout = send_timeout
+        self._policy = policy
+        self._cancelled = False
+        self._closing = None
+        self._writer = asyncio.create_task(self._write(), name=f"websocket-writer-{user_id}")
+        self.dropped = 0
+
+    def enqueue(self, message: str):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            if self._policy == "drop":
+                self._queue.get_nowait()
+                self._queue.put_nowait(message)
+                self.dropped += 1
+                self._manager.messages_dropped += 1
+            elif self._closing is None:
+                # Later overflows while the close is under way are ignored
+                logger.warning("Closing slow websocket client of user %s", self.user_id)
+                self._manager.slow_consumers_closed += 1
+                self._manager.disconnect(self.websocket, self.user_id)
+                self._closing = asyncio.create_task(self.close(status.WS_1013_TRY_AGAIN_LATER))
+
+    async def _write(self):
+        # The flag backs up cancel(): wait_for() can swallow a cancellation that
+        # arrives just as the send completes, which would leave this loop running
+        while not self._cancelled:
+            message = await self._queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(message), self._send_timeout)
+            except Exception:
+                # Broken or stalled socket; the endpoint's receive loop ends on its own
+                self._manager.disconnect(self.websocket, self.user_id)
+                return
+
+    async def ping(self, message: str):
+        self.enqueue(message)
+
+    async def close(self, code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), self._send_timeout)
+        except Exception:
+            pass
+
+    def cancel(self):
+        self._cancelled = True
+        self._writer.cancel()
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+    def __init__(self, send_timeout: float, queue_size: int, slow_consumer_policy: str, max_connections_per_user: int, topic: str = "notifications"):
+        self.active_connections: Dict[int, List[ClientConnection]] = {}
+        self._send_timeout = send_timeout
+        self._queue_size = queue_size
+        self._slow_consumer_policy = slow_consumer_policy
+        self._max_connections_per_user = max_connections_per_user
+        self.slow_consumers_closed = 0
+        self.messages_dropped = 0
+        self.closed_over_cap = 0
+        self._loop = None
+        self._outbound = None
+        self._fanout_task = None
+        # Messages go through the backplane so they reach sockets held by other workers
+        self._topic = topic
+        backplane.subscribe(f"{topic}.user", self._deliver_personal)
+        backplane.subscribe(f"{topic}.broadcast", self._deliver_broadcast)
+
+    async def start(self):
+        """Start the fan-out worker that delivers messages published from other threads"""
+        self._loop = asyncio.get_running_loop()
+        self._outbound = asyncio.Queue()
+        self._fanout_task = asyncio.create_task(self._fanout(), name=f"{self._topic}-fanout")
+
+    async def stop(self):
+        if self._fanout_task is not None:
+            self._fanout_task.cancel()
+            await asyncio.gather(self._fanout_task, return_exceptions=True)
+        self._loop = self._outbound = self._fanout_task = None
 
     async def connect(self, websocket: WebSocket, user_id: int):
         await websocket.accept()
-        if user_id not in self.active_connections:
-            self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        # Over the cap the oldest socket goes; it is the likeliest to be a forgotten tab or dead phone
+        connections = self.active_connections.get(user_id, [])
+        while len(connections) >= self._max_connections_per_user:
+            oldest = connections[0]
+            self.disconnect(oldest.websocket, user_id)
+            self.closed_over_cap += 1
+            await oldest.close(status.WS_1008_POLICY_VIOLATION)
+        
+        connection = ClientConnection(
+            self, websocket, user_id, self._queue_size, self._send_timeout, self._slow_consumer_policy
+        )
+        self.active_connections.setdefault(user_id, []).append(connection)
+        
+        async def evict():
+            self.disconnect(websocket, user_id)
+            await connection.close(status.WS_1001_GOING_AWAY)
+        heartbeat.track(websocket, connection.ping, evict)
 
     def disconnect(self, websocket: WebSocket, user_id: int):
-        if user_id in self.active_connections:
-            self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
+        connections = self.active_connections.get(user_id, [])
+        for connection in connections:
+            if connection.websocket is websocket:
+                heartbeat.untrack(websocket)
+                connection.cancel()
+                connections.remove(connection)
+                break
+        if not connections:
+            self.active_connections.pop(user_id, None)
+
+    def touch(self, websocket: WebSocket):
+        """Record that the client is alive (it sent a message or pong)"""
+        heartbeat.touch(websocket)
+
+    def stats(self):
+        return {
+            "users": len(self.active_connections),
+            "connections": sum(len(connections) for connections in self.active_connections.values()),
+            "slow_consumers_closed": self.slow_consumers_closed,
+            "messages_dropped": self.messages_dropped,
+            "closed_over_cap": self.closed_over_cap
+        }
 
     async def send_personal_message(self, message: str, user_id: int):
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_text(message)
-                except:
-                    # Remove broken connections
-                    self.active_connections[user_id].remove(connection)
+        await backplane.publish(f"{self._topic}.user", {"user_id": user_id, "message": message})
 
     async def broadcast(self, message: str):
-        for user_connections in self.active_connections.values():
-            for connection in user_connections:
-                try:
-                    await connection.send_text(message)
-                except:
-                    continue
-
-manager = ConnectionManager()
\ No newline at end of file
+        await backplane.publish(f"{self._topic}.broadcast", {"message": message})
+
+    async def _deliver_personal(self, payload: dict):
+        # Iterate over a copy: enqueue may disconnect a slow client
+        for connection in list(self.active_connections.get(payload["user_id"], [])):
+            connection.enqueue(payload["message"])
+
+    async def _deliver_broadcast(self, payload: dict):
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                connection.enqueue(payload["message"])
+
+    def publish(self, message: str, user_id: int):
+        """Queue message for user_id from any thread; dropped if the fan-out worker is not running"""
+        loop, outbound = self._loop, self._outbound
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(outbound.put_nowait, (user_id, message))
+        except RuntimeError:
+            # The event loop closed during shutdown
+            pass
+
+    async def _fanout(self):
+        while True:
+            batch = [await self._outbound.get()]
+            while not self._outbound.empty():
+                batch.append(self._outbound.get_nowait())
+            try:
+                await asyncio.gather(*(
+                    self.send_personal_message(message, user_id) for user_id, message in batch
+                ))
+            except Exception:
+                logger.exception("WebSocket fan-out failed")
+
+manager = ConnectionManager(
+    settings.WS_SEND_TIMEOUT,
+    settings.WS_QUEUE_SIZE,
+    settings.WS_SLOW_CONSUMER_POLICY,
+    settings.WS_MAX_CONNECTIONS_PER_USER
+)
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Latency of the gRPC gate API next to the closest REST calls.
+
+Starts the app with uvicorn on a throwaway SQLite database (gRPC served in the
+same process), seeds slots and checked-in visitors, and times sequential calls
+from keep-alive clients. REST has no single-slot GET, so the list call with
+limit=1 stands in for GetSlot.
+
+    python scripts/bench_grpc.py --calls 1000
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ.setdefault("GRPC_PORT", "50062")
+HTTP_PORT = os.getenv("BENCH_HTTP_PORT", "8062")
+
+import httpx
+from app.config.database import SessionLocal
+from app.grpc_services.client import ParkingClient
+from app.main import app  # creates the tables
+from app.models import Slot, User, Visitor
+from app.utils.auth_utils import create_access_token
+
+def _seed(visitors: int):
+    """Occupied slots with one checked-in visitor each"""
+    with SessionLocal() as db:
+        admin = User(email="admin@example.com", full_name="Admin", role="admin", hashed_password="x")
+        resident = User(email="resident@example.com", full_name="Resident", role="resident", hashed_password="x", flat_number="A-1")
+        db.add_all([admin, resident])
+        db.commit()
+        slots = [Slot(slot_number=f"S{i}", slot_type="four_wheeler", status="occupied") for i in range(visitors)]
+        db.add_all(slots)
+        db.commit()
+        db.add_all([
+            Visitor(
+                visitor_name="Guest", vehicle_number="KA01AB1234", vehicle_type="four_wheeler", status="approved",
+                entry_time=datetime.now() - timedelta(minutes=1), resident_id=resident.id, slot_id=slot.id
+            )
+            for slot in slots
+        ])
+        db.commit()
+    return create_access_token({"sub": "admin@example.com", "role": "admin"})
+
+def _time(name: str, call, count: int, warmup: int = 20):
+    for i in range(warmup):
+        call(i)
+    timings = []
+    for i in range(warmup, warmup + count):
+        started = time.perf_counter()
+        call(i)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    print(
+        f"{name:36s} p50 {timings[len(timings) // 2]:.2f} ms  "
+        f"p95 {timings[int(len(timings) * 0.95)]:.2f} ms  mean {statistics.mean(timings):.2f} ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000, help="calls per read benchmark")
+    parser.add_argument("--exits", type=int, default=500, help="check-outs per write benchmark")
+    args = parser.parse_args()
+
+    # Each check-out needs a visitor of its own; warm-up calls use some too
+    token = _seed(2 * (args.exits + 20))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", HTTP_PORT, "--log-level", "warning"], cwd=ROOT
+    )
+    try:
+        rest = httpx.Client(base_url=f"http://127.0.0.1:{HTTP_PORT}", headers={"Authorization": f"Bearer {token}"})
+        for _ in range(100):
+            try:
+                rest.get("/admin/slot/slots", params={"limit": 1})
+                break
+            except httpx.TransportError:
+                time.sleep(0.2)
+        grpc = ParkingClient(f"localhost:{os.environ['GRPC_PORT']}", token)
+        half = args.exits + 20
+
+        _time("REST GET /admin/slot/slots?limit=1", lambda i: rest.get("/admin/slot/slots", params={"limit": 1}).raise_for_status(), args.calls)
+        _time("gRPC GetSlot", lambda i: grpc.get_slot(1 + i % half), args.calls)
+        _time("REST PUT .../mark-exit", lambda i: rest.put(f"/admin/visitor/visitors/{i + 1}/mark-exit").raise_for_status(), args.exits)
+        _time("gRPC CheckOutVisitor", lambda i: grpc.check_out_visitor(half + i + 1), args.exits)
+        grpc.close()
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
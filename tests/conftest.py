@@ -0,0 +1,104 @@
+import os
+import tempfile
+
+# Settings are read at import time, so the test database and spill files are set up first
+_workdir = tempfile.mkdtemp(prefix="parking-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_workdir}/test.db"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["NOTIFICATION_SPILL_PATH"] = os.path.join(_workdir, "notification_outbox.jsonl")
+os.environ["CHAT_SPILL_PATH"] = os.path.join(_workdir, "chat_outbox.jsonl")
+
+from contextlib import contextmanager
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.config.database import Base, SessionLocal, async_engine, engine
+from app.main import app
+from app.models import Slot, User
+from app.services.availability_feed import availability_feed
+from app.services.dashboard_counters import dashboard_counters
+from app.services.reservation_index import reservation_index
+from app.services.slot_allocator import slot_allocator
+from app.services.unread_counter import unread_counter
+from app.services.user_cache import user_cache
+from app.utils.auth_utils import create_access_token, get_password_hash
+
+@pytest.fixture(autouse=True)
+def fresh_database():
+    """Empty tables and in-memory state rebuilt from them, for every test"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    unread_counter._counts.clear()
+    with SessionLocal() as db:
+        dashboard_counters.reconcile(db)
+        reservation_index.load(db)
+        slot_allocator.load(db)
+        availability_feed.reload(db)
+    yield
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+# Hashed once: every test user's password is "password"
+PASSWORD_HASH = get_password_hash("password")
+
+def make_user(db, email: str, role: str = "resident", **fields):
+    fields.setdefault("hashed_password", PASSWORD_HASH)
+    user = User(email=email, full_name=email.split("@")[0], role=role, **fields)
+    db.add(user)
+    db.commit()
+    return user
+
+def make_slots(db, count: int, slot_type: str = "four_wheeler", prefix: str = "S"):
+    slots = [Slot(slot_number=f"{prefix}{i}", slot_type=slot_type, status="available") for i in range(count)]
+    db.add_all(slots)
+    db.commit()
+    return slots
+
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token({'sub': user.email, 'role': user.role})}"}
+
+@pytest.fixture
+def admin(db):
+    return make_user(db, "admin@example.com", role="admin")
+
+@pytest.fixture
+def resident(db):
+    return make_user(db, "resident@example.com", flat_number="A-101", vehicle_type="four_wheeler")
+
+@pytest.fixture
+def admin_headers(admin):
+    return auth_headers(admin)
+
+@pytest.fixture
+def resident_headers(resident):
+    return auth_headers(resident)
+
+@pytest.fixture
+def count_queries():
+    """Context manager factory; the yielded list collects every SQL statement run inside it"""
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engines = [engine, async_engine.sync_engine]
+        for target in engines:
+            event.listen(target, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                event.remove(target, "before_cursor_execute", record)
+
+    return counting
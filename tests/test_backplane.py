@@ -0,0 +1,46 @@
+import asyncio
+from app.websocket.backplane import InMemoryBackplane, PostgresBackplane
+
+class FakeConnection:
+    def __init__(self):
+        self.notified = []
+
+    async def execute(self, query: str, *args):
+        self.notified.append(args)
+
+def _recorder(received: list, name: str):
+    async def handler(payload: dict):
+        received.append((name, payload))
+    return handler
+
+def test_every_subscriber_of_a_topic_receives_local_messages():
+    async def failing(payload: dict):
+        raise RuntimeError("handler bug")
+
+    received = []
+    backplane = InMemoryBackplane()
+    backplane.subscribe("chat", _recorder(received, "first"))
+    backplane.subscribe("chat", failing)
+    backplane.subscribe("chat", _recorder(received, "second"))
+    backplane.subscribe("other", _recorder(received, "other"))
+
+    asyncio.run(backplane.publish("chat", {"n": 1}))
+
+    assert received == [("first", {"n": 1}), ("second", {"n": 1})]
+
+def test_payloads_too_large_for_notify_are_delivered_locally_only():
+    received = []
+    backplane = PostgresBackplane("postgresql://unused")
+    backplane.subscribe("chat", _recorder(received, "local"))
+    connection = backplane._publish_conn = FakeConnection()
+
+    async def scenario():
+        await backplane.publish("chat", {"text": "small"})
+        await backplane.publish("chat", {"text": "x" * 8000})
+
+    asyncio.run(scenario())
+
+    # The small message goes out over NOTIFY and comes back through the listener
+    [(channel, data)] = connection.notified
+    assert channel == PostgresBackplane.CHANNEL and '"small"' in data
+    assert received == [("local", {"text": "x" * 8000})]
@@ -0,0 +1,123 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.config.database import SessionLocal
+from app.models import Notification
+from app.services import batch_outbox
+from app.services.batch_outbox import BatchOutbox
+from tests.conftest import make_user
+
+def _row(user_id: int, **fields):
+    return {"user_id": user_id, "title": "t", "message": "m", "type": "request_update",
+            "is_read": False, "created_at": datetime.now(), **fields}
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def _unreachable():
+    raise OperationalError("INSERT", {}, Exception("could not connect to server"))
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = BatchOutbox(Notification, 10, 0.02, str(tmp_path / "outbox.jsonl"), spill_retry_interval=0.1)
+    yield outbox
+    outbox.stop()
+
+def test_a_rejected_row_is_dropped_on_its_own(db, resident, outbox):
+    make_user(db, "other@example.com")
+    existing = Notification(user_id=resident.id, title="t", message="m", type="x")
+    db.add(existing)
+    db.commit()
+    written = []
+    outbox.subscribe(written.extend)
+
+    for _ in range(3):
+        outbox.add_row(_row(resident.id))
+    outbox.add_row(_row(resident.id, id=existing.id))   # duplicate key
+    outbox.add_row(_row(resident.id))
+    outbox.flush()
+
+    assert db.query(Notification).count() == 5
+    assert len(written) == 4
+    assert not os.path.exists(outbox._spill_path)
+
+def test_spilled_rows_are_retried_once_the_database_is_back(db, resident, outbox, monkeypatch):
+    monkeypatch.setattr(batch_outbox, "SessionLocal", _unreachable)
+    for _ in range(25):
+        outbox.add_row(_row(resident.id))
+    _wait_for(lambda: os.path.exists(outbox._spill_path) and sum(1 for _ in open(outbox._spill_path)) == 25)
+    assert db.query(Notification).count() == 0
+
+    # The background thread keeps retrying the spill file without a restart
+    monkeypatch.setattr(batch_outbox, "SessionLocal", SessionLocal)
+    _wait_for(lambda: db.query(Notification).count() == 25)
+    _wait_for(lambda: not os.path.exists(outbox._spill_path))
+
+def test_replay_keeps_rows_while_the_database_is_still_away(resident, outbox, monkeypatch):
+    monkeypatch.setattr(batch_outbox, "SessionLocal", _unreachable)
+    outbox._spill([_row(resident.id) for _ in range(25)])
+
+    outbox.replay_spill()
+
+    assert sum(1 for _ in open(outbox._spill_path)) == 25
+    assert not os.path.exists(outbox._spill_path + ".replay")
+
+def test_workers_sharing_a_spill_path_lose_no_rows(tmp_path, db, resident, monkeypatch):
+    # Two outboxes stand in for two uvicorn workers: they share nothing but the spill path
+    path = str(tmp_path / "outbox.jsonl")
+    first = BatchOutbox(Notification, 7, 0.02, path, spill_retry_interval=3600)
+    second = BatchOutbox(Notification, 7, 0.02, path, spill_retry_interval=3600)
+    spilled = 0
+
+    def spill_rows(outbox):
+        nonlocal spilled
+        for _ in range(300):
+            outbox._spill([_row(resident.id) for _ in range(2)])
+            spilled += 2
+
+    def replay_repeatedly(outbox):
+        for _ in range(100):
+            outbox.replay_spill()
+
+    with ThreadPoolExecutor(4) as executor:
+        futures = [
+            executor.submit(spill_rows, first), executor.submit(spill_rows, second),
+            executor.submit(replay_repeatedly, first), executor.submit(replay_repeatedly, second)
+        ]
+        for future in futures:
+            future.result()
+    first.replay_spill()
+
+    assert db.query(Notification).count() == spilled == 1200
+    assert os.listdir(tmp_path) == []
+
+def test_replay_left_behind_by_a_dead_worker_is_picked_up(tmp_path, db, resident, outbox):
+    dead = BatchOutbox(Notification, 10, 0.02, str(tmp_path / "outbox.jsonl"))
+    dead._spill([_row(resident.id) for _ in range(4)])
+    os.replace(outbox._spill_path, outbox._spill_path + ".replay-12345-dead")
+
+    outbox.replay_spill()
+
+    assert db.query(Notification).count() == 4
+    assert os.listdir(tmp_path) == []
+
+def test_a_replay_in_progress_is_left_alone(tmp_path, db, resident, outbox):
+    outbox._spill([_row(resident.id) for _ in range(4)])
+    other = BatchOutbox(Notification, 10, 0.02, outbox._spill_path)
+    claimed = other._claim_spill_files()
+    path, _ = next(claimed)   # the other worker is part way through replaying
+
+    outbox.replay_spill()
+    assert db.query(Notification).count() == 0
+
+    # The other worker dies: its lock goes with it and the file is an orphan
+    claimed.close()
+    assert os.path.exists(path)
+    outbox.replay_spill()
+    assert db.query(Notification).count() == 4
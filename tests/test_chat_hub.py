@@ -0,0 +1,150 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+import pytest
+from app.models import ChatMessage
+from app.websocket import chat_hub as chat_hub_module
+from app.websocket import manager as manager_module
+from app.websocket.backplane import InMemoryBackplane
+from app.websocket.chat_hub import ChatHub, chat_outbox
+from tests.conftest import make_user
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.received.append(json.loads(message))
+
+    async def close(self, code: int):
+        pass
+
+    def of_type(self, message_type: str):
+        return [message for message in self.received if message["type"] == message_type]
+
+@pytest.fixture(autouse=True)
+def shared_backplane(monkeypatch):
+    """Hubs created in a test are workers sharing one backplane of their own"""
+    backplane = InMemoryBackplane()
+    monkeypatch.setattr(chat_hub_module, "backplane", backplane)
+    monkeypatch.setattr(manager_module, "backplane", backplane)
+    yield backplane
+    chat_outbox.stop()
+
+def _worker():
+    return ChatHub(history_size=5, send_timeout=5, queue_size=100, slow_consumer_policy="close", max_connections_per_user=5)
+
+async def _settle():
+    # Let the writer tasks drain their queues
+    await asyncio.sleep(0.01)
+
+def _texts(websocket):
+    return [message["text"] for message in websocket.of_type("message")]
+
+def test_messages_reach_their_room_and_every_admin_only(db):
+    asha, ben = make_user(db, "asha@example.com"), make_user(db, "ben@example.com")
+    admin = make_user(db, "admin@example.com", role="admin")
+
+    async def scenario():
+        first, second = _worker(), _worker()
+        asha_socket, ben_socket, admin_socket = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await first.join(asha_socket, asha)
+        await first.join(ben_socket, ben)
+        await second.join(admin_socket, admin)
+
+        await first.handle(asha, asha_socket, json.dumps({"text": "hello"}))
+        await second.handle(admin, admin_socket, json.dumps({"room": ben.id, "text": "hi ben"}))
+        await second.handle(admin, admin_socket, json.dumps({"room": 12345, "text": "nobody"}))
+        await _settle()
+        return asha_socket, ben_socket, admin_socket
+
+    asha_socket, ben_socket, admin_socket = asyncio.run(scenario())
+    assert _texts(asha_socket) == ["hello"]
+    assert _texts(ben_socket) == ["hi ben"]
+    assert _texts(admin_socket) == ["hello", "hi ben"]
+    assert admin_socket.of_type("error")[0]["detail"] == "Resident 12345 not found"
+
+def test_history_merges_stored_and_live_messages_across_workers(db):
+    asha = make_user(db, "asha@example.com")
+    admin = make_user(db, "admin@example.com", role="admin")
+    earlier = datetime.now() - timedelta(hours=1)
+    db.add_all([
+        ChatMessage(room_id=asha.id, sender_id=asha.id, sender_name="asha", sender_role="resident",
+                    body=f"stored {i}", created_at=earlier + timedelta(minutes=i))
+        for i in range(3)
+    ])
+    db.commit()
+
+    async def scenario():
+        first, second = _worker(), _worker()
+        asha_socket, admin_socket = FakeWebSocket(), FakeWebSocket()
+        await first.join(asha_socket, asha)
+        await second.join(admin_socket, admin)
+        # Posted on one worker, kept in the other worker's history too
+        await first.handle(asha, asha_socket, json.dumps({"text": "live 1"}))
+        await second.handle(admin, admin_socket, json.dumps({"room": asha.id, "text": "live 2"}))
+        await second.handle(admin, admin_socket, json.dumps({"type": "history", "room": asha.id}))
+        await _settle()
+        return asha_socket, admin_socket, await first.history(asha.id)
+
+    asha_socket, admin_socket, first_history = asyncio.run(scenario())
+    assert [m["text"] for m in asha_socket.of_type("history")[0]["messages"]] == ["stored 0", "stored 1", "stored 2"]
+    [history] = admin_socket.of_type("history")
+    expected = ["stored 0", "stored 1", "stored 2", "live 1", "live 2"]
+    assert [m["text"] for m in history["messages"]] == expected
+    assert [m["text"] for m in first_history] == expected
+
+def test_presence_follows_joins_leaves_and_reaches_a_worker_started_later(db):
+    asha = make_user(db, "asha@example.com")
+    admin = make_user(db, "admin@example.com", role="admin")
+
+    async def scenario():
+        first = _worker()
+        asha_socket = FakeWebSocket()
+        await first.join(asha_socket, asha)
+
+        # Started after Asha came online: it learns about her from the others
+        second = _worker()
+        await second.start()
+        admin_socket = FakeWebSocket()
+        await second.join(admin_socket, admin)
+        await _settle()
+        listed = admin_socket.of_type("presence_list")[0]["residents"]
+
+        first.disconnect(asha_socket, asha.id)
+        await _settle()
+        await second.stop()
+        return listed, admin_socket, second
+
+    listed, admin_socket, second = asyncio.run(scenario())
+    assert listed == [{"id": asha.id, "name": "asha"}]
+    assert [(m["resident_id"], m["online"]) for m in admin_socket.of_type("presence")] == [(asha.id, False)]
+    assert second.stats()["residents_online"] == 0
+
+def test_rooms_nobody_sees_are_evicted(db):
+    asha, ben = make_user(db, "asha@example.com"), make_user(db, "ben@example.com")
+    admin = make_user(db, "admin@example.com", role="admin")
+
+    async def scenario():
+        worker = _worker()
+        asha_socket, ben_socket, admin_socket = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await worker.join(asha_socket, asha)
+        await worker.join(ben_socket, ben)
+        await worker.join(admin_socket, admin)
+        rooms = {}
+
+        worker.disconnect(asha_socket, asha.id)
+        # The admin still sees every room
+        rooms["admin online"] = set(worker._history)
+        worker.disconnect(admin_socket, admin.id)
+        rooms["admin gone"] = set(worker._history)
+        worker.disconnect(ben_socket, ben.id)
+        rooms["everyone gone"] = set(worker._history) | set(worker._history_loads)
+        await _settle()
+        return rooms
+
+    rooms = asyncio.run(scenario())
+    assert rooms == {"admin online": {asha.id, ben.id}, "admin gone": {ben.id}, "everyone gone": set()}
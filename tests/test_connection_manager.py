@@ -0,0 +1,217 @@
+import asyncio
+import itertools
+import time
+from fastapi import status
+from app.websocket import manager as manager_module
+from app.websocket.heartbeat import PING_MESSAGE, HeartbeatMonitor
+from app.websocket.manager import ConnectionManager
+
+_topics = itertools.count()
+
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False, broken: bool = False):
+        self.received = []
+        self.closed_with = None
+        self.close_calls = 0
+        self.stalled = stalled
+        self.broken = broken
+        self.got_message = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        if self.broken:
+            raise RuntimeError("connection reset")
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.received.append((message, time.perf_counter()))
+        self.got_message.set()
+
+    async def close(self, code: int):
+        self.closed_with = code
+        self.close_calls += 1
+
+def _manager(policy: str = "close", queue_size: int = 5, max_connections_per_user: int = 5):
+    return ConnectionManager(
+        send_timeout=5, queue_size=queue_size, slow_consumer_policy=policy,
+        max_connections_per_user=max_connections_per_user, topic=f"test-{next(_topics)}"
+    )
+
+def _connected(manager):
+    return sum(len(connections) for connections in manager.active_connections.values())
+
+def test_broadcast_is_not_held_up_by_a_stalled_client():
+    async def scenario():
+        manager = _manager()
+        stalled = FakeWebSocket(stalled=True)
+        await manager.connect(stalled, 0)
+        clients = [FakeWebSocket() for _ in range(2000)]
+        for user_id, websocket in enumerate(clients, start=1):
+            await manager.connect(websocket, user_id)
+
+        sent = time.perf_counter()
+        await asyncio.wait_for(manager.broadcast("hello"), 1)
+        await asyncio.wait_for(asyncio.gather(*(websocket.got_message.wait() for websocket in clients)), 5)
+
+        latencies = sorted(websocket.received[0][1] - sent for websocket in clients)
+        for connections in list(manager.active_connections.values()):
+            for connection in connections:
+                connection.cancel()
+        return latencies
+
+    latencies = asyncio.run(scenario())
+    p99 = latencies[int(len(latencies) * 0.99)]
+    assert p99 < 1, f"p50={latencies[len(latencies) // 2]:.4f}s p99={p99:.4f}s"
+
+def test_drop_policy_keeps_the_newest_messages():
+    async def scenario():
+        manager = _manager(policy="drop", queue_size=3)
+        slow = FakeWebSocket(stalled=True)
+        await manager.connect(slow, 1)
+        await asyncio.sleep(0)
+        for i in range(10):
+            await manager.send_personal_message(f"m{i}", 1)
+        connection = manager.active_connections[1][0]
+        queued = list(connection._queue._queue)
+        connection.cancel()
+        return manager, connection, queued
+
+    manager, connection, queued = asyncio.run(scenario())
+    # All ten were queued before the writer ran again, so m0..m6 were dropped
+    assert queued == ["m7", "m8", "m9"]
+    assert connection.dropped == manager.messages_dropped == 7
+    assert _connected(manager) == 1
+
+def test_close_policy_disconnects_a_slow_client_only():
+    async def scenario():
+        manager = _manager(policy="close", queue_size=2)
+        slow, fast = FakeWebSocket(stalled=True), FakeWebSocket()
+        await manager.connect(slow, 1)
+        await manager.connect(fast, 1)
+        await asyncio.sleep(0)
+        slow_connection = manager.active_connections[1][0]
+        for i in range(5):
+            await manager.broadcast(f"m{i}")
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.01)
+        # The evicted client's writer has finished rather than waiting on its queue forever
+        assert slow_connection._writer.done()
+        for connection in manager.active_connections.get(1, []):
+            connection.cancel()
+        return manager, slow, fast
+
+    manager, slow, fast = asyncio.run(scenario())
+    assert slow.closed_with == status.WS_1013_TRY_AGAIN_LATER
+    assert manager.slow_consumers_closed == 1
+    assert [message for message, _ in fast.received] == [f"m{i}" for i in range(5)]
+    assert _connected(manager) == 1
+
+def test_repeated_overflows_close_a_slow_client_once():
+    async def scenario():
+        manager = _manager(policy="close", queue_size=1)
+        slow = FakeWebSocket(stalled=True)
+        await manager.connect(slow, 1)
+        await asyncio.sleep(0)
+        connection = manager.active_connections[1][0]
+        for i in range(5):
+            connection.enqueue(f"m{i}")
+        closing = connection._closing
+        await closing
+        return manager, slow
+
+    manager, slow = asyncio.run(scenario())
+    assert slow.close_calls == 1
+    assert manager.slow_consumers_closed == 1
+    assert _connected(manager) == 0
+
+def test_a_broken_socket_does_not_stop_delivery_to_the_users_other_sockets():
+    async def scenario():
+        manager = _manager()
+        broken, first, second = FakeWebSocket(broken=True), FakeWebSocket(), FakeWebSocket()
+        for websocket in (first, broken, second):
+            await manager.connect(websocket, 1)
+        await manager.send_personal_message("one", 1)
+        await asyncio.sleep(0.01)
+        await manager.send_personal_message("two", 1)
+        await asyncio.sleep(0.01)
+        for connection in manager.active_connections.get(1, []):
+            connection.cancel()
+        return manager, first, second
+
+    manager, first, second = asyncio.run(scenario())
+    assert [message for message, _ in first.received] == ["one", "two"]
+    assert [message for message, _ in second.received] == ["one", "two"]
+    assert _connected(manager) == 2
+
+def test_a_client_that_stops_answering_is_evicted_after_the_timeout(monkeypatch):
+    heartbeat = HeartbeatMonitor(interval=0.02, timeout=0.1)
+    monkeypatch.setattr(manager_module, "heartbeat", heartbeat)
+
+    async def scenario():
+        manager = _manager()
+        silent, answering = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(silent, 1)
+        await manager.connect(answering, 2)
+        await heartbeat.start()
+        for _ in range(15):
+            await asyncio.sleep(0.02)
+            manager.touch(answering)
+        await heartbeat.stop()
+        remaining = {user_id: len(connections) for user_id, connections in manager.active_connections.items()}
+        for connection in manager.active_connections.get(2, []):
+            connection.cancel()
+        return silent, answering, remaining
+
+    silent, answering, remaining = asyncio.run(scenario())
+    assert silent.closed_with == status.WS_1001_GOING_AWAY
+    assert answering.closed_with is None
+    assert PING_MESSAGE in [message for message, _ in answering.received]
+    assert remaining == {2: 1}
+    assert heartbeat.evicted == 1
+
+def test_the_connection_cap_closes_the_users_oldest_socket():
+    async def scenario():
+        manager = _manager(max_connections_per_user=2)
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for websocket in sockets:
+            await manager.connect(websocket, 1)
+        kept = [connection.websocket for connection in manager.active_connections[1]]
+        for connection in manager.active_connections[1]:
+            connection.cancel()
+        return manager, sockets, kept
+
+    manager, sockets, kept = asyncio.run(scenario())
+    assert sockets[0].closed_with == status.WS_1008_POLICY_VIOLATION
+    assert kept == sockets[1:]
+    assert manager.closed_over_cap == 1
+
+def test_connection_gauges_follow_connects_and_disconnects():
+    async def scenario():
+        manager = _manager(max_connections_per_user=2)
+        sockets = [FakeWebSocket() for _ in range(4)]
+        for user_id, websocket in zip([1, 1, 1, 2], sockets):
+            await manager.connect(websocket, user_id)
+        connected = manager.stats()
+        manager.disconnect(sockets[3], 2)
+        after_disconnect = manager.stats()
+        for connections in list(manager.active_connections.values()):
+            for connection in connections:
+                connection.cancel()
+        return connected, after_disconnect
+
+    connected, after_disconnect = asyncio.run(scenario())
+    assert connected == {
+        "users": 2, "connections": 3, "slow_consumers_closed": 0, "messages_dropped": 0, "closed_over_cap": 1
+    }
+    assert after_disconnect["users"] == 1 and after_disconnect["connections"] == 2
+
+def test_websocket_stats_endpoint_reports_the_gauges(client, admin_headers, resident_headers):
+    response = client.get("/admin/websocket-stats", headers=admin_headers)
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["notifications"]["connections"] == 0
+    assert stats["chat"]["residents_online"] == 0
+    assert "heartbeat_evictions" in stats
+    assert client.get("/admin/websocket-stats", headers=resident_headers).status_code == 403
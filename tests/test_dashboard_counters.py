@@ -0,0 +1,78 @@
+from app.config.database import SessionLocal
+from app.models import User
+from app.services.dashboard_counters import DashboardCounters, dashboard_counters
+from tests.conftest import PASSWORD_HASH
+
+SUMMARY = "/admin/dashboard/summary"
+
+def _add_resident(counters: DashboardCounters, email: str):
+    """Register a resident the way the write paths do, on a session of its own"""
+    with SessionLocal() as other:
+        other.add(User(email=email, full_name=email, role="resident", hashed_password=PASSWORD_HASH))
+        counters.resident_added(other)
+        other.commit()
+
+def _commit_after_resident_counts(counters: DashboardCounters, monkeypatch, commit):
+    """Run commit() right after each resident count the reconcile reads"""
+    reconcile_field = counters._reconcile_field
+
+    def racing(field, count):
+        def count_then_commit():
+            value = count()
+            if field == "_residents":
+                commit()
+            return value
+        reconcile_field(field, count_then_commit)
+    monkeypatch.setattr(counters, "_reconcile_field", racing)
+
+def test_summary_follows_committed_writes(client, db, admin_headers):
+    for number, slot_status in [("S1", "available"), ("S2", "available"), ("S3", "damaged")]:
+        client.post("/admin/slot/slots", json={
+            "slot_number": number, "slot_type": "four_wheeler", "status": slot_status
+        }, headers=admin_headers)
+    slot_id = client.get("/admin/slot/slots", headers=admin_headers).json()["items"][0]["id"]
+    client.put(f"/admin/slot/slots/{slot_id}/mark-damaged", headers=admin_headers)
+    client.post("/admin/residents", json={
+        "email": "asha@example.com", "password": "secret", "full_name": "Asha", "role": "resident"
+    }, headers=admin_headers)
+    # Rejected: counters only move for committed changes
+    client.post("/admin/residents", json={
+        "email": "asha@example.com", "password": "secret", "full_name": "Asha", "role": "resident"
+    }, headers=admin_headers)
+
+    summary = client.get(SUMMARY, headers=admin_headers).json()
+
+    assert summary == {
+        "total_slots": 3, "available_slots": 1, "occupied_slots": 0, "damaged_slots": 2,
+        "total_residents": 1, "pending_visitors": 0, "pending_requests": 0
+    }
+    dashboard_counters.reconcile(db)
+    assert dashboard_counters.summary() == summary
+
+def test_reconcile_rereads_a_count_that_raced_with_a_commit(db, monkeypatch):
+    counters = DashboardCounters()
+    counters.reconcile(db)
+    added = []
+
+    def commit_once():
+        if not added:
+            added.append(True)
+            _add_resident(counters, "late@example.com")
+
+    _commit_after_resident_counts(counters, monkeypatch, commit_once)
+    counters.reconcile(db)
+
+    # The first read missed the resident whose delta arrived meanwhile; it was read again
+    assert counters.summary()["total_residents"] == 1
+
+def test_reconcile_keeps_counts_that_race_on_every_read(db, monkeypatch):
+    counters = DashboardCounters()
+    counters.reconcile(db)
+    emails = iter(f"r{i}@example.com" for i in range(10))
+
+    _commit_after_resident_counts(counters, monkeypatch, lambda: _add_resident(counters, next(emails)))
+    counters.reconcile(db)
+
+    # Every read raced, so the delta-maintained count was kept rather than overwritten
+    assert counters.summary()["total_residents"] == DashboardCounters.RECONCILE_ATTEMPTS
+    assert db.query(User).count() == DashboardCounters.RECONCILE_ATTEMPTS
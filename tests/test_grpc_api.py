@@ -0,0 +1,130 @@
+import asyncio
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import grpc
+import pytest
+from app.config.database import SessionLocal
+from app.crud import slot_crud
+from app.grpc_services.client import ParkingClient
+from app.grpc_services.server import start_server
+from app.models import Slot, Visitor
+from app.schemas.slot_schema import SlotCreate
+from app.services.availability_feed import availability_feed
+from tests.conftest import auth_headers, make_slots, make_user
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def grpc_target():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    port = _free_port()
+    server = asyncio.run_coroutine_threadsafe(start_server(port), loop).result(5)
+    yield f"127.0.0.1:{port}"
+    asyncio.run_coroutine_threadsafe(server.stop(None), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+def _token(user):
+    return auth_headers(user)["Authorization"].split()[1]
+
+@pytest.fixture
+def gate(grpc_target, admin):
+    with ParkingClient(grpc_target, _token(admin)) as client:
+        yield client
+
+def _visitor(db, resident, slot, start: datetime, status: str = "approved"):
+    visitor = Visitor(
+        visitor_name="Guest", vehicle_number="KA01", vehicle_type=slot.slot_type, status=status,
+        entry_time=start, exit_time=start + timedelta(hours=2), resident_id=resident.id, slot_id=slot.id
+    )
+    db.add(visitor)
+    db.commit()
+    return visitor
+
+def _status(db, slot):
+    db.expire_all()
+    return db.get(Slot, slot.id).status
+
+def test_get_slot(gate, db):
+    slot = make_slots(db, 1)[0]
+
+    by_number = gate.get_slot(slot_number=slot.slot_number)
+    assert (by_number.id, by_number.slot_type, by_number.status) == (slot.id, "four_wheeler", "available")
+    assert gate.get_slot(slot_id=slot.id).slot_number == slot.slot_number
+    with pytest.raises(grpc.RpcError) as error:
+        gate.get_slot(slot_number="missing")
+    assert error.value.code() == grpc.StatusCode.NOT_FOUND
+
+def test_calls_need_an_admin_token(grpc_target, resident):
+    with ParkingClient(grpc_target) as anonymous, pytest.raises(grpc.RpcError) as error:
+        anonymous.get_slot(slot_id=1)
+    assert error.value.code() == grpc.StatusCode.UNAUTHENTICATED
+
+    with ParkingClient(grpc_target, _token(resident)) as client, pytest.raises(grpc.RpcError) as error:
+        client.get_slot(slot_id=1)
+    assert error.value.code() == grpc.StatusCode.PERMISSION_DENIED
+
+def test_check_in_and_out(gate, db, resident):
+    slot = make_slots(db, 1)[0]
+    visitor = _visitor(db, resident, slot, datetime.now() - timedelta(minutes=1))
+
+    checked_in = gate.check_in_visitor(visitor.id)
+    assert (checked_in.id, checked_in.status, checked_in.slot_id) == (visitor.id, "approved", slot.id)
+    assert _status(db, slot) == "occupied"
+    # Checking in again (e.g. a retried call) is accepted
+    assert gate.check_in_visitor(visitor.id).status == "approved"
+
+    checked_out = gate.check_out_visitor(visitor.id)
+    assert checked_out.status == "completed" and checked_out.HasField("exit_time")
+    assert _status(db, slot) == "available"
+
+def test_check_in_is_refused_for_future_or_unapproved_bookings(gate, db, resident):
+    slot = make_slots(db, 1)[0]
+    future = _visitor(db, resident, slot, datetime.now() + timedelta(hours=1))
+    pending = _visitor(db, resident, slot, datetime.now() - timedelta(hours=5), status="pending")
+
+    for visitor in (future, pending):
+        with pytest.raises(grpc.RpcError) as error:
+            gate.check_in_visitor(visitor.id)
+        assert error.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+    with pytest.raises(grpc.RpcError) as error:
+        gate.check_in_visitor(9999)
+    assert error.value.code() == grpc.StatusCode.NOT_FOUND
+
+def test_check_in_is_refused_when_someone_else_holds_the_slot(gate, db, resident):
+    held_by_visitor, held_by_resident = make_slots(db, 2)
+    for slot in (held_by_visitor, held_by_resident):
+        slot.status = "occupied"
+    # An earlier visitor who has not checked out yet
+    _visitor(db, resident, held_by_visitor, datetime.now() - timedelta(hours=3))
+    make_user(db, "holder@example.com", assigned_slot_id=held_by_resident.id)
+    late = _visitor(db, resident, held_by_visitor, datetime.now() - timedelta(minutes=1))
+    mistaken = _visitor(db, resident, held_by_resident, datetime.now() - timedelta(minutes=1))
+
+    for visitor in (late, mistaken):
+        with pytest.raises(grpc.RpcError) as error:
+            gate.check_in_visitor(visitor.id)
+        assert error.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+        assert error.value.details() == "Booked slot is occupied by someone else"
+
+def test_watch_availability_streams_counts_then_changes(gate, db):
+    make_slots(db, 2)
+    make_slots(db, 1, slot_type="two_wheeler", prefix="T")
+    availability_feed.reload(db)
+
+    updates = gate.watch_availability(["four_wheeler"])
+    with ThreadPoolExecutor(1) as executor:
+        assert executor.submit(next, updates).result(5) == ("four_wheeler", 2, 0)
+        with SessionLocal() as session:
+            slot_crud.create_slot(session, SlotCreate(slot_number="S9", slot_type="four_wheeler"))
+            slot_crud.create_slot(session, SlotCreate(slot_number="T9", slot_type="two_wheeler"))
+        assert executor.submit(next, updates).result(5) == ("four_wheeler", 3, 1)
+    updates.close()
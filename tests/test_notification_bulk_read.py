@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.models import Notification
+from tests.conftest import make_user
+
+UNREAD_COUNT = "/resident/notification/notifications/unread-count"
+
+def _seed(db, user_id: int, count: int, type: str = "request_update", created_at: datetime = None):
+    db.execute(insert(Notification), [
+        {
+            "user_id": user_id, "title": "t", "message": "m", "type": type, "is_read": False,
+            "created_at": created_at or datetime.now()
+        }
+        for _ in range(count)
+    ])
+    db.commit()
+
+def _unread(client, headers):
+    return client.get(UNREAD_COUNT, headers=headers).json()["unread_count"]
+
+def _writes(statements):
+    return [s for s in statements if not s.lstrip().upper().startswith("SELECT")]
+
+def test_read_all_is_one_update_without_loading_rows(client, db, resident, resident_headers, count_queries):
+    other = make_user(db, "other@example.com")
+    _seed(db, resident.id, 5000)
+    _seed(db, other.id, 10)
+    assert _unread(client, resident_headers) == 5000
+
+    with count_queries() as statements:
+        response = client.put("/resident/notification/notifications/read-all", headers=resident_headers)
+
+    assert response.json() == {"message": "Marked 5000 notifications as read"}
+    assert not any("FROM notifications" in s for s in statements if s.lstrip().upper().startswith("SELECT"))
+    assert [s.split()[0].upper() for s in _writes(statements)] == ["UPDATE"]
+    assert _unread(client, resident_headers) == 0
+    assert db.query(Notification).filter(Notification.user_id == other.id, Notification.is_read == False).count() == 10
+
+def test_bulk_read_filters_combine(client, db, resident, resident_headers):
+    old = datetime.now() - timedelta(days=10)
+    _seed(db, resident.id, 3, type="visitor_approval", created_at=old)
+    _seed(db, resident.id, 4, type="request_update", created_at=old)
+    _seed(db, resident.id, 5, type="request_update")
+
+    response = client.put(
+        "/resident/notification/notifications/read",
+        json={"type": "request_update", "before": (datetime.now() - timedelta(days=1)).isoformat()},
+        headers=resident_headers
+    )
+    assert response.json() == {"message": "Marked 4 notifications as read"}
+    assert _unread(client, resident_headers) == 8
+
+    ids = [n.id for n in db.query(Notification).filter(Notification.type == "visitor_approval")]
+    response = client.put("/resident/notification/notifications/read", json={"ids": ids[:2]}, headers=resident_headers)
+    assert response.json() == {"message": "Marked 2 notifications as read"}
+    assert _unread(client, resident_headers) == 6
+
+def test_bulk_read_ignores_other_users_ids(client, db, resident_headers):
+    other = make_user(db, "other@example.com")
+    _seed(db, other.id, 2)
+    ids = [n.id for n in db.query(Notification)]
+
+    response = client.put("/resident/notification/notifications/read", json={"ids": ids}, headers=resident_headers)
+
+    assert response.json() == {"message": "Marked 0 notifications as read"}
+    assert db.query(Notification).filter(Notification.is_read == False).count() == 2
@@ -0,0 +1,62 @@
+import base64
+import json
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from app.models import Notification
+from app.utils.pagination import encode_cursor
+from tests.conftest import make_slots
+
+NOTIFICATIONS = "/resident/notification/notifications"
+SLOTS = "/admin/slot/slots"
+
+def _walk(client, url: str, headers, limit: int):
+    """Every page of a listing, following next_cursor"""
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(url, params=params, headers=headers).json()
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+def test_notifications_page_newest_first_across_equal_timestamps(client, db, resident, resident_headers):
+    now = datetime.now().replace(microsecond=0)
+    # Pairs share a timestamp, so the id has to break the tie at page boundaries
+    created = [now - timedelta(minutes=minute) for minute in (3, 3, 2, 2, 1, 1, 0)]
+    db.execute(insert(Notification), [
+        {"user_id": resident.id, "title": f"n{i}", "message": "m", "type": "info", "created_at": created_at}
+        for i, created_at in enumerate(created)
+    ])
+    db.commit()
+    expected = [
+        row.id for row in db.query(Notification).order_by(Notification.created_at.desc(), Notification.id.desc())
+    ]
+
+    pages = _walk(client, NOTIFICATIONS, resident_headers, limit=2)
+
+    assert [len(page["items"]) for page in pages] == [2, 2, 2, 1]
+    assert [item["id"] for page in pages for item in page["items"]] == expected
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"{\"id\": 1}").decode(),
+    encode_cursor([1, 2, 3]),
+])
+def test_malformed_cursors_are_rejected(client, admin_headers, resident_headers, cursor):
+    for url, headers in [(NOTIFICATIONS, resident_headers), (SLOTS, admin_headers), ("/admin/users", admin_headers)]:
+        response = client.get(url, params={"cursor": cursor}, headers=headers)
+        assert response.status_code == 400, url
+        assert response.json()["detail"] == "Invalid cursor"
+
+def test_next_cursor_is_null_on_the_last_page(client, db, admin_headers):
+    make_slots(db, 3)
+
+    exact = client.get(SLOTS, params={"limit": 3}, headers=admin_headers).json()
+    pages = _walk(client, SLOTS, admin_headers, limit=2)
+
+    assert len(exact["items"]) == 3 and exact["next_cursor"] is None
+    assert [len(page["items"]) for page in pages] == [2, 1]
+    assert pages[0]["next_cursor"] is not None and pages[-1]["next_cursor"] is None
+    assert [item["slot_number"] for page in pages for item in page["items"]] == ["S0", "S1", "S2"]
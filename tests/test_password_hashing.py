@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.hash import bcrypt
+from app.config.settings import settings
+from app.models import User
+from app.routes import admin_routes, auth_routes
+from app.utils import auth_utils
+from tests.conftest import make_user
+
+def _rounds(hashed_password: str):
+    return int(hashed_password.split("$")[2])
+
+def test_login_rehashes_a_password_with_an_outdated_cost(client, db):
+    user = make_user(db, "old@example.com", hashed_password=bcrypt.using(rounds=settings.BCRYPT_ROUNDS + 1).hash("secret"))
+
+    response = client.post("/auth/login", json={"email": "old@example.com", "password": "secret"})
+
+    assert response.status_code == 200
+    db.refresh(user)
+    assert _rounds(user.hashed_password) == settings.BCRYPT_ROUNDS
+    assert auth_utils.verify_password("secret", user.hashed_password)
+
+def test_failed_login_keeps_the_stored_hash(client, db):
+    outdated = bcrypt.using(rounds=settings.BCRYPT_ROUNDS + 1).hash("secret")
+    user = make_user(db, "old@example.com", hashed_password=outdated)
+
+    response = client.post("/auth/login", json={"email": "old@example.com", "password": "wrong"})
+
+    assert response.status_code == 401
+    db.refresh(user)
+    assert user.hashed_password == outdated
+
+def test_current_hashes_are_left_alone(client, db):
+    user = make_user(db, "current@example.com")
+    stored = user.hashed_password
+
+    assert client.post("/auth/login", json={"email": "current@example.com", "password": "password"}).status_code == 200
+    db.refresh(user)
+    assert user.hashed_password == stored
+
+def test_async_hashing_runs_on_the_bounded_pool(monkeypatch):
+    running = 0
+    peak = 0
+    threads = set()
+    lock = threading.Lock()
+
+    def slow_hash(password):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+            threads.add(threading.current_thread().name)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+        return f"hashed:{password}"
+
+    monkeypatch.setattr(auth_utils, "get_password_hash", slow_hash)
+
+    async def hash_many():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        ticker = asyncio.create_task(tick())
+        hashes = await asyncio.gather(*(auth_utils.get_password_hash_async(str(i)) for i in range(20)))
+        ticker.cancel()
+        return hashes, ticks
+
+    hashes, ticks = asyncio.run(hash_many())
+
+    assert hashes == [f"hashed:{i}" for i in range(20)]
+    assert peak <= settings.PASSWORD_HASH_WORKERS
+    assert all(name.startswith("password-hash") for name in threads)
+    # The event loop kept serving other work while the hashes ran
+    assert ticks > 5
+
+def test_concurrent_logins_all_succeed(client, db):
+    for i in range(8):
+        make_user(db, f"user{i}@example.com")
+
+    def login(i):
+        return client.post("/auth/login", json={"email": f"user{i}@example.com", "password": "password"}).status_code
+
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(login, range(8))) == [200] * 8
+
+def test_duplicate_registrations_are_rejected_before_hashing(client, db, admin_headers, monkeypatch):
+    make_user(db, "taken@example.com")
+    hashed = []
+
+    async def counting_hash(password: str):
+        hashed.append(password)
+        return auth_utils.get_password_hash(password)
+    monkeypatch.setattr(auth_routes, "get_password_hash_async", counting_hash)
+    monkeypatch.setattr(admin_routes, "get_password_hash_async", counting_hash)
+    user = {"email": "taken@example.com", "password": "secret", "full_name": "Taken", "role": "resident"}
+
+    register = client.post("/auth/register", json=user)
+    create = client.post("/admin/residents", json=user, headers=admin_headers)
+    fresh = client.post("/auth/register", json={**user, "email": "new@example.com"})
+
+    assert register.status_code == create.status_code == 400
+    assert register.json()["detail"] == create.json()["detail"] == "Email already registered"
+    assert fresh.status_code == 200
+    assert hashed == ["secret"]
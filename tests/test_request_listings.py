@@ -0,0 +1,39 @@
+from app.models import Request
+from tests.conftest import make_slots, make_user
+
+def _add_requests(db, count: int):
+    slots = make_slots(db, count, prefix=f"R{count}-")
+    for i, slot in enumerate(slots):
+        resident = make_user(db, f"r{count}-{i}@example.com", flat_number=f"B-{i}")
+        db.add(Request(
+            request_type="damage_report" if i % 2 else "slot_change",
+            description="test",
+            status="pending",
+            resident_id=resident.id,
+            slot_id=slot.id
+        ))
+    db.commit()
+
+def _statements_for(client, headers, count_queries, path):
+    client.get(path, headers=headers)  # one-off setup is not counted
+    with count_queries() as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    # Authentication may look the user up by email; only the listing's own queries count
+    return response.json(), [
+        s for s in statements if s.lstrip().upper().startswith("SELECT") and "users.email =" not in s
+    ]
+
+def test_admin_request_listings_use_one_query_regardless_of_size(client, db, admin_headers, count_queries):
+    _add_requests(db, 3)
+    small = {
+        path: len(_statements_for(client, admin_headers, count_queries, path)[1])
+        for path in ("/admin/requests/", "/admin/requests/pending", "/admin/requests/damage-reports")
+    }
+
+    _add_requests(db, 30)
+    for path, expected in small.items():
+        body, selects = _statements_for(client, admin_headers, count_queries, path)
+        assert len(selects) == expected == 1, (path, selects)
+        rows = body["items"] if isinstance(body, dict) else body
+        assert rows and all(row["resident_name"] and row["slot_number"] for row in rows)
@@ -0,0 +1,70 @@
+from app.crud import user_crud
+from app.models import Slot, User
+from tests.conftest import make_slots, make_user
+
+IMPORT = "/admin/residents/import"
+
+def _upload(client, headers, content: bytes, **params):
+    return client.post(IMPORT, files={"file": ("residents.csv", content)}, params=params, headers=headers)
+
+def test_import_creates_residents_with_usable_temporary_passwords(client, db, admin_headers):
+    make_slots(db, 1)
+    content = (
+        "Flat,Name,Email,Vehicle Type,Slot\n"
+        "A-1,Asha,asha@example.com,four_wheeler,S0\n"
+        "A-2,Ben,ben@example.com,,\n"
+        "A-3,Asha again,asha@example.com,,\n"
+        "A-4,Cy,cy@example.com,four_wheeler,S0\n"
+    ).encode()
+
+    response = _upload(client, admin_headers, content)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert [row["email"] for row in report["created"]] == ["asha@example.com", "ben@example.com"]
+    assert [error["row"] for error in report["errors"]] == [3, 4]
+    assert db.query(Slot).one().status == "occupied"
+    login = client.post("/auth/login", json={
+        "email": "ben@example.com", "password": report["created"][1]["temporary_password"]
+    })
+    assert login.status_code == 200
+
+def test_unreadable_file_still_returns_committed_residents(client, db, admin_headers):
+    rows = "".join(f"B-{i},Resident {i},r{i}@example.com\n" for i in range(1000))
+    content = b"flat_number,full_name,email\n" + rows.encode() + b"\xff\xfe,x,y\n"
+
+    response = _upload(client, admin_headers, content, batch_size=100)
+
+    assert response.status_code == 200
+    report = response.json()
+    created = db.query(User).filter(User.role == "resident").count()
+    assert created > 0 and len(report["created"]) == created == report["received"]
+    assert all(row["temporary_password"] for row in report["created"])
+    [error] = report["errors"]
+    assert error["row"] == report["received"] + 1
+    assert error["detail"].startswith("Could not read the rest of the file")
+
+def test_emails_registered_during_the_import_are_reported_not_raised(client, db, admin_headers, monkeypatch):
+    make_slots(db, 1)
+    make_user(db, "asha@example.com")
+    make_user(db, "cy@example.com")
+    # Every existence check misses: the emails are registered right after each one
+    monkeypatch.setattr(user_crud, "get_existing_emails", lambda db, emails: set())
+    content = (
+        "Flat,Name,Email,Vehicle Type,Slot\n"
+        "A-1,Asha,asha@example.com,four_wheeler,S0\n"
+        "A-2,Ben,ben@example.com,,\n"
+        "A-3,Cy,cy@example.com,,\n"
+    ).encode()
+
+    response = _upload(client, admin_headers, content)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert [row["email"] for row in report["created"]] == ["ben@example.com"]
+    assert [(error["row"], error["detail"]) for error in report["errors"]] == [
+        (1, "Email already registered"), (3, "Email already registered")
+    ]
+    # The slot claimed for the raced row is handed back
+    assert db.query(Slot).one().status == "available"
+    assert db.query(User).filter(User.role == "resident").count() == 3
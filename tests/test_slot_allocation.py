@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.config.database import SessionLocal
+from app.crud import slot_crud
+from app.models import Slot
+from app.services.slot_allocator import slot_allocator
+from tests.conftest import make_slots
+
+CLAIMERS = 16
+
+# A throwaway PostgreSQL database for the FOR UPDATE SKIP LOCKED claim path;
+# its slots table is dropped and recreated
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+def _allocate(_):
+    with SessionLocal() as db:
+        slot = slot_allocator.allocate(db, "four_wheeler")
+        db.commit()
+        return slot.id if slot else None
+
+def _claim_from_table(_):
+    with SessionLocal() as db:
+        slot = slot_crud.claim_available_slot(db, "four_wheeler")
+        db.commit()
+        return slot.id if slot else None
+
+def _run_concurrently(claim):
+    with ThreadPoolExecutor(CLAIMERS) as executor:
+        return list(executor.map(claim, range(CLAIMERS)))
+
+def test_concurrent_allocations_get_distinct_slots(db):
+    make_slots(db, CLAIMERS // 2)
+    claimed = [slot_id for slot_id in _run_concurrently(_allocate) if slot_id]
+
+    assert len(claimed) == len(set(claimed)) == CLAIMERS // 2
+    assert db.query(Slot).filter(Slot.status == "available").count() == 0
+
+def test_concurrent_table_claims_get_distinct_slots(db):
+    make_slots(db, CLAIMERS // 2)
+    claimed = [slot_id for slot_id in _run_concurrently(_claim_from_table) if slot_id]
+
+    assert len(claimed) == len(set(claimed)) == CLAIMERS // 2
+
+def test_claim_rereads_a_slot_already_in_the_session(db):
+    slot = make_slots(db, 1)[0]
+    assert slot.status == "available"
+    with SessionLocal() as other:
+        slot_crud.claim_slot(other, slot.id)
+        other.commit()
+
+    # The session still holds the slot as available; the claim must see it is taken
+    assert slot_crud.claim_slot(db, slot.id) is None
+
+def test_rolled_back_allocation_returns_the_slot_to_the_free_list(db):
+    make_slots(db, 1)
+    with SessionLocal() as session:
+        slot_id = slot_allocator.allocate(session, "four_wheeler").id
+        assert slot_id not in slot_allocator._members
+        session.rollback()
+
+    # Back on the free-list without waiting for a reload from the table
+    assert slot_allocator._members[slot_id] == "four_wheeler"
+
+@pytest.fixture
+def postgres_sessions():
+    pg_engine = create_engine(POSTGRES_URL)
+    Slot.__table__.drop(pg_engine, checkfirst=True)
+    Slot.__table__.create(pg_engine)
+    try:
+        yield sessionmaker(bind=pg_engine)
+    finally:
+        Slot.__table__.drop(pg_engine)
+        pg_engine.dispose()
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+def test_postgres_claims_skip_rows_locked_by_other_claimers(postgres_sessions):
+    with postgres_sessions() as setup:
+        make_slots(setup, 2)
+
+    with postgres_sessions() as first, postgres_sessions() as second:
+        # Fail fast instead of hanging if the second claim queues on the first one's lock
+        second.execute(text("SET lock_timeout = '2s'"))
+        held = slot_crud.claim_available_slot(first, "four_wheeler")
+        skipped_to = slot_crud.claim_available_slot(second, "four_wheeler")
+        assert held.id != skipped_to.id
+        assert slot_crud.claim_available_slot(second, "four_wheeler") is None
+        first.commit()
+        second.commit()
+
+    with postgres_sessions() as check:
+        assert {slot.status for slot in check.query(Slot)} == {"occupied"}
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+def test_postgres_claim_rereads_a_slot_already_in_the_session(postgres_sessions):
+    with postgres_sessions() as setup:
+        slot_id = make_slots(setup, 1)[0].id
+
+    with postgres_sessions() as session, postgres_sessions() as other:
+        assert session.get(Slot, slot_id).status == "available"
+        slot_crud.claim_slot(other, slot_id)
+        other.commit()
+
+        assert slot_crud.claim_slot(session, slot_id) is None
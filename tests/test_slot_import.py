@@ -0,0 +1,48 @@
+import json
+from app.models import Slot
+
+IMPORT = "/admin/slot/slots/import"
+
+def _upload(client, headers, name: str, content: bytes, **params):
+    return client.post(IMPORT, files={"file": (name, content)}, params=params, headers=headers)
+
+def test_json_numbers_are_read_as_text(client, db, admin_headers):
+    lines = [
+        {"slot_number": 12, "slot_type": "four_wheeler"},
+        {"slot_number": {"nested": 1}, "slot_type": "four_wheeler"},
+        {"slot_number": "A1", "slot_type": "bicycle"},
+    ]
+    content = "\n".join(json.dumps(line) for line in lines).encode()
+
+    response = _upload(client, admin_headers, "slots.jsonl", content)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["received"], report["created"]) == (3, 1)
+    assert [(error["row"], error["slot_number"]) for error in report["errors"]] == [(2, None), (3, "A1")]
+    assert db.query(Slot.slot_number).scalar() == "12"
+
+def test_unreadable_file_reports_what_was_already_created(client, db, admin_headers):
+    rows = "".join(f"S{i},four_wheeler\n" for i in range(2000))
+    content = b"slot_number,slot_type\n" + rows.encode() + b"\xff\xfe,four_wheeler\n"
+
+    response = _upload(client, admin_headers, "slots.csv", content, chunk_size=100)
+
+    assert response.status_code == 200
+    report = response.json()
+    created = db.query(Slot).count()
+    assert created > 0 and report["created"] == created == report["received"]
+    [error] = report["errors"]
+    assert error["row"] == report["received"] + 1
+    assert error["detail"].startswith("Could not read the rest of the file")
+
+def test_malformed_json_array_creates_nothing(client, db, admin_headers):
+    response = _upload(client, admin_headers, "slots.json", b'[{"slot_number": "A1", "slot_type": "four_wheeler"},')
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 0
+    assert response.json()["errors"][0]["row"] == 1
+    assert db.query(Slot).count() == 0
+
+def test_unsupported_extension_is_rejected(client, admin_headers):
+    assert _upload(client, admin_headers, "slots.txt", b"").status_code == 400
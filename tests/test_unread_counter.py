@@ -0,0 +1,41 @@
+from app.config.database import SessionLocal
+from app.crud import notification_crud
+from app.models import Notification
+from app.services.commit_hooks import on_commit
+from app.services.unread_counter import unread_counter
+
+def _counts_from_db(statements):
+    return [s for s in statements if "count(notifications.id)" in s]
+
+def test_count_follows_committed_changes_without_recounting(db, resident, count_queries):
+    notifications = [notification_crud.create_notification(db, resident.id, "t", "m", "info") for _ in range(3)]
+    assert unread_counter.get(db, resident.id) == 3
+
+    with count_queries() as statements:
+        notification_crud.mark_notification_as_read(db, notifications[0].id, resident.id)
+        after_one = unread_counter.get(db, resident.id)
+        notification_crud.create_notification(db, resident.id, "t", "m", "info")
+        after_new = unread_counter.get(db, resident.id)
+        notification_crud.mark_all_notifications_as_read(db, resident.id)
+        after_all = unread_counter.get(db, resident.id)
+
+    assert (after_one, after_new, after_all) == (2, 3, 0)
+    assert _counts_from_db(statements) == []
+
+def test_a_recount_that_raced_with_a_commit_is_not_cached(db, resident, count_queries):
+    seen = []
+    with SessionLocal() as other:
+        other.add(Notification(user_id=resident.id, title="t", message="m", type="info"))
+        # Runs after the commit but before its delta is applied: the recount
+        # already includes the new notification
+        on_commit(other, lambda: seen.append(unread_counter.get(db, resident.id)))
+        unread_counter.adjust(other, resident.id, 1)
+        other.commit()
+
+    with count_queries() as statements:
+        count = unread_counter.get(db, resident.id)
+
+    assert seen == [1]
+    # Not cached then, so it is counted again rather than served as 1 + 1
+    assert count == 1
+    assert len(_counts_from_db(statements)) == 1
@@ -0,0 +1,60 @@
+import time
+from app.config.database import SessionLocal
+from app.models import User
+from app.services.user_cache import UserCache, user_cache
+from tests.conftest import make_user
+
+ADMIN_ONLY = "/admin/users"
+
+def test_role_change_takes_effect_on_the_next_request(client, db, resident, resident_headers):
+    assert client.get(ADMIN_ONLY, headers=resident_headers).status_code == 403
+    assert user_cache.get(resident.email).role == "resident"
+
+    with SessionLocal() as session:
+        user = session.get(User, resident.id)
+        user.role = "admin"
+        user_cache.invalidate_on_commit(session, user.email)
+        # A request resolving the user before the commit caches the old row again...
+        user_cache.put(resident)
+        assert user_cache.get(resident.email).role == "resident"
+        session.commit()
+
+    # ...and the commit drops it, so the token's next request sees the new role
+    assert user_cache.get(resident.email) is None
+    assert client.get(ADMIN_ONLY, headers=resident_headers).status_code == 200
+
+def test_password_change_drops_the_cached_user(client, resident, resident_headers):
+    client.get("/resident/profile", headers=resident_headers)
+    assert user_cache.get(resident.email) is not None
+
+    response = client.post("/resident/change-password", json={
+        "current_password": "password", "new_password": "new-password"
+    }, headers=resident_headers)
+
+    assert response.status_code == 200
+    assert user_cache.get(resident.email) is None
+    login = client.post("/auth/login", json={"email": resident.email, "password": "new-password"})
+    assert login.status_code == 200
+
+def test_entries_expire_after_the_ttl(db):
+    cache = UserCache(ttl_seconds=0.05, max_size=10)
+    user = make_user(db, "asha@example.com")
+    cache.put(user)
+    assert cache.get(user.email).id == user.id
+
+    time.sleep(0.1)
+
+    assert cache.get(user.email) is None
+
+def test_least_recently_used_entry_is_evicted_first(db):
+    cache = UserCache(ttl_seconds=60, max_size=2)
+    asha, ben, cy = (make_user(db, f"{name}@example.com") for name in ("asha", "ben", "cy"))
+    cache.put(asha)
+    cache.put(ben)
+    cache.get(asha.email)
+
+    cache.put(cy)
+
+    assert cache.get(ben.email) is None
+    assert cache.get(asha.email).id == asha.id
+    assert cache.get(cy.email).id == cy.id
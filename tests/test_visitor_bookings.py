@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from app.config.database import engine
+from app.crud.visitor_crud import activate_due_bookings
+from app.models import Slot, Visitor
+from app.services.availability_feed import availability_feed
+from app.services.reservation_index import reservation_index
+from tests.conftest import make_slots
+
+def _booking(start: datetime, hours: int = 2):
+    return {
+        "visitor_name": "Guest",
+        "vehicle_number": "KA01AB1234",
+        "vehicle_type": "four_wheeler",
+        "entry_time": start.isoformat(),
+        "exit_time": (start + timedelta(hours=hours)).isoformat()
+    }
+
+def test_future_bookings_get_slots_free_for_their_window(client, db, resident_headers):
+    make_slots(db, 2)
+    start = datetime.now() + timedelta(days=1)
+
+    first = client.post("/resident/visitors/visitors", json=_booking(start), headers=resident_headers)
+    second = client.post("/resident/visitors/visitors", json=_booking(start + timedelta(hours=1)), headers=resident_headers)
+    third = client.post("/resident/visitors/visitors", json=_booking(start), headers=resident_headers)
+    later = client.post("/resident/visitors/visitors", json=_booking(start + timedelta(hours=3)), headers=resident_headers)
+
+    assert first.status_code == second.status_code == later.status_code == 200
+    assert first.json()["slot_id"] != second.json()["slot_id"]
+    assert third.status_code == 400
+    assert later.json()["slot_id"] == first.json()["slot_id"]
+
+def test_overlap_rejected_by_the_database_is_a_conflict(client, db, resident, resident_headers):
+    slot = make_slots(db, 1)[0]
+    start = datetime.now() + timedelta(days=1)
+    # Stands in for the PostgreSQL exclusion constraint
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER visitors_no_overlap BEFORE INSERT ON visitors "
+            "WHEN EXISTS (SELECT 1 FROM visitors WHERE slot_id = NEW.slot_id AND status = 'approved' "
+            "AND entry_time < NEW.exit_time AND exit_time > NEW.entry_time) "
+            "BEGIN SELECT RAISE(ABORT, 'overlapping booking'); END"
+        ))
+    # Booked by another process, so this process' reservation index does not know it
+    db.add(Visitor(
+        visitor_name="Other", vehicle_number="X", vehicle_type="four_wheeler", status="approved",
+        entry_time=start, exit_time=start + timedelta(hours=2), resident_id=resident.id, slot_id=slot.id
+    ))
+    db.commit()
+
+    response = client.post("/resident/visitors/visitors", json=_booking(start), headers=resident_headers)
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Slot not available for that window"
+    assert db.query(Visitor).count() == 1
+
+def test_started_bookings_occupy_their_slots(db, resident):
+    booked, unbooked = make_slots(db, 2)
+    now = datetime.now()
+    db.add_all([
+        Visitor(visitor_name="Now", vehicle_number="A", vehicle_type="four_wheeler", status="approved",
+                entry_time=now - timedelta(minutes=5), exit_time=now + timedelta(hours=1),
+                resident_id=resident.id, slot_id=booked.id),
+        Visitor(visitor_name="Later", vehicle_number="B", vehicle_type="four_wheeler", status="approved",
+                entry_time=now + timedelta(hours=1), exit_time=now + timedelta(hours=2),
+                resident_id=resident.id, slot_id=unbooked.id),
+    ])
+    db.commit()
+    availability_feed.reload(db)
+
+    assert activate_due_bookings(db, now) == 1
+    assert activate_due_bookings(db, now) == 0
+
+    db.expire_all()
+    assert db.get(Slot, booked.id).status == "occupied"
+    assert db.get(Slot, unbooked.id).status == "available"
+    assert {change.slot_type: change.available for change in availability_feed.snapshot()} == {"four_wheeler": 1}
+
+def test_booked_slots_are_indexed_by_type(client, db, resident_headers):
+    car = make_slots(db, 1)[0]
+    bike = make_slots(db, 1, slot_type="two_wheeler", prefix="B")[0]
+    start = datetime.now() + timedelta(days=1)
+    bike_booking = {**_booking(start), "vehicle_type": "two_wheeler"}
+
+    assert client.post("/resident/visitors/visitors", json=_booking(start), headers=resident_headers).json()["slot_id"] == car.id
+    assert client.post("/resident/visitors/visitors", json=bike_booking, headers=resident_headers).json()["slot_id"] == bike.id
+
+    window = (start, start + timedelta(hours=2))
+    assert reservation_index.booked_slot_ids(db, *window, "four_wheeler") == {car.id}
+    assert reservation_index.booked_slot_ids(db, *window, "two_wheeler") == {bike.id}
+    assert reservation_index.booked_slot_ids(db, *window) == {car.id, bike.id}
+
+    # Reloading from the database rebuilds the same per-type index
+    reservation_index.load(db)
+    assert reservation_index.booked_slot_ids(db, *window, "two_wheeler") == {bike.id}